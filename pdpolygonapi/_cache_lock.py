@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ---
+#  per cache file locks, atomic cache file writes, and the cache directories.
+# ---
+
+import contextlib
+import os
+import pathlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # (Windows) the locks are then shared only within one process
+    fcntl = None
+
+_thread_locks = dict()
+_thread_locks_guard = threading.Lock()
+
+_made_dirs = set()
+
+
+def cache_subdir(name):
+    """
+    The cache directory `Path.home()/.pdpolygonapi/<name>`, which is made (if need be)
+    only the first time it is asked for, rather than every time a cache file is named.
+    """
+    path = pathlib.Path.home() / ".pdpolygonapi" / name
+    if path not in _made_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _made_dirs.add(path)
+    return path
+
+
+def _lock_dir():
+    return cache_subdir("locks")
+
+
+@contextlib.contextmanager
+def cache_key_lock(cf):
+    """
+    Exclusive lock on one cache file `cf`, shared by all threads and processes on the
+    host (via fcntl.flock on a lock file under `Path.home()/.pdpolygonapi/locks/`).
+    Holding the lock for one cache file never blocks access to any other cache file,
+    nor does it block *reading* `cf` (see `atomic_write()`).
+    """
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(cf.name, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(_lock_dir() / (cf.name + ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_write(cf, write):
+    """
+    Call `write(path)` to write a temporary file alongside `cf`, then rename it to `cf`.
+    The rename is atomic, so readers of `cf` see either the previous file or the new
+    file, but never a partially written file.  The temporary file name keeps the suffix
+    of `cf` (so that the file format may be inferred from it), and begins with "."
+    """
+    tmp = cf.with_name(".tmp.%d.%d.%s" % (os.getpid(), threading.get_ident(), cf.name))
+    try:
+        write(tmp)
+        os.replace(tmp, cf)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+##########################################################################################
+#  Copyright 2023, Daniel Goldfarb, dgoldfarb.github@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+#  this package and its associated files except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#  A copy of the License may also be found in the package repository.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################################
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ---
+#  manifest (index) of the OHLCV cache files, kept in a small sqlite database.
+# ---
+
+import collections
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# Cache file names are "<ticker>.<span>.<span_multiplier>[.all][.compact].<partition>.<format>",
+# where the partition is a year, a month, or a day ("2025", "2025-01", or "2025-01-02"):
+_CACHE_FILE_NAME = re.compile(
+    r"^(?P<ticker>.+)\.(?P<span>second|minute|hour|day|week|month|quarter|year)\.(?P<mult>\d+)"
+    + r"(?:\.all)?(?:\.compact)?\.(?P<partition>\d{4}(?:-\d{2}){0,2})\.(?P<format>[a-z][a-z0-9.]*)$"
+)
+_PARTITION_FREQ = {4: "Y", 7: "M", 10: "D"}  # (by the length of the partition's name)
+
+# Bumped whenever the partitions table changes (the manifest is then rebuilt):
+_SCHEMA_VERSION = 2
+
+_EXCHANGE_TZ = "US/Eastern"
+
+
+
+def cache_file_partition(name):
+    """
+    Parse the name of a cache file: return (stem, span, span_multiplier, partition),
+    where `stem` is the name up to the partition (for example "SPY.minute.1.all.") and
+    `partition` is a `pd.Period`; or return None if `name` is not that of a cache file.
+    """
+    m = _CACHE_FILE_NAME.match(name)
+    if m is None:
+        return None
+    partition = pd.Period(m["partition"], freq=_PARTITION_FREQ[len(m["partition"])])
+    return name[: m.start("partition")], m["span"], int(m["mult"]), partition
+
+
+Partition = collections.namedtuple(
+    "Partition",
+    "file ticker span span_multiplier partition first_ts last_ts rows bytes mtime_ns fetched_at complete",
+)
+Partition.__doc__ = """
+One cache file (one partition of the cache): `partition` names the year, month or day that
+it holds; `first_ts` and `last_ts` are the first and last aggregate timestamps (int64
+nanoseconds, naive exchange time); `fetched_at` is when its data was last requested (unix
+seconds); `complete` is True if it was requested after the end of its partition (so the
+cache file will never change).
+"""
+
+
+class CacheManifest:
+    """
+    Manifest of the OHLCV cache files in `cache_dir`, kept in the sqlite database `path`,
+    so that cache lookups, coverage checks, and clears are index queries rather than
+    file system scans and cache file reads.  The manifest may be shared by many threads
+    and processes (sqlite handles the locking).
+
+    The first time a manifest is created it is seeded with the cache files already in
+    `cache_dir`; those entries carry no `mtime_ns` (and so never match the file) until
+    the cache file is next read (see `matches()`) and `record()`ed.
+    """
+
+    def __init__(self, path, cache_dir):
+        self.path = str(path)
+        self.cache_dir = cache_dir
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # The schema is checked, created, and seeded in one (write locked) transaction, so
+        # that no other thread or process sees the table before it is complete.  (Without
+        # the explicit BEGIN, the sqlite3 module commits each CREATE as it is executed,
+        # and another manifest might see the new table before its `user_version` is set,
+        # and drop it).
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='partitions'"
+            ).fetchone()
+            if exists is not None and conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                conn.execute("DROP TABLE partitions")
+                exists = None
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS partitions (file TEXT PRIMARY KEY, ticker TEXT,"
+                + " span TEXT, span_multiplier INTEGER, partition TEXT, first_ts INTEGER,"
+                + " last_ts INTEGER, rows INTEGER, bytes INTEGER, mtime_ns INTEGER,"
+                + " fetched_at REAL, complete INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS partitions_ticker ON partitions (ticker)")
+            conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+            if exists is None:
+                self._seed(conn)
+
+    def _conn(self):
+        # one connection per thread (and per process, in case of fork):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _complete(partition, fetched_at):
+        period = pd.Period(partition, freq=_PARTITION_FREQ[len(partition)])
+        end = (period + 1).start_time.tz_localize(_EXCHANGE_TZ)
+        return fetched_at >= end.timestamp()
+
+    def _seed(self, conn):
+        for child in self.cache_dir.iterdir():
+            m = _CACHE_FILE_NAME.match(child.name)
+            if m is None or child.name.startswith("."):
+                continue
+            st = child.stat()
+            partition = m["partition"]
+            entry = Partition(child.name, m["ticker"], m["span"], int(m["mult"]), partition, None, None,
+                              None, st.st_size, None, st.st_mtime, self._complete(partition, st.st_mtime))
+            conn.execute("INSERT OR REPLACE INTO partitions VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", entry)
+
+    def _put(self, entry):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO partitions VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", entry)
+
+    def record(self, cf, df, fetched_at=None):
+        """
+        Record (or re-record) cache file `cf`, just written (or read) with contents `df`.
+        """
+        m = _CACHE_FILE_NAME.match(cf.name)
+        if m is None:
+            return None
+        st = os.stat(cf)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        partition = m["partition"]
+        first_ts, last_ts = (int(df.index[0].value), int(df.index[-1].value)) if len(df) > 0 else (None, None)
+        entry = Partition(
+            cf.name, m["ticker"], m["span"], int(m["mult"]), partition, first_ts, last_ts, len(df),
+            st.st_size, st.st_mtime_ns, fetched_at, self._complete(partition, fetched_at),
+        )
+        self._put(entry)
+        return entry
+
+    def lookup(self, cf):
+        """Return the `Partition` for cache file `cf`, or None."""
+        row = self._conn().execute("SELECT * FROM partitions WHERE file=?", (cf.name,)).fetchone()
+        return None if row is None else Partition(*row[:-1], bool(row[-1]))
+
+    def lookup_many(self, cache_files):
+        """Return a dict, cache file name: `Partition`, for those of `cache_files` in the manifest."""
+        names = [cf.name for cf in cache_files]
+        rows = self._conn().execute(
+            "SELECT * FROM partitions WHERE file IN (%s)" % ",".join("?" * len(names)), names
+        ).fetchall()
+        return {row[0]: Partition(*row[:-1], bool(row[-1])) for row in rows}
+
+    @staticmethod
+    def matches(entry, stat_result):
+        """True if `entry` describes the cache file whose `os.stat()` is `stat_result`."""
+        return (
+            entry is not None
+            and entry.mtime_ns == stat_result.st_mtime_ns
+            and entry.bytes == stat_result.st_size
+        )
+
+    def files(self, ticker=None):
+        """Names of all cache files (or of all cache files for `ticker`)."""
+        if ticker is None:
+            rows = self._conn().execute("SELECT file FROM partitions ORDER BY file").fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT file FROM partitions WHERE ticker=? ORDER BY file", (ticker,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, names):
+        with self._conn() as conn:
+            conn.executemany("DELETE FROM partitions WHERE file=?", [(name,) for name in names])
+
+
+##########################################################################################
+#  Copyright 2023, Daniel Goldfarb, dgoldfarb.github@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+#  this package and its associated files except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#  A copy of the License may also be found in the package repository.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################################
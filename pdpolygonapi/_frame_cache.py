@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ---
+#  in-memory least recently used cache of the DataFrames parsed from cache files.
+# ---
+
+import collections
+import os
+import threading
+
+
+class FrameCache:
+    """
+    Least recently used (LRU) cache, held in memory, of the DataFrames read from the
+    OHLCV cache files, so that repeated requests for the same ticker and span need not
+    re-read and re-parse the cache file.  Each entry is keyed by cache file path, and is
+    valid only while the file's (mtime, size) are unchanged, so that a cache file that
+    is re-written (by this process or by any other process) is read again.
+
+    The total memory held by the cached DataFrames is limited to `max_bytes`; the least
+    recently used DataFrames are evicted to stay within the limit.  `max_bytes=0`
+    disables the cache.
+
+    Attributes:
+        hits:      number of lookups served from memory.
+        misses:    number of lookups that had to read the cache file.
+        evictions: number of DataFrames evicted to stay within `max_bytes`.
+        nbytes:    memory currently held by the cached DataFrames.
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()  # path -> (stamp, nbytes, df)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, path, key=None):
+        """
+        Return the cached DataFrame for `path`, or None if it is not cached
+        (or if the file has changed since it was cached).  A `key` other than
+        `path` identifies a DataFrame holding only part of the file.
+        """
+        key = path if key is None else key
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def peek(self, path):
+        """
+        Return the cached DataFrame for `path` if it is cached and unchanged, else None
+        (without counting a hit or a miss, nor changing the order of eviction).
+        """
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            return entry[2] if entry is not None and entry[0] == stamp else None
+
+    def load(self, path, reader, key=None):
+        """
+        Return the cached DataFrame for `path` (or for `key`, see `get()`), or else
+        `reader(path)` (which is then cached).
+        """
+        key = path if key is None else key
+        df = self.get(path, key)
+        if df is None:
+            stamp = self._stamp(path)  # (stamp *before* reading, in case the file changes)
+            df = reader(path)
+            self._put(key, df, stamp)
+        return df
+
+    def put(self, path, df):
+        """
+        Cache `df` as the contents of `path` (for example, right after writing it).
+        """
+        self._put(path, df, self._stamp(path))
+
+    def _put(self, path, df, stamp):
+        if self.max_bytes == 0 or stamp is None:
+            return
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[path] = (stamp, nbytes, df)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, path):
+        _stamp, nbytes, _df = self._entries.pop(path)
+        self.nbytes -= nbytes
+
+    def discard(self, path):
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            nbytes=self.nbytes,
+            max_bytes=self.max_bytes,
+        )
+
+
+##########################################################################################
+#  Copyright 2023, Daniel Goldfarb, dgoldfarb.github@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+#  this package and its associated files except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#  A copy of the License may also be found in the package repository.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################################
@@ -6,20 +6,119 @@
 #  do NOT call this class directly.
 # ---
 
+import asyncio
 import datetime
+import json
 import requests
+import threading
 import time
 import warnings
 
+import numpy as np
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from pdpolygonapi._rate_limiter import RateLimiter
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed for the `*_async()` methods
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: a (much) faster json decoder
+    orjson = None
 
 
 class _PolygonApiBase:
     _OHLCV_COLMAP = dict(o="Open", h="High", l="Low", c="Close", v="Volume")  # ,vw='VolWgtPx')
 
+    # dtypes of the OHLCV DataFrames: "default" or "compact" (see `_compact_ohlcvdf()`):
+    dtypes = "default"
+    _BASE_URL = "https://api.polygon.io"
+
     def __init__(self):
         self.APIKEY = None
 
+    def _init_transport(self, pool_size=10, timeout=5, requests_per_minute=None):
+        # One pooled, keep-alive session per instance, so that paging through
+        # many requests re-uses connections instead of paying a new TCP+TLS
+        # handshake for every request.
+        self.base_url = self._BASE_URL
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        # Requests may be made from many threads at once (for example, range shards
+        # of several years of data), so cap the number in flight at the pool size:
+        self._in_flight = threading.BoundedSemaphore(pool_size)
+        self._async_session = None
+        self._async_loop = None
+        # Decode responses with orjson when it is installed, else with the standard library:
+        self._json_loads = json.loads if orjson is None else orjson.loads
+        # Proactive rate limiting (when requests_per_minute is set), shared by all
+        # threads and processes on this host that use the same api key:
+        if requests_per_minute is None:
+            self.rate_limiter = None
+        else:
+            self.rate_limiter = RateLimiter(requests_per_minute, key=self.APIKEY)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_async_session(self):
+        # The aiohttp session is bound to the event loop on which it was created,
+        # so create it lazily (and re-create it if used from a different loop).
+        # Its connector limit (pool_size) caps the number of requests in flight.
+        if aiohttp is None:
+            raise ImportError("The `*_async()` methods require aiohttp:  pip install aiohttp")
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_session is None
+            or self._async_session.closed
+            or self._async_loop is not loop
+        ):
+            self._async_loop = loop
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout),
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+        return self._async_session
+
+    async def aclose(self):
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+        self.close()
+
+    def _max_requests_exceeded(self, rjson):
+        #  'error': "You've exceeded the maximum requests per minute, please wait
+        #  or upgrade your subscription to continue. https://polygon.io/pricing"
+        return (
+            self.wait
+            and "results" not in rjson
+            and "error" in rjson
+            and "exceeded" in rjson["error"]
+            and "upgrade" in rjson["error"]
+        )
+
     def _input_to_datetime(self, input, adj=None):
         if isinstance(input, int):
             dtm = datetime.datetime.today() + datetime.timedelta(days=input)
@@ -38,26 +137,73 @@ class _PolygonApiBase:
         # print('dtm=',dtm)
         return str(int(dtm.timestamp() * 1000))
 
+    def _rate_limit_delay(self, rjson=None):
+        # Return the seconds to wait before the next request: either to take a token
+        # from the rate limiter or, if polygon.io says the maximum requests per minute
+        # has been exceeded (`rjson`), to back off before trying again.
+        if rjson is not None:
+            self.logger.warning("Max requests per minute exceeded; waiting to try again.")
+            if self.rate_limiter is None:
+                return 12
+            self.rate_limiter.penalize()
+        if self.rate_limiter is None:
+            return 0
+        delay = self.rate_limiter.reserve()
+        if delay > 0:
+            self.logger.debug(f"rate limit: waiting {delay:.3f} seconds")
+        return delay
+
     def _req_get_json(self, req):
         have_response = False
+        time.sleep(self._rate_limit_delay())
         while not have_response:
-            r = requests.get(req, timeout=5)
-            rjson = r.json()
-            if (
-                self.wait
-                and "results" not in rjson
-                and "error" in rjson
-                and "exceeded" in rjson["error"]
-                and "upgrade" in rjson["error"]
-            ):
-                #  'error': "You've exceeded the maximum requests per minute, please wait
-                #  or upgrade your subscription to continue. https://polygon.io/pricing"
-                self.logger.warning("Max requests per minute exceeded; waiting to try again.")
-                time.sleep(12)
+            with self._in_flight:
+                r = self.session.get(req, timeout=self.timeout)
+            rjson = self._json_loads(r.content)
+            if self._max_requests_exceeded(rjson):
+                time.sleep(self._rate_limit_delay(rjson))
             else:
                 have_response = True
         return rjson
 
+    async def _req_get_json_async(self, req):
+        session = self._get_async_session()
+        have_response = False
+        await asyncio.sleep(self._rate_limit_delay())
+        while not have_response:
+            async with session.get(req) as r:
+                rjson = self._json_loads(await r.read())
+            if self._max_requests_exceeded(rjson):
+                await asyncio.sleep(self._rate_limit_delay(rjson))
+            else:
+                have_response = True
+        return rjson
+
+    @staticmethod
+    def _ns_index(ix):
+        # Always return nanosecond resolution DatetimeIndexes (naive, or in the time zone
+        # of `ix`), as older versions of pandas did, so that frames built from requests and
+        # frames read from cache files (whatever resolution the file reader chooses) have
+        # identical indexes.
+        ix = pd.DatetimeIndex(ix)
+        dtype = "datetime64[ns]" if ix.tz is None else pd.DatetimeTZDtype("ns", ix.tz)
+        return ix if ix.dtype == dtype else ix.astype(dtype)
+
+    @staticmethod
+    def _results_to_df(results, columns):
+        # Build a DataFrame of the `columns` (keys) of a list of result dicts, one column
+        # array at a time, which (for pages of up to 50,000 results) is several times
+        # faster than having pandas build the DataFrame from the list of dicts.  If any
+        # result is missing one of the keys, or any column is not of a single (numeric
+        # or string) type, then fall back to building the DataFrame from the dicts.
+        try:
+            data = {key: np.array([r[key] for r in results]) for key in columns}
+        except KeyError:
+            data = None
+        if data is None or any(a.dtype == object or a.ndim != 1 for a in data.values()):
+            return pd.DataFrame(results)
+        return pd.DataFrame(data)
+
     def _json_response_to_ohlcvdf(self, span, rjson, tz="US/Eastern"):
         if "results" not in rjson:
             if "message" in rjson:
@@ -67,27 +213,42 @@ class _PolygonApiBase:
             elif "status" not in rjson or (
                 "status" in rjson and rjson["status"] != "OK" and rjson["status"] != "DELAYED"
             ):
-                sreq = str(req)[: req.find("&apiKey=")] + "&apiKey=***"
-                message = "No results returned for req=" + sreq
+                message = "No results returned for ticker=" + str(rjson.get("ticker"))
             else:  #  valid empty results (for example, ticker was not traded for specified datetime)
                 return pd.DataFrame(columns=self._OHLCV_COLMAP.values())
 
             warnings.warn("\n" + message)
             return None
 
-        tempdf = pd.DataFrame(rjson["results"])
+        tempdf = self._results_to_df(rjson["results"], ["t", *self._OHLCV_COLMAP])
 
-        tempdf.index = [pd.Timestamp(t * 1000000.0, tz="UTC") for t in tempdf.t.values]
+        # convert all of the (int64 millisecond, UTC) timestamps at once:
+        ix = pd.to_datetime(tempdf.t.to_numpy(dtype="int64"), unit="ms", utc=True)
         if span in ("day", "week", "month", "quarter", "year"):
-            tempdf.index = pd.DatetimeIndex([t.date() for t in tempdf.index])
+            ix = ix.tz_localize(tz=None).normalize()  # (the date of each aggregate)
         else:  # span is hour, minute or second:
-            tempdf.index = tempdf.index.tz_convert(tz=tz).tz_localize(tz=None)
+            ix = ix.tz_convert(tz=tz).tz_localize(tz=None)
+        tempdf.index = self._ns_index(ix)
 
         tempdf.rename(columns=self._OHLCV_COLMAP, inplace=True)
         tempdf.index.name = rjson["ticker"]
-        retdf = tempdf[self._OHLCV_COLMAP.values()]
+        retdf = tempdf[list(self._OHLCV_COLMAP.values())]
+        if self.dtypes == "compact":
+            retdf = self._compact_ohlcvdf(retdf)
         return retdf
 
+    @staticmethod
+    def _compact_ohlcvdf(df):
+        # Prices as float32, and Volume (rounded to whole shares) as uint32, or as
+        # uint64 if any volume does not fit in uint32 (see `dtypes` in `PolygonApi`):
+        volume = df["Volume"].to_numpy(dtype="float64").round()
+        if len(volume) > 0 and volume.max() > np.iinfo(np.uint32).max:
+            volume = volume.astype("uint64")
+        else:
+            volume = volume.astype("uint32")
+        prices = {col: df[col].to_numpy(dtype="float32") for col in ("Open", "High", "Low", "Close")}
+        return pd.DataFrame(dict(**prices, Volume=volume), index=df.index)
+
 
 ##########################################################################################
 #  Copyright 2023, Daniel Goldfarb, dgoldfarb.github@gmail.com
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ---
+#  token bucket rate limiter, shared by all threads and processes on a host.
+# ---
+
+import hashlib
+import pathlib
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # (Windows) the bucket is then shared only within one process
+    fcntl = None
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the number of requests per minute made with one Polygon.io
+    api key.  The state of the bucket (the number of tokens, and when it was last
+    updated) is kept in a small file under `Path.home()/.pdpolygonapi/rate_limit/`,
+    which is locked (fcntl.flock) while it is updated, so the bucket is shared by
+    every thread and every process on the host that uses the same api key.
+
+    Rather than polling for a token, each caller *reserves* the next token (the token
+    count may go negative) and is told how long to wait for it; thus waiting callers
+    are served in order, and requests go out evenly spaced at the configured rate.
+
+    Attributes (for this process):
+        requests:   number of tokens reserved.
+        wait_count: number of reservations that had to wait.
+        wait_time:  total seconds that callers were told to wait.
+    """
+
+    _STATE = struct.Struct("dd")  # tokens, timestamp
+
+    def __init__(self, requests_per_minute, key="", burst=1, path=None):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be > 0")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self.requests_per_minute = requests_per_minute
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        if path is None:
+            digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+            path = pathlib.Path.home() / ".pdpolygonapi/rate_limit" / (digest + ".bucket")
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        self._local_state = None  # used only when fcntl is not available
+        self.requests = 0
+        self.wait_count = 0
+        self.wait_time = 0.0
+
+    def _update(self, update):
+        # Apply `update(tokens, timestamp) -> tokens` to the shared bucket state.
+        with self._thread_lock:
+            now = time.time()
+            if fcntl is None:
+                tokens, then = self._local_state or (self.burst, now)
+                tokens = update(min(self.burst, tokens + (now - then) * self.rate))
+                self._local_state = (tokens, now)
+                return tokens
+            with open(self.path, "a+b") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    data = f.read(self._STATE.size)
+                    if len(data) == self._STATE.size:
+                        tokens, then = self._STATE.unpack(data)
+                        tokens = min(self.burst, tokens + max(0.0, now - then) * self.rate)
+                    else:
+                        tokens = self.burst
+                    tokens = update(tokens)
+                    f.seek(0)
+                    f.truncate()
+                    f.write(self._STATE.pack(tokens, now))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return tokens
+
+    def reserve(self):
+        """
+        Reserve the next token, and return the number of seconds to wait
+        before making the request (0.0 if a token is available now).
+        """
+        tokens = self._update(lambda tokens: tokens - 1.0)
+        delay = max(0.0, -tokens / self.rate)
+        with self._thread_lock:
+            self.requests += 1
+            if delay > 0:
+                self.wait_count += 1
+                self.wait_time += delay
+        return delay
+
+    def acquire(self):
+        """
+        Block until the next token is available; return the seconds waited.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def penalize(self):
+        """
+        Polygon.io says the limit was exceeded anyway (for example, because of requests
+        made by another host): drop any available tokens, so that all callers back off.
+        """
+        self._update(lambda tokens: min(tokens, 0.0))
+
+    def stats(self):
+        return dict(requests=self.requests, wait_count=self.wait_count, wait_time=self.wait_time)
+
+
+##########################################################################################
+#  Copyright 2023, Daniel Goldfarb, dgoldfarb.github@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+#  this package and its associated files except in compliance with the License.
+#  You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+#  A copy of the License may also be found in the package repository.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################################
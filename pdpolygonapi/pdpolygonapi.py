@@ -5,19 +5,25 @@
 #  class for accessing polygon.io REST api.
 # ---
 
+import asyncio
+import collections
+import collections.abc
+import concurrent.futures
+import contextlib
 import datetime
+import importlib.util
+import json
 import logging
 import os
 import pathlib
 import warnings
 
-# from  multiprocess    import Lock as MultiProcessLock # prefer
-from multiprocessing import Lock as MultiProcessLock  # more common
-
 import numpy as np
 import pandas as pd
-import requests
 
+from pdpolygonapi._cache_lock import atomic_write, cache_key_lock, cache_subdir
+from pdpolygonapi._cache_manifest import CacheManifest, cache_file_partition
+from pdpolygonapi._frame_cache import FrameCache
 from pdpolygonapi._pdpolygonapi_base import _PolygonApiBase
 
 
@@ -43,10 +49,31 @@ class PolygonApi(_PolygonApiBase):
 
     fetch_ohlcvdf()       - given a ticker, returns a dataframe of OHLCV data.
 
+    fetch_ohlcvdf_many()  - given a list of tickers, concurrently fetches OHLCV
+                            data for all of them.
+
     fetch_options_chain() - given an underlying ticker, and optionally given
                             also first and last expiration dates, returns all
                             options tickers with those criteria.
 
+    fetch_chain_ohlcv()   - given an options chain, concurrently fetches OHLCV
+                            data for all (or a selection) of its contracts.
+
+    fetch_quotes()        - given a ticker and a date, returns 1 second (or
+                            `bar_width`) bars of bid/ask quote data.
+
+    iter_quotes()         - given a ticker and a date, yields the quotes one
+                            page at a time (and `iter_quote_bars()` yields the
+                            1 second bars as each second is finished).
+
+    fetch_quotes_range()  - given a ticker and a range of dates, returns quotes
+                            (or 1 second bars) fetched several days at once,
+                            and optionally cached per day.
+
+    Each of the above also has a coroutine version (`fetch_ohlcvdf_async()`,
+    `fetch_options_chain_async()`, `fetch_quotes_async()`) for use within an
+    asyncio event loop (requires `aiohttp`).
+
     """
 
     # TODO:
@@ -68,18 +95,28 @@ class PolygonApi(_PolygonApiBase):
     #       to lock since multiple simulateous reads are fine.  So that is
     #       what I am going to implement next: Only lock for each cache until
     #       we know that we have a cache file for that request.
+    #
+    #       UPDATE: There is no longer a single cache_file_lock.  Cache files
+    #       are now written to a temporary file that is then atomically renamed
+    #       (see `_cache_lock.atomic_write()`), so a reader can never see a
+    #       partially written cache file, and reading needs no lock at all.
+    #       The only remaining lock is per cache file (`cache_key_lock()`) and
+    #       it is held only until we know that we have an up to date cache file
+    #       for that request: if the cache file is missing (or out of date) then
+    #       the lock is held while requesting its data, so that other threads or
+    #       processes wanting the *same* cache file wait for it (rather than all
+    #       requesting the same data).  Fetching TSLA never blocks access to SPY.
 
-    cache_file_lock = MultiProcessLock()
     cached_files = dict()
 
-    def cflock_acquire():
-        PolygonApi.cache_file_lock.acquire()
+    _DTYPES = ("default", "compact")
 
-    def cflock_release():
-        try:
-            PolygonApi.cache_file_lock.release()
-        except:
-            pass
+    # Cache file formats (file name suffixes) supported by `cache_format`:
+    _CACHE_FORMATS = ("csv.gz", "parquet", "arrow")
+
+    # Regular market session (exchange time) for `market="regular"`:
+    _EXCHANGE_TZ = "US/Eastern"
+    _REGULAR_SESSION = ("09:30", "16:00")
 
     def __init__(
         self,
@@ -88,6 +125,13 @@ class PolygonApi(_PolygonApiBase):
         loglevel: int | str = logging.WARNING,
         wait: bool = True,
         cache: bool = False,
+        pool_size: int = 10,
+        timeout: float = 5,
+        requests_per_minute: int | None = None,
+        cache_format: str = "csv.gz",
+        cache_memory: int = 256 * 2**20,
+        dtypes: str = "default",
+        options_chain_ttl: float = 24 * 3600,
     ) -> None:
         """
         Class to provide interface methods to access the Polygon.io REST api.
@@ -109,6 +153,61 @@ class PolygonApi(_PolygonApiBase):
             cache:    default value for cache, to be used when not specified within the
                       arguments of individual methods.
 
+            pool_size: Maximum number of pooled (keep-alive) connections to polygon.io
+                      held by this instance.  All requests share this connection pool.
+
+            timeout:  Timeout (in seconds) for each request made to polygon.io
+
+            requests_per_minute: If set, the maximum number of requests per minute
+                      allowed by your Polygon.io plan.  Requests are then spaced out
+                      so as not to exceed this rate, by a token bucket shared by all
+                      threads and processes on this host that use the same api key.
+                      (See `rate_limiter.stats()` for how long requests had to wait).
+                      If not set, then only if polygon.io responds that the maximum
+                      requests per minute was exceeded, (and `wait` is True) wait
+                      12 seconds and try again.
+
+            cache_format: File format of the OHLCV cache files: "csv.gz" (default) or
+                      "parquet".  Parquet files store typed (datetime and float) columns,
+                      so they are much faster to read back than csv.gz (particularly
+                      for intraday spans), and are usually smaller.  Requires `pyarrow`.
+                      "arrow" files (uncompressed Arrow IPC) are larger again, but are
+                      memory mapped rather than read, so a cold read costs next to
+                      nothing.  Where the DataFrame returned comes from one cache file,
+                      with `market="all"` or a daily (or longer) span, its columns are
+                      views of the OS page cache, and any number of processes using the
+                      same cache file share one copy of it in memory.  (The columns are
+                      read only; under pandas copy-on-write, modifying the returned
+                      DataFrame copies the modified columns.)  Otherwise the rows
+                      returned are copied: the rows of the regular (or extended) market
+                      session of an intraday span are not contiguous in the cache file,
+                      nor are those of several cache files.  Requires `pyarrow`.
+                      See also `migrate_ohlcv_cache()`.
+
+            cache_memory: Maximum number of bytes of memory to use for keeping the
+                      DataFrames read from cache files, so that repeated requests for
+                      the same ticker and span are served from memory (least recently
+                      used DataFrames are dropped first).  0 disables.  Default 256 MiB.
+                      (See `frame_cache.stats()` for hits, misses and evictions).
+
+            dtypes:   dtypes of the OHLCV DataFrames returned (and cached): "default"
+                      (float64 prices; Volume as given by polygon.io, usually float64)
+                      or "compact", which takes less than half the memory: prices are
+                      float32 and Volume is uint32 (uint64 if any volume exceeds
+                      4,294,967,295), rounded to whole shares.  float32 holds 24 bits
+                      of mantissa (about 7 significant digits), so compact prices are
+                      within 1 part in 16 million of the price given by polygon.io:
+                      rounding them to the cent (`round(2)`) recovers the exact price
+                      for prices below $83,886, and rounding to 4 decimals recovers
+                      sub-penny prices below $838.  Compact cache files are distinct
+                      from (named ".compact.") the default cache files.
+
+            options_chain_ttl: Seconds for which cached options contracts that have not
+                      yet expired are used (see `fetch_options_chain()` `cache`) before they
+                      are requested again.  Contracts that had already expired when they
+                      were cached never change, so they are never requested again.
+                      Default 24 hours.
+
         Returns:
             An instance of the PolygonApi class
         """
@@ -143,15 +242,53 @@ class PolygonApi(_PolygonApiBase):
         self.wait = wait
         self.cache_initializer = cache
 
+        if cache_format not in self._CACHE_FORMATS:
+            raise ValueError("cache_format must be one of " + str(self._CACHE_FORMATS))
+        if cache_format in ("parquet", "arrow") and importlib.util.find_spec("pyarrow") is None:
+            raise ImportError(f'cache_format="{cache_format}" requires pyarrow:  pip install pyarrow')
+        self.cache_format = cache_format
+        self.frame_cache = FrameCache(cache_memory)
+
+        if dtypes not in self._DTYPES:
+            raise ValueError("dtypes must be one of " + str(self._DTYPES))
+        self.dtypes = dtypes
+        self.options_chain_ttl = options_chain_ttl
+
+        self._init_transport(pool_size=pool_size, timeout=timeout, requests_per_minute=requests_per_minute)
+
     def _cache_dir(self):
-        cache_dir = pathlib.Path.home() / ".pdpolygonapi/ohlcv_cache"
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        return cache_dir
+        return cache_subdir("ohlcv_cache")
+
+    _manifests = dict()
+
+    def _cache_manifest(self):
+        # The manifest (index) of the cache files (see `CacheManifest`) is kept beside,
+        # rather than in, the cache directory, so it is never mistaken for a cache file:
+        cache_dir = self._cache_dir()
+        manifest = PolygonApi._manifests.get(cache_dir)
+        if manifest is None:
+            manifest = CacheManifest(cache_dir.parent / "ohlcv_manifest.sqlite", cache_dir)
+            manifest = PolygonApi._manifests.setdefault(cache_dir, manifest)
+        return manifest
 
     def _cache_file(self, ticker, span, span_multiplier, year=""):
+        # `year` is the cache partition: a year (int), or a `pd.Period` (see
+        # `_ohlcv_cache_files()`), whose string (for example "2025", "2025-01",
+        # or "2025-01-02") names the cache file:
+        if isinstance(year, pd.Period):
+            partition, year = year, year.year
+        else:
+            partition = year
         if isinstance(year, int) and year > 1970 and year < 2100:
+            # Intraday cache files hold data from all market hours (the market session is
+            # selected after reading the cache), and are named so as to be distinct from
+            # older cache files which held only the regular market session:
+            market = ".all" if span in ("second", "minute", "hour") else ""
+            if self.dtypes == "compact":
+                market += ".compact"
             return self._cache_dir() / (
-                ticker + "." + str(span) + "." + str(span_multiplier) + "." + str(year) + ".csv.gz"
+                ticker + "." + str(span) + "." + str(span_multiplier) + market + "." + str(partition)
+                + "." + self.cache_format
             )
         elif isinstance(year, int):
             raise ValueError("Bad year=" + str(year))
@@ -162,24 +299,758 @@ class PolygonApi(_PolygonApiBase):
                 + "===========\n"
             )
             return self._cache_dir() / (
-                ticker + "." + str(span) + "." + str(span_multiplier) + ".csv.gz"
+                ticker + "." + str(span) + "." + str(span_multiplier) + "." + self.cache_format
             )
 
-    def clear_ohlcv_cache(self, ticker):
-        PolygonApi.cflock_acquire()
-        cleared = []
-        p = self._cache_dir()
-        for child in p.iterdir():
-            if (ticker == "all" or
-                ((tlen := len(ticker)+1) > 1 and ticker+"." == child.name[0:tlen])
-               ):
+    def _cache_read_df(self, cf):
+        # read a cache file in any of the supported formats (per its suffix):
+        if cf.name.endswith(".parquet"):
+            df = pd.read_parquet(cf)
+        elif cf.name.endswith(".arrow"):
+            # Memory mapped: each column (and the index) is a zero-copy view of the
+            # file's pages, which Arrow keeps mapped for as long as they are in use:
+            import pyarrow.ipc  # (imported here, since pyarrow is optional)
+
+            with pyarrow.memory_map(str(cf), "r") as source:
+                df = pyarrow.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+        else:
+            df = pd.read_csv(cf, index_col=0, parse_dates=True)
+            if ".compact." in cf.name:  # (text does not keep the dtypes)
+                df = self._compact_ohlcvdf(df)
+        df.index = self._ns_index(df.index)
+        return df
+
+    def _cache_read_rows(self, cf, start, end):
+        # Read only the row groups of parquet cache file `cf` that overlap [start, end]
+        # (per the min/max statistics, kept in the file footer, of each row group's
+        # time stamps):
+        import pyarrow.parquet  # (imported here, since pyarrow is optional)
+
+        with pyarrow.parquet.ParquetFile(cf) as pf:
+            index_columns = pf.schema_arrow.pandas_metadata["index_columns"]
+            jx = pf.schema_arrow.get_field_index(index_columns[0]) if isinstance(index_columns[0], str) else -1
+            groups = []
+            for jj in range(pf.metadata.num_row_groups):
+                stats = pf.metadata.row_group(jj).column(jx).statistics if jx >= 0 else None
+                if stats is None or not stats.has_min_max or (stats.min <= end and stats.max >= start):
+                    groups.append(jj)
+            df = pf.read_row_groups(groups).to_pandas()
+        df.index = self._ns_index(df.index)
+        return df
+
+    def _cache_load(self, cf, partition, window):
+        # Load cache file `cf`, or (if `window`, a (start, end) pair of exchange times,
+        # covers only part of the partition, and `cf` is a parquet file) only the rows
+        # that overlap `window`, unless the whole file is already in memory:
+        if (
+            window is None
+            or not cf.name.endswith(".parquet")
+            or (window[0] <= partition.start_time and window[1] >= partition.end_time.floor("s"))
+        ):
+            return self.frame_cache.load(cf, self._cache_read_df)
+        df = self.frame_cache.peek(cf)
+        if df is None:
+            df = self.frame_cache.load(cf, lambda path: self._cache_read_rows(path, *window), key=(cf, *window))
+        return df
+
+    def _cache_write_df(self, cf, df):
+        # write a cache file (atomically) in the format given by its suffix:
+        if cf.name.endswith(".parquet"):
+            atomic_write(
+                cf, lambda path: df.to_parquet(path, compression="zstd", row_group_size=self._PARQUET_ROW_GROUP)
+            )
+        elif cf.name.endswith(".arrow"):
+            atomic_write(cf, lambda path: self._write_arrow(path, df))
+        else:
+            atomic_write(cf, lambda path: df.to_csv(path))
+
+    @staticmethod
+    def _write_arrow(path, df):
+        import pyarrow.ipc  # (imported here, since pyarrow is optional)
+
+        table = pyarrow.Table.from_pandas(df, preserve_index=True)
+        with pyarrow.OSFile(str(path), "wb") as sink:
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:  # (uncompressed)
+                writer.write_table(table)
+
+    def migrate_ohlcv_cache(self, cache_format=None):
+        """
+        One-shot conversion of all existing OHLCV cache files (in any other format)
+        to `cache_format` (default: the `cache_format` of this instance).  Each file
+        is re-written in the new format, and the original file is removed.
+
+        Where the new format is partitioned differently (see `_cache_partition_freq()`),
+        the cache files are re-partitioned: for example monthly csv.gz cache files are
+        combined into yearly parquet cache files.  A new partition is written only if
+        the original cache files cover it entirely; any original cache files that are
+        needed for a partition that is not covered are left as they are.
+
+        Intraday (second, minute and hour) cache files written by older versions, which
+        held only the regular market session, are never read by this version (whose
+        intraday cache files, named ".all.", hold all market hours).  They cannot be
+        converted, so they are removed (in any format), and that intraday data is
+        requested again, when next wanted.
+
+        The options contracts cache (see `fetch_options_chain()`) of each underlying is
+        converted too, unless it is already cached in `cache_format` (in which case
+        the original is left as it is).
+
+        Returns
+        -------
+        list of the names of the newly written cache files.
+        """
+        if cache_format is None:
+            cache_format = self.cache_format
+        if cache_format not in self._CACHE_FORMATS:
+            raise ValueError("cache_format must be one of " + str(self._CACHE_FORMATS))
+        cache_dir = self._cache_dir()
+        manifest = self._cache_manifest()
+
+        def _remove(child):
+            child.unlink()
+            manifest.remove([child.name])
+            PolygonApi.cached_files.pop(child, None)
+            self.frame_cache.discard(child)
+
+        groups = collections.defaultdict(list)  # (stem, span, span_multiplier, format): [(partition, cf)]
+        for child in sorted(cache_dir.iterdir()):
+            old_format = [f for f in self._CACHE_FORMATS if child.name.endswith("." + f)]
+            if len(old_format) == 0 or child.name.startswith("."):
+                continue
+            parsed = cache_file_partition(child.name)
+            if parsed is not None and self._regular_session_cache_file(*parsed[:2]):
                 print("==> rm", child)
-                child.unlink()
-                cleared.append(child.name)
+                _remove(child)
+            elif parsed is not None and old_format[0] != cache_format:
+                groups[(*parsed[:3], old_format[0])].append((parsed[3], child))
+
+        migrated = []
+        for (stem, span, span_multiplier, _old_format), members in groups.items():
+            members.sort(key=lambda member: member[0].start_time)
+            freq = self._cache_partition_freq(span, span_multiplier, cache_format)
+            fetched = {}
+            for _partition, child in members:
+                entry, st = manifest.lookup(child), child.stat()
+                fetched[child] = entry.fetched_at if manifest.matches(entry, st) else st.st_mtime
+            targets = sorted(
+                {t for p, _cf in members for t in pd.period_range(p.start_time, p.end_time, freq=freq)}
+            )
+            frames, kept = {}, set()
+            for target in targets:
+                over = [(p, cf) for p, cf in members if p.start_time <= target.end_time and p.end_time >= target.start_time]
+                fetched_at = min(fetched[cf] for _p, cf in over)
+                upto = min(target.end_time, pd.Timestamp.fromtimestamp(fetched_at))
+                if target.start_time > upto:
+                    continue  # (nothing had been requested for this partition)
+                contiguous = all((p0 + 1).start_time == p1.start_time for (p0, _), (p1, _) in zip(over, over[1:]))
+                if not contiguous or over[0][0].start_time > target.start_time or over[-1][0].end_time < upto:
+                    kept.update(cf for _p, cf in over)
+                    continue
+                for _p, cf in over:
+                    if cf not in frames:
+                        frames[cf] = self._cache_read_df(cf)
+                if len(over) == 1 and over[0][0] == target:
+                    df = frames[over[0][1]]
+                else:
+                    df = pd.concat([frames[cf] for _p, cf in over]).loc[target.start_time : target.end_time]
+                new_cf = cache_dir / (stem + str(target) + "." + cache_format)
+                with cache_key_lock(new_cf):
+                    self._cache_write_df(new_cf, df)
+                    manifest.record(new_cf, df, fetched_at=fetched_at)
+                print("==> migrated", ", ".join(cf.name for _p, cf in over), "to", new_cf.name)
+                migrated.append(new_cf.name)
+            for _partition, child in members:
+                if child not in kept:
+                    _remove(child)
+        migrated.extend(self._migrate_options_cache(cache_format))
+        return migrated
+
+    def _migrate_options_cache(self, cache_format):
+        # Convert the options contracts cache of each underlying (files and index) to
+        # `cache_format`, unless that underlying is already cached in `cache_format`:
+        options_dir = self._options_cache_dir()
+        migrated = []
+        for index_file in sorted(options_dir.glob("*.options.*.json")):
+            underlying, _, old_format = index_file.name[: -len(".json")].partition(".options.")
+            if old_format == cache_format or old_format not in self._CACHE_FORMATS:
+                continue
+            new_index_file = options_dir / (underlying + ".options." + cache_format + ".json")
+            with cache_key_lock(index_file), cache_key_lock(new_index_file):
+                if new_index_file.exists():
+                    continue
+                prefix, suffix = underlying + ".options.", "." + old_format
+                for cf in sorted(options_dir.glob(prefix + "*" + suffix)):
+                    if cf.name.startswith("."):
+                        continue
+                    new_cf = options_dir / (cf.name[: -len(suffix)] + "." + cache_format)
+                    self._cache_write_df(new_cf, self._cache_read_df(cf))
+                    cf.unlink()
+                    print("==> migrated", cf.name, "to", new_cf.name)
+                    migrated.append(new_cf.name)
+                index = index_file.read_text()
+                atomic_write(new_index_file, lambda path: path.write_text(index))
+                index_file.unlink()
+        return migrated
+
+    @staticmethod
+    def _regular_session_cache_file(stem, span):
+        # True for the (older) intraday cache files that held only the regular market
+        # session: their names lack the ".all" of intraday cache files (see `_cache_file()`):
+        return span in ("second", "minute", "hour") and not stem.endswith((".all.", ".all.compact."))
+
+    def clear_ohlcv_cache(self, ticker):
+        """
+        Remove all of the OHLCV cache files for `ticker` (or for all tickers,
+        if `ticker` is "all").  Returns the list of the names of the removed files.
+        """
+        cache_dir = self._cache_dir()
+        manifest = self._cache_manifest()
+        cleared = manifest.files(None if ticker == "all" else ticker)
+        for name in cleared:
+            child = cache_dir / name
+            print("==> rm", child)
+            child.unlink(missing_ok=True)
+        manifest.remove(cleared)
         PolygonApi.cached_files = dict()
-        PolygonApi.cflock_release()
+        self.frame_cache.clear()
         return cleared
 
+    def _ohlcv_check_args(self, span, market, cache, span_multiplier):
+        self._market_session(market)  # (raises ValueError if `market` is not valid)
+
+        valid_spans = ("second", "minute", "hour", "day", "week", "month", "quarter", "year")
+        if span not in valid_spans:
+            raise ValueError("span must be one of " + str(valid_spans))
+
+        if not isinstance(cache, bool):
+            cache = self.cache_initializer
+
+        if not isinstance(span_multiplier, int):
+            raise TypeError(f"`span_multiplier` must be an int (but is type {type(span_multiplier)}")
+
+        if span_multiplier != 1 and span not in ("second","minute","hour"):
+            raise ValueError(f"`span_multiplier` must be == 1 for `span` not in (\"second\",\"minute\",\"hour\"")
+
+        if span_multiplier < 1:
+            raise ValueError("span_multiplier must be >= 1")
+
+        return cache
+
+    # Maximum number of aggregates that polygon.io returns per request (page):
+    _OHLCV_LIMIT = 50000
+
+    # For sizing shards (see `_ohlcv_shards()`): the average number of hours of
+    # (extended hours) trading per calendar day, and the fraction of the limit to aim for:
+    _TRADING_HOURS_PER_DAY = 16 * 5 / 7
+    _SHARD_FILL = 0.9
+
+    def _ohlcv_shards(self, start_ms, end_ms, span, span_multiplier):
+        # Split the millisecond range [start_ms, end_ms] into contiguous shards, each
+        # expected to hold no more than `_SHARD_FILL * _OHLCV_LIMIT` aggregates, so that
+        # each shard can be requested independently (and concurrently) with a single
+        # request, rather than paging serially through `next_url`.  (Should a shard
+        # hold more aggregates than expected, it is simply paged through as before).
+        # Shard boundaries are on multiples of the aggregate length (from `start_ms`).
+        seconds = dict(second=1, minute=60, hour=3600).get(span)
+        if seconds is None:  # a day or more per aggregate: never more than the limit
+            return [(start_ms, end_ms)]
+        bar_ms = 1000 * seconds * span_multiplier
+        days = (end_ms - start_ms) / 86400000
+        expected = days * self._TRADING_HOURS_PER_DAY * 3600000 / bar_ms
+        count = int(np.ceil(expected / (self._SHARD_FILL * self._OHLCV_LIMIT)))
+        if count <= 1:
+            return [(start_ms, end_ms)]
+        width = int(np.ceil((end_ms - start_ms + 1) / count / bar_ms)) * bar_ms
+        bounds = list(range(start_ms, end_ms + 1, width)) + [end_ms + 1]
+        return [(b0, b1 - 1) for b0, b1 in zip(bounds[:-1], bounds[1:])]
+
+    def _ohlcv_requests(self, ticker, start, end, span, span_multiplier):
+        # ------------------------------------------------------------------------
+        # Note that polygon.io REST api accepts dates in either YYYY-MM-DD format,
+        # or as millisecond unix timestamps.  But when using YYYY-MM-DD format, it
+        # does NOT accept the with HH:MM:SS.  To specify hours, minutes, and seconds,
+        # the dates/times must be converted to millisecond unix timestamps:
+
+        end_msts = self._input_to_mstimestamp(end, "end")
+        start_msts = self._input_to_mstimestamp(start, 0)
+
+        # print(f"  end=\"{end}\"      end_msts={end_msts}")
+        # print(f"start=\"{start}\"  start_msts={start_msts}")
+
+        # Returns one request per shard (see `_ohlcv_shards()`):
+        return [
+            self.base_url
+            + "/v2/aggs/ticker/"
+            + ticker
+            + "/range/"
+            + str(span_multiplier)
+            + "/"
+            + span
+            + "/"
+            + str(start_ms)
+            + "/"
+            + str(end_ms)
+            + "?"
+            + "adjusted=true&sort=asc&limit="
+            + str(self._OHLCV_LIMIT)
+            + "&apiKey="
+            + self.APIKEY
+            for start_ms, end_ms in self._ohlcv_shards(int(start_msts), int(end_msts), span, span_multiplier)
+        ]
+
+    def _market_session(self, market):
+        # Returns the (open, close) of the market session, as offsets (pd.Timedelta)
+        # from midnight exchange time, or None for market="all".
+        if isinstance(market, str) and market == "all":
+            return None
+        if isinstance(market, str) and market == "regular":
+            market = self._REGULAR_SESSION
+        try:
+            open_, close = (pd.Timedelta(str(t) + ":00" * (str(t).count(":") == 1)) for t in market)
+        except (TypeError, ValueError):
+            raise ValueError(
+                '`market` must be "regular", "all", or an (open, close) tuple of exchange'
+                + ' times, for example ("09:30", "16:15"); got ' + repr(market)
+            )
+        if not pd.Timedelta(0) <= open_ < close <= pd.Timedelta(days=1):
+            raise ValueError("`market` session must have 00:00 <= open < close <= 24:00: " + repr(market))
+        return open_, close
+
+    def _regular_market(self, tempdf, span, market, tz):
+        # Select the aggregates within the market session on each trade date (inclusive
+        # of both the open and the close).  The session is given in exchange time, and
+        # converted to `tz` (the time zone of the index) for each trade date; then all
+        # of the aggregates are selected with a single boolean mask over the index:
+        # each aggregate is within the session that most recently opened before it,
+        # if that session has not yet closed.
+        session = self._market_session(market)
+        if span not in ("hour", "minute", "second") or session is None or len(tempdf) == 0:
+            return tempdf
+        days = pd.DatetimeIndex(tempdf.index.normalize().unique()).tz_localize(self._EXCHANGE_TZ)
+        t1 = (days + session[0]).tz_convert(tz).tz_localize(tz=None).to_numpy()
+        t2 = (days + session[1]).tz_convert(tz).tz_localize(tz=None).to_numpy()
+        ix = tempdf.index.to_numpy()
+        opened = np.searchsorted(t1, ix, side="right") - 1
+        mask = (opened >= 0) & (ix <= t2[np.maximum(opened, 0)])
+        return tempdf[mask]
+
+    def _cached_market(self, tempdf, span, market, tz):
+        # Select the market session from cached (all hours, exchange time) data,
+        # and convert to `tz`:
+        if span not in ("hour", "minute", "second") or tempdf is None or len(tempdf) == 0:
+            return tempdf
+        tempdf = self._regular_market(tempdf, span, market, self._EXCHANGE_TZ)
+        if tz != self._EXCHANGE_TZ:
+            ix = tempdf.index.tz_localize(self._EXCHANGE_TZ).tz_convert(tz).tz_localize(tz=None)
+            tempdf = tempdf.set_axis(ix.rename(tempdf.index.name))
+        return tempdf
+
+    def _ohlcv_pages_to_df(self, frames, span, market, tz):
+        tempdf = pd.concat(frames)
+
+        # Adjacent shards (see `_ohlcv_shards()`) may both include an aggregate that
+        # straddles the boundary between them; keep only the first:
+        if not tempdf.index.is_unique:
+            tempdf = tempdf[~tempdf.index.duplicated(keep="first")]
+
+        # print('len(tempdf)=',len(tempdf))
+        # print(tempdf.head(2))
+        # print(tempdf.tail(2))
+        # =======================================================
+        # From:
+        # https://support.tastyworks.com/support/solutions/articles/43000435335-options-that-trade-until-3-15-pm-central-
+        #
+        # When do equity and ETF options stop trading?
+        #
+        # MOST STOP TRADING AT THE MARKET CLOSE, HOWEVER SOME TRADE 15-MIN. AFTER THE CLOSE
+        # Options on most underlyings close when the market closes at 3:00 pm Central Time (Chicago Time).
+        # However, there is a handful of ETF options that trade until 3:15 pm Central Time
+        # or 15-minutes after the equity markets close (3:00 pm Central).
+        #
+        # OPTIONS THAT TRADE UNTIL 3:15 PM CENTRAL TIME (CHICAGO TIME)
+        # AUM, AUX, BACD, BPX, BRB, BSZ, BVZ, CDD, CITD, DBA, DBB, DBC, DBO, DBS, DIA, DJX, EEM, EFA, EUI, EUU,
+        # GAZ, GBP, GSSD, IWM, IWN, IWO, IWV, JJC, JPMD, KBE, KRE, MDY, MLPN, MNX, MOO, MRUT, MSTD, NDO, NDX, NZD,
+        # OEF, OEX, OIL, PZO, QQQ, RUT, RVX, SFC, SKA, SLX, SPX, SPX (PM Expiration), SPY, SVXY, UNG, UUP, UVIX,
+        # UVXY, VIIX, VIX, VIXM, VIXY, VXEEM, VXST, VXX, VXZ, XEO, XHB, XLB, XLE, XLF, XLI, XLK, XLP, XLU, XLV,
+        # XLY, XME, XRT, XSP, XSP (AM Expiration), & YUK
+        #
+        # EXCEPTION FOR CASH-SETTLED INDICES
+        # All PM-settled day of expiration options for NDX, RUT, SPX, OEX and XEO stop trading at 3:00 pm.
+        # -------------------------------------------------------
+        # Despite the above information, we continue to return
+        # 9:30 - 16:00 for "regular" trading hours.  For the ETFs
+        # above, pass market=("09:30", "16:15") to fetch_ohlcvdf().
+        # =======================================================
+
+        return self._regular_market(tempdf, span, market, tz)
+
+    def _request_shard(self, req, span, tz):
+        # Request one shard, paging through `next_url`; returns the list of pages (as
+        # DataFrames), or the first page if it is None (failed) or empty.
+        rjson = self._req_get_json(req)
+
+        tempdf = self._json_response_to_ohlcvdf(span, rjson, tz=tz)
+        if tempdf is None or len(tempdf) == 0:
+            return tempdf
+
+        frames = [tempdf]
+        while "next_url" in rjson:
+            self.logger.debug('\n==> GETTING NEXT URL: "' + rjson["next_url"] + '"')
+            nxtr = rjson["next_url"] + "&apikey=" + self.APIKEY
+            rjson = self._req_get_json(nxtr)
+            frames.append(self._json_response_to_ohlcvdf(span, rjson, tz=tz))
+        return frames
+
+    async def _request_shard_async(self, req, span, tz):
+        rjson = await self._req_get_json_async(req)
+
+        tempdf = self._json_response_to_ohlcvdf(span, rjson, tz=tz)
+        if tempdf is None or len(tempdf) == 0:
+            return tempdf
+
+        frames = [tempdf]
+        while "next_url" in rjson:
+            self.logger.debug('\n==> GETTING NEXT URL: "' + rjson["next_url"] + '"')
+            nxtr = rjson["next_url"] + "&apikey=" + self.APIKEY
+            rjson = await self._req_get_json_async(nxtr)
+            frames.append(self._json_response_to_ohlcvdf(span, rjson, tz=tz))
+        return frames
+
+    def _shards_to_df(self, shards, span, market, tz):
+        # Stitch the shards back together in order.  If any shard failed, then fail
+        # (return None); if all shards are empty then return the (empty) first shard.
+        if any(pages is None for pages in shards):
+            return None
+        frames = [df for pages in shards if isinstance(pages, list) for df in pages]
+        if len(frames) == 0:
+            return shards[0]
+        return self._ohlcv_pages_to_df(frames, span, market, tz)
+
+    def _request_ohlcvdf(self, reqs, span, market, tz):
+        if len(reqs) == 1:
+            shards = [self._request_shard(reqs[0], span, tz)]
+        else:
+            self.logger.debug(f"requesting {len(reqs)} shards concurrently")
+            workers = min(self.pool_size, len(reqs))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                shards = list(executor.map(lambda req: self._request_shard(req, span, tz), reqs))
+        return self._shards_to_df(shards, span, market, tz)
+
+    async def _request_ohlcvdf_async(self, reqs, span, market, tz):
+        shards = await asyncio.gather(*[self._request_shard_async(req, span, tz) for req in reqs])
+        return self._shards_to_df(shards, span, market, tz)
+
+    # Maximum (expected) number of aggregates per cache file, by cache format.  A csv.gz
+    # cache file must be parsed in full (so its partitions are kept to about one request's
+    # worth of aggregates), whereas only the rows needed are decoded from parquet (see
+    # `_cache_read_rows()`) and arrow (memory mapped) cache files:
+    _CACHE_PARTITION_ROWS = {"csv.gz": 50000, "parquet": 2**20, "arrow": 2**20}
+
+    # Number of rows per parquet row group (the unit in which rows are read):
+    _PARQUET_ROW_GROUP = 10000
+
+    def _cache_partition_freq(self, span, span_multiplier, cache_format=None):
+        # The coarsest cache partition ("Y"ear, "M"onth, or "D"ay) that is expected
+        # to hold no more than `_CACHE_PARTITION_ROWS` aggregates.  For example, in
+        # csv.gz: yearly for spans of a day or more, and for hours, monthly for (one)
+        # minutes, and daily for seconds.
+        seconds = dict(second=1, minute=60, hour=3600).get(span)
+        if seconds is None:
+            return "Y"
+        limit = self._CACHE_PARTITION_ROWS[cache_format or self.cache_format]
+        per_day = self._TRADING_HOURS_PER_DAY * 3600 / (seconds * span_multiplier)
+        for freq, days in (("Y", 366), ("M", 31)):
+            if per_day * days <= limit:
+                return freq
+        return "D"
+
+    def _ohlcv_cache_files(self, ticker, span, span_multiplier, start, end):
+        # Returns the cache partitions (`pd.Period`s) overlapping [start, end], and
+        # their cache files:
+        freq = self._cache_partition_freq(span, span_multiplier)
+        p0 = pd.Period(self._input_to_datetime(start), freq=freq)
+        p1 = pd.Period(self._input_to_datetime(end), freq=freq)
+        partitions = list(pd.period_range(p0, p1, freq=freq))
+        cache_files = [self._cache_file(ticker, span, span_multiplier, p) for p in partitions]
+        return partitions, cache_files
+
+    def _cache_partition_bounds(self, partition):
+        # Returns the (start, end) to request in order to populate a cache partition.
+        # Yearly partitions are as described in `_cache_year_bounds()`.  Shorter
+        # partitions hold exactly the days that they name, in exchange time:
+        if partition.freqstr.startswith("Y"):
+            return self._cache_year_bounds(partition.year)
+        cache_start = partition.start_time.tz_localize(self._EXCHANGE_TZ).to_pydatetime()
+        cache_end = partition.end_time.normalize().tz_localize(self._EXCHANGE_TZ).to_pydatetime()
+        return cache_start, cache_end
+
+    def _cache_year_bounds(self, year):
+        # (in exchange time, as are the bounds of shorter partitions: naive bounds would
+        # be requested in the host's local time, and on a host that is not set to exchange
+        # time the edges of a yearly intraday partition would move into the adjacent years)
+        cache_start = pd.Timestamp(year, 1, 1, 9, 30).tz_localize(self._EXCHANGE_TZ).to_pydatetime()
+        cache_end = pd.Timestamp(year, 12, 31, 16, 0).tz_localize(self._EXCHANGE_TZ).to_pydatetime()
+        #cache_start = cache_start.replace(hour=0, minute=0, second=0, microsecond=1)
+        #cache_end = cache_end.replace(hour=23, minute=59, second=59, microsecond=999999)
+        self.logger.debug(f"cache_start={cache_start}, cache_end={cache_end}")
+
+        # When requesting aggregate ohlcv data from polygon.io, if the start timestamp
+        # or end timestamp is in the middle of an aggregate, then that entire aggregate
+        # will be included in the response.  The causes the following affects:
+
+        # (1) If the *start* timestamp is within an aggregate then, since the entire
+        # aggregate is included in the response, and since the timestamp returned for
+        # an aggregate is always the Open time of the aggregate, then it is possible
+        # that the first aggregate returned will have a timestamp *earlier* than the start
+        # time we requested.  Since we are caching by year, this may result in the first
+        # row being from the previous year.  For the cache, we will filter this out.
+
+        # (2) If the *end* timestamp is within an aggregate then, since the entire aggregate
+        # is included, and since the timestamp returned for an aggregate is always the Open
+        # time of the aggregate, then (even though the timestamp of the last aggregate will
+        # be at or earlier than the requested end time) it's possible that the last aggregate
+        # will contain data *beyond* then end time requested.  While this may result in some
+        # of the data being in the following year, (particularly the Close, but possibly also
+        # the High or Low) we are not going  to worry about it because the timestamp of the
+        # aggregate will be in this year, and as long as we filter out the first aggregate,
+        # then we will be consistent by keeping the last aggregate, even if some of its data
+        # is in the following year and/or beyond the requested end timestamp.
+
+        # (3) Note also that, depending on the size of the aggregate, if the requested end
+        # time is close to the present or in the future, it is possible that the last aggregate
+        # returned from polygon.io *will not be complete* since in order to be complete it
+        # would have to contain data from the future.
+
+        # Example:
+        #  Request *weekly* data from 2021-01-01 till 2021-06-30:
+        #  Weekly aggregates go from Sunday 00:00:00 thru Saturday 23:59:99.
+
+        #  The requested start time, 2021-01-01, is a Friday, so
+        #  The first aggregate will have a timestamp of 2020-12-27 and will contain data
+        #  through 2020-12-31 (since there is no trading on 2021-01-01 nor 2021-01-02)
+
+        #  The requested end time, 2021-06-30, is a Wednesday, so:
+        #  The last aggregate will have a timestamp of 2021-05-30 and will contain data
+        #  through 2021-06-05 (or if no trading on Saturday, then through 2021-06-04).
+
+        #  Note that if the above request (*weekly* data from 2021-01-01 to 2021-06-30)
+        #  were made when the actual true live datetime was 2021-06-29 12:00 then the
+        #  last aggregate returned would be incomplete: although it is a "weekly" aggregate
+        #  it would contain data only through the present time (2021-06-29 12:00) or somewhat
+        #  less if one is enrolled for delayed prices.  Thus the final "weekly"
+        #  aggregate would effectively be Open at 2021-06-27 and Close at 2021-06-29.
+
+        # (The first aggregate, if from the previous year, is filtered out by the
+        #  `fetch_ohlcvdf(cache=False)` request that populates the cache file.)
+        return cache_start, cache_end
+
+    def _read_cache_file(self, cf, partition, last_partition, end, window=None):
+        # Returns `(cache_df, fresh)`: the DataFrame cached in `cf` (or `None` if the
+        # cache file does not exist), and whether it is fresh.  If not fresh (that is,
+        # `cache_df` is `None`, or the cache file is incomplete and is out of date,
+        # or it does not reach `end`) then the caller should request the missing data
+        # (see `_cache_update_bounds()`) and then call `_update_cache_file()`.
+        # If fresh, and a `window` is given, then `cache_df` may hold only the rows
+        # of the cache file that overlap the window (see `_cache_load()`).
+        #
+        # No lock is needed to read a cache file, since cache files are always
+        # written atomically (see `_cache_write_df()`).
+        if cf in PolygonApi.cached_files:
+            # We have already, at least once in this instance, encountered
+            # this cache file; therefore this read should work ok:
+            # (no need to get lock on cache file).  If it is unchanged since
+            # we last read it, then it is served from memory:
+            self.logger.debug(f"read-in cache file:{cf}")
+            return self._cache_load(cf, partition, window), True
+
+        # We haven't seen the file yet during this run (instance) but the cache
+        # file _may_ exist from a previous run.  Whether it is fresh is decided from
+        # its entry in the cache manifest (provided the entry matches the file):
+        manifest = self._cache_manifest()
+        try:
+            entry = manifest.lookup(cf)
+            stat_result = pathlib.Path(cf).stat()
+            size = stat_result.st_size
+            if not size > 0:
+                print("Found zero byte cache file:" + str(cf))
+                return None, False
+            self.logger.info(f"using cache file {cf}, size={size}")
+            nextdf = None
+            if not manifest.matches(entry, stat_result):
+                # (a cache file written before there was a manifest, or changed since)
+                nextdf = self.frame_cache.load(cf, self._cache_read_df)
+                entry = manifest.record(cf, nextdf, fetched_at=stat_result.st_mtime)
+        except Exception:
+            self.logger.debug(f"cache not found: {cf}")
+            return None, False
+
+        fresh = True
+        if not entry.complete:
+            # An incomplete cache file (the current year's, or that of a past year
+            # that was requested before the year ended) should be appended to each
+            # new trading day.  Determine the current trade date (for now, we use
+            # NY time to determine current trade date; later we can implement time
+            # zones):
+            ts_now = pd.Timestamp.now()
+            fetched = pd.Timestamp.fromtimestamp(entry.fetched_at)
+            start_trade_date = ts_now.replace(hour=9, minute=30, second=0, microsecond=0, nanosecond=0)
+            if ts_now > start_trade_date:
+                current_trade_date = ts_now.date()
+            else:
+                current_trade_date = (ts_now - pd.tseries.offsets.BDay(1)).date()
+            if fetched.date() < current_trade_date:
+                print(
+                    "Current Trade Date=",
+                    current_trade_date,
+                    " Cached Trade Date=",
+                    fetched.date(),
+                )
+                print("Refresh cache file:", cf)
+                fresh = False
+        if fresh and partition == last_partition and entry.last_ts is not None and not entry.complete:
+            end_dtm = self._input_to_datetime(end)
+            dtm1 = pd.Timestamp(entry.last_ts)
+            self.logger.debug(f"partition,end_dtm,dtm1={partition},{end_dtm},{dtm1}")
+            if end_dtm > dtm1:
+                self.logger.warning(f"cache ({cf}) too short ... requesting more data.")
+                fresh = False
+        try:
+            if nextdf is None:
+                # (an update needs the whole cache file)
+                nextdf = self._cache_load(cf, partition, window if fresh else None)
+        except Exception:
+            self.logger.debug(f"cache not readable: {cf}")
+            return None, False
+        if fresh:
+            PolygonApi.cached_files[cf] = True
+        return nextdf, fresh
+
+    def _cache_file_missing(self, cf):
+        # True if we know of no cache file `cf` (without reading it):
+        return cf not in PolygonApi.cached_files and self._cache_manifest().lookup(cf) is None
+
+    def _cache_file_lock(self, cf):
+        # Per cache file lock, needed only until we know that the cache file is up to
+        # date (see the note regarding the cache file lock at the top of this class):
+        if cf in PolygonApi.cached_files:
+            return contextlib.nullcontext()
+        return cache_key_lock(cf)
+
+    def _cache_update_bounds(self, partition, cache_df):
+        # Returns the (start, end) to request in order to bring a cache file up to date.
+        # If there is cached data, then request only from the last cached aggregate onward:
+        # that last aggregate may have been incomplete when it was cached (see note (3) in
+        # `_cache_year_bounds()`) so it is requested again, and replaced.  (Since `start`
+        # is requested from midnight, the entire last cached trade date is replaced.)
+        cache_start, cache_end = self._cache_partition_bounds(partition)
+        if cache_df is not None and len(cache_df) > 0:
+            last = cache_df.index[-1]
+            if cache_start.tzinfo is not None:  # (cached times are exchange times)
+                last = last.tz_localize(self._EXCHANGE_TZ)
+            cache_start = max(cache_start, last.to_pydatetime())
+        return cache_start, cache_end
+
+    def _update_cache_file(self, cf, cache_df, new_df):
+        # Merge newly requested `new_df` into `cache_df`, replacing any cached aggregates
+        # at or after the first new aggregate, and write the result to the cache file.
+        if not isinstance(new_df, pd.DataFrame):
+            return cache_df  # request failed; nothing to update.
+        if cache_df is not None and len(cache_df) > 0 and len(new_df) > 0:
+            new_df = pd.concat([cache_df[cache_df.index < new_df.index[0]], new_df])
+        elif cache_df is not None and len(cache_df) > 0:
+            new_df = cache_df
+        self._write_cache_file(cf, new_df)
+        return new_df
+
+    def _write_cache_file(self, cf, cache_df):
+        if isinstance(cache_df, pd.DataFrame):  # zero length ok to cache
+            self.logger.debug(f"caching data to file: {cf}")
+            self._cache_write_df(cf, cache_df)
+            self._cache_manifest().record(cf, cache_df)
+            self.frame_cache.put(cf, cache_df)
+            PolygonApi.cached_files[cf] = True
+
+    # Aggregates are time stamped at their Open, so the last aggregate of a complete
+    # cache file may open this long before the end of the year (plus a week or so of
+    # holidays; see `_cache_coverage()`):
+    _SPAN_LENGTH = dict(week="7D", month="31D", quarter="92D", year="366D")
+
+    def _cache_coverage(self, cache_files, start_dtm, end_dtm):
+        # Returns (start_missing, end_missing): whether the cache files, according
+        # to the cache manifest, lack data at the requested start and end.  (Empty
+        # partitions, for example days on which there was no trading, are skipped.)
+        entries = self._cache_manifest().lookup_many(cache_files)
+        entries = [entries.get(cf.name) for cf in cache_files]
+        filled = [entry for entry in entries if entry is not None and entry.first_ts is not None]
+        if len(filled) == 0 or None in entries:
+            return False, False
+        first, last = filled[0], filled[-1]
+        slack = pd.Timedelta("7D")
+        start_missing = pd.Timestamp(first.first_ts) - start_dtm > slack
+        end_missing = (
+            all(entry.complete for entry in entries[entries.index(last):])
+            and end_dtm - pd.Timestamp(last.last_ts) > slack + pd.Timedelta(self._SPAN_LENGTH.get(last.span, 0))
+        )
+        if start_missing or end_missing:
+            self.logger.debug(f"first,last={first}, {last}")
+        return start_missing, end_missing
+
+    def _cached_ohlcvdf(self, frames, start, end, cache_files):
+        def _str_df(prefix, df):
+            if len(df) > 1:
+                return prefix + "=\n" + str(df.iloc[[0, -1]]) + " \n" + str(len(df)) + " rows.\n"
+            else:
+                return prefix + "=\n" + str(df) + " \n" + str(len(df)) + " rows.\n"
+
+        frames = [df for df in frames if isinstance(df, pd.DataFrame)]
+        if len(frames) == 0:
+            return pd.DataFrame(columns=self._OHLCV_COLMAP.values())
+        # (empty partitions, which may have no dtypes, must not be concatenated)
+        frames = [df for df in frames if len(df) > 0] or frames[:1]
+        # (frames may be held in `self.frame_cache`, so we must never modify them)
+        tempdf = frames[0] if len(frames) == 1 else pd.concat(frames)
+
+        if len(tempdf) > 1:
+            end_dtm = self._input_to_datetime(end, "end")
+            start_dtm = self._input_to_datetime(start, 0)
+            start_missing, end_missing = self._cache_coverage(cache_files, start_dtm, end_dtm)
+            if start_missing:
+                warnings.warn(
+                    "Requested START "
+                    + str(start_dtm)
+                    + " outside of cache (i.e. unavailable)\n"
+                    + "cache file(s): "
+                    + str(cache_files)
+                )
+            if end_missing:
+                warnings.warn(
+                    "Requested END "
+                    + str(end_dtm)
+                    + " outside of cache (i.e. unavailable)\n"
+                    + "cache file(s): "
+                    + str(cache_files)
+                )
+            if self.logger.isEnabledFor(logging.DEBUG):  # (formatting `tempdf` is costly)
+                self.logger.debug(_str_df("tempdf(3)", tempdf))
+            self.logger.debug(f"start_dtm:end_dtm={start_dtm}:{end_dtm}")
+            tempdf = tempdf.loc[start_dtm:end_dtm]
+        if len(frames) > 1:
+            return tempdf
+        # Memory mapped frames are not copied (their columns are read only, so the
+        # cached frame is safe; see `cache_format`):
+        return tempdf.copy(deep=self.cache_format != "arrow")
+
+    def _drop_leading_aggregate(self, tempdf, start):
+        # The first aggregate returned may have *opened* before `start` (see
+        # the notes in `_cache_year_bounds()`), in which case we drop it:
+        if tempdf is None or len(tempdf) == 0:
+            return tempdf
+        start_date = self._input_to_datetime(start).date()
+        first_date = tempdf.index[0].date()
+        ix_start = 1 if first_date < start_date else 0
+        # print(f"start={start}, start_date={start_date}, first_date={first_date}, ix_start={ix_start}")
+        return tempdf.iloc[ix_start:]
+
     def fetch_ohlcvdf(
         self,
         ticker,
@@ -225,10 +1096,15 @@ class PolygonApi(_PolygonApiBase):
         market (str) : 'regular' or 'all' (Default is 'regular')
                        'regular' provide data only from 9:30 till 16:00.
                        'all'     include also data from extended-hours trading.
+                       Alternatively, a tuple of (open, close) times (exchange time,
+                       that is, US/Eastern), for example ("09:30", "16:15") for the
+                       ETF options that trade until 15 minutes after the close.
+                       (Applies only to spans of 'hour', 'minute', and 'second').
 
         cache (bool) : Create and/or use cache files.  Cache files are under
                        `Path.home()/.pdpolygonapi/ohlcv_cache/` keyed by
-                       ticker symbol, span, span_multiplier, and year.
+                       ticker symbol, span, span_multiplier, and year (or, for
+                       span 'second', by day), and are indexed by `Path.home()/.pdpolygonapi/ohlcv_manifest.sqlite`.
 
         span_multiplier (int): If span_multiplier > 1 then the time between adjacent
                         data points is (span * span_multipler).
@@ -261,392 +1137,392 @@ class PolygonApi(_PolygonApiBase):
         #  def fetch_ohlcvdf(self,ticker,start=-30,end=0,span='day',market='regular',cache=False,
         #                    span_multiplier=1,tz='US/Eastern',show_request=False):
 
-        #  -------------------------------
-        #  USE LAZY FORMATING FOR LOGGING:
-        #  -------------------------------
-        #   In [24]: logging.error("ticker=%s, date=%s, i=%s, x=%s" % (t,pydt,i,x))
-        #   ERROR:root:ticker=SPY, date=2025-06-09 22:12:44.237548, i=12345, x=1.2345
-        #   
-        #   In [25]: logging.error("ticker=%s, date=%s, i=%s, x=%s",t,pydt,i,x)
-        #   ERROR:root:ticker=SPY, date=2025-06-09 22:12:44.237548, i=12345, x=1.2345
-
         self.logger.debug("fetch_ohlcvdf: ticker=%s, start=%s, end=%s",ticker,start,end)
         self.logger.debug("fetch_ohlcvdf: span=%s, span_multiplier=%s",span,span_multiplier)
         self.logger.debug("fetch_ohlcvdf: market=%s, cache=%s",market,cache)
         self.logger.debug("fetch_ohlcvdf: tz=%s, show_request=%s",tz,show_request)
 
-        valid_markets = ("regular", "all")
-        if market not in valid_markets:
-            raise ValueError("market must be one of " + str(valid_markets))
+        cache = self._ohlcv_check_args(span, market, cache, span_multiplier)
 
-        valid_spans = ("second", "minute", "hour", "day", "week", "month", "quarter", "year")
-        if span not in valid_spans:
-            raise ValueError("span must be one of " + str(valid_spans))
+        reqs = self._ohlcv_requests(ticker, start, end, span, span_multiplier)
 
-        if not isinstance(cache, bool):
-            cache = self.cache_initializer
+        for req in reqs:
+            if show_request:
+                print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
+            self.logger.debug(f"req={req[: req.find('&apiKey=')]}&apiKey=***")
 
-        if span == "second" and cache:
-            cache = False
-            warnings.warn(
-                "\n=========\n"
-                + "cache will not be used for less than minutely data.\n"
-                + "===========\n"
-            )
+        if cache:
+            partitions, cache_files = self._ohlcv_cache_files(ticker, span, span_multiplier, start, end)
+            self.logger.debug(f"partitions={partitions[0]}..{partitions[-1]}, start,end={start},{end}")
+            window = (self._input_to_datetime(start, 0), self._input_to_datetime(end, "end"))
+
+            def _populate(partition, cf):
+                with self._cache_file_lock(cf):
+                    cache_df, fresh = self._read_cache_file(cf, partition, partitions[-1], end, window)
+                    if not fresh:
+                        self.logger.debug(f"requesting data for cache file: {cf}")
+                        cache_start, cache_end = self._cache_update_bounds(partition, cache_df)
+                        new_df = self.fetch_ohlcvdf(
+                            ticker,
+                            start=cache_start,
+                            end=cache_end,
+                            span=span,
+                            market="all",
+                            tz=self._EXCHANGE_TZ,
+                            span_multiplier=span_multiplier,
+                            show_request=False,
+                            cache=False,
+                        )
+                        cache_df = self._update_cache_file(cf, cache_df, new_df)
+                return cache_df
+
+            # Request all of the missing cache files concurrently and, while they are
+            # downloading, read the cache files that exist:
+            missing = [jj for jj, cf in enumerate(cache_files) if self._cache_file_missing(cf)]
+            frames = [None] * len(partitions)
+            if len(missing) == 0:
+                frames = [_populate(partition, cf) for partition, cf in zip(partitions, cache_files)]
+            else:
+                workers = min(self.pool_size, len(missing))
+                with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                    pending = {jj: executor.submit(_populate, partitions[jj], cache_files[jj]) for jj in missing}
+                    for jj, (partition, cf) in enumerate(zip(partitions, cache_files)):
+                        if jj not in pending:
+                            frames[jj] = _populate(partition, cf)
+                    for jj, future in pending.items():
+                        frames[jj] = future.result()
+            tempdf = self._cached_ohlcvdf(frames, start, end, cache_files)
+            tempdf = self._cached_market(tempdf, span, market, tz)
+        else:
+            tempdf = self._request_ohlcvdf(reqs, span, market, tz)
 
-        if not isinstance(span_multiplier, int):
-            raise TypeError(f"`span_multiplier` must be an int (but is type {type(span_multiplier)}")
+        #print("BOTTOM of fetch_ohlcv(): tempdf.iloc[[0,1,-2,-1]]=\n",tempdf.iloc[[0,1,-2,-1]])
 
-        if span_multiplier != 1 and span not in ("second","minute","hour"):
-            raise ValueError(f"`span_multiplier` must be == 1 for `span` not in (\"second\",\"minute\",\"hour\"")
-
-        if span_multiplier < 1:
-            raise ValueError("span_multiplier must be >= 1")
+        return self._drop_leading_aggregate(tempdf, start)
 
+    async def fetch_ohlcvdf_async(
+        self,
+        ticker,
+        start=-30,
+        end=0,
+        span="day",
+        market="regular",
+        cache=None,
+        span_multiplier=1,
+        tz="US/Eastern",
+        show_request=False,
+    ):
+        """
+        Coroutine version of `fetch_ohlcvdf()`: same arguments, same return value,
+        and the same cache files.  Requests are made with `aiohttp`, so many calls
+        (for example, one per ticker) may be awaited concurrently, for example:
 
-        # ------------------------------------------------------------------------
-        # Note that polygon.io REST api accepts dates in either YYYY-MM-DD format,
-        # or as millisecond unix timestamps.  But when using YYYY-MM-DD format, it
-        # does NOT accept the with HH:MM:SS.  To specify hours, minutes, and seconds,
-        # the dates/times must be converted to millisecond unix timestamps:
+            dfs = await asyncio.gather(*[api.fetch_ohlcvdf_async(t, ...) for t in tickers])
 
-        end_msts = self._input_to_mstimestamp(end, "end")
-        start_msts = self._input_to_mstimestamp(start, 0)
+        The number of requests in flight at any one time is capped by `pool_size`.
+        When `cache` is True, all of the missing yearly cache files are requested
+        concurrently.
+        """
+        self.logger.debug("fetch_ohlcvdf_async: ticker=%s, start=%s, end=%s",ticker,start,end)
+        self.logger.debug("fetch_ohlcvdf_async: span=%s, span_multiplier=%s",span,span_multiplier)
 
-        # print(f"  end=\"{end}\"      end_msts={end_msts}")
-        # print(f"start=\"{start}\"  start_msts={start_msts}")
+        cache = self._ohlcv_check_args(span, market, cache, span_multiplier)
 
-        req = (
-            "https://api.polygon.io/v2/aggs/ticker/"
-            + ticker
-            + "/range/"
-            + str(span_multiplier)
-            + "/"
-            + span
-            + "/"
-            + start_msts
-            + "/"
-            + end_msts
-            + "?"
-            + "adjusted=true&sort=asc&limit=50000&apiKey="
-            + self.APIKEY
-        )
+        reqs = self._ohlcv_requests(ticker, start, end, span, span_multiplier)
 
         if show_request:
-            print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
+            for req in reqs:
+                print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
 
         if cache:
-            y0 = self._input_to_datetime(start).year
-            y1 = self._input_to_datetime(end).year
-            years = [y for y in range(y0, y1 + 1)]
+            partitions, cache_files = self._ohlcv_cache_files(ticker, span, span_multiplier, start, end)
+            window = (self._input_to_datetime(start, 0), self._input_to_datetime(end, "end"))
+
+            async def _populate(partition, cf):
+                if cf in PolygonApi.cached_files:
+                    cache_df, fresh = self._read_cache_file(cf, partition, partitions[-1], end, window)
+                else:  # (read in a thread, so as not to hold up any downloads)
+                    cache_df, fresh = await asyncio.to_thread(
+                        self._read_cache_file, cf, partition, partitions[-1], end, window
+                    )
+                if fresh:
+                    return cache_df
+                self.logger.debug(f"requesting data for cache file: {cf}")
+                cache_start, cache_end = self._cache_update_bounds(partition, cache_df)
+                new_df = await self.fetch_ohlcvdf_async(
+                    ticker,
+                    start=cache_start,
+                    end=cache_end,
+                    span=span,
+                    market="all",
+                    tz=self._EXCHANGE_TZ,
+                    span_multiplier=span_multiplier,
+                    show_request=False,
+                    cache=False,
+                )
+                # (the cache file locks are never held across an `await`, since
+                # other coroutines on this thread may need the same lock)
+                with cache_key_lock(cf):
+                    return self._update_cache_file(cf, cache_df, new_df)
+
+            # All of the missing cache files are requested concurrently, while
+            # the cache files that exist are read:
+            frames = await asyncio.gather(*[_populate(p, cf) for p, cf in zip(partitions, cache_files)])
+            tempdf = self._cached_ohlcvdf(frames, start, end, cache_files)
+            tempdf = self._cached_market(tempdf, span, market, tz)
         else:
-            years = None
-
-        self.logger.debug(f"years={years}, start,end={start},{end}")
-        self.logger.debug(f"req={req[: req.find('&apiKey=')]}&apiKey=***")
-
-        def regular_market(tempdf):
-            if span in ("hour", "minute", "second") and market == "regular":
-                dlist = np.unique(tempdf.index.date)
-                # print('dlist=',dlist)
-                mktdf = pd.DataFrame(columns=tempdf.columns)
-                mktdf.index.name = tempdf.index.name
-                for d in dlist:
-                    t1 = pd.Timestamp(d, tz="US/Eastern") + pd.Timedelta(hours=9, minutes=30)
-                    t1 = t1.tz_convert(tz).tz_localize(tz=None)
-                    t2 = pd.Timestamp(d, tz="US/Eastern") + pd.Timedelta(hours=16)
-                    t2 = t2.tz_convert(tz).tz_localize(tz=None)
-                    # print(t1,t2,'\n',tempdf.loc[t1:t2].head(),'\n')
-                    # self.logger.info(f'len(mktdf)={len(mktdf)}  mktdf:\n{mktdf.head(3)}{mktdf.tail(3)}\n\n')
-                    if len(mktdf) < 1:
-                        mktdf = pd.concat([tempdf.loc[t1:t2]])
-                    else:
-                        mktdf = pd.concat([mktdf, tempdf.loc[t1:t2]])
-                    # print('len(mktdf)=',len(mktdf),'mktdf:\n',mktdf.head(3),mktdf.tail(3),'\n\n')
-                tempdf = mktdf
-            return tempdf
+            tempdf = await self._request_ohlcvdf_async(reqs, span, market, tz)
 
-        def request_data():
-            rjson = self._req_get_json(req)
-
-            tempdf = self._json_response_to_ohlcvdf(span, rjson, tz=tz)
-            if tempdf is None or len(tempdf) == 0:
-                return tempdf
-
-            # print('len(tempdf)=',len(tempdf))
-            if "next_url" in rjson:
-                while "next_url" in rjson:
-                    self.logger.debug('\n==> GETTING NEXT URL: "' + rjson["next_url"] + '"')
-                    nxtr = rjson["next_url"] + "&apikey=" + self.APIKEY
-                    rjson = self._req_get_json(nxtr)
-                    tempdf = pd.concat([tempdf, self._json_response_to_ohlcvdf(span, rjson)])
-
-            # print('len(tempdf)=',len(tempdf))
-            # print(tempdf.head(2))
-            # print(tempdf.tail(2))
-            # =======================================================
-            # From:
-            # https://support.tastyworks.com/support/solutions/articles/43000435335-options-that-trade-until-3-15-pm-central-
-            #
-            # When do equity and ETF options stop trading?
-            #
-            # MOST STOP TRADING AT THE MARKET CLOSE, HOWEVER SOME TRADE 15-MIN. AFTER THE CLOSE
-            # Options on most underlyings close when the market closes at 3:00 pm Central Time (Chicago Time).
-            # However, there is a handful of ETF options that trade until 3:15 pm Central Time
-            # or 15-minutes after the equity markets close (3:00 pm Central).
-            #
-            # OPTIONS THAT TRADE UNTIL 3:15 PM CENTRAL TIME (CHICAGO TIME)
-            # AUM, AUX, BACD, BPX, BRB, BSZ, BVZ, CDD, CITD, DBA, DBB, DBC, DBO, DBS, DIA, DJX, EEM, EFA, EUI, EUU,
-            # GAZ, GBP, GSSD, IWM, IWN, IWO, IWV, JJC, JPMD, KBE, KRE, MDY, MLPN, MNX, MOO, MRUT, MSTD, NDO, NDX, NZD,
-            # OEF, OEX, OIL, PZO, QQQ, RUT, RVX, SFC, SKA, SLX, SPX, SPX (PM Expiration), SPY, SVXY, UNG, UUP, UVIX,
-            # UVXY, VIIX, VIX, VIXM, VIXY, VXEEM, VXST, VXX, VXZ, XEO, XHB, XLB, XLE, XLF, XLI, XLK, XLP, XLU, XLV,
-            # XLY, XME, XRT, XSP, XSP (AM Expiration), & YUK
-            #
-            # EXCEPTION FOR CASH-SETTLED INDICES
-            # All PM-settled day of expiration options for NDX, RUT, SPX, OEX and XEO stop trading at 3:00 pm.
-            # -------------------------------------------------------
-            # Despite the above information, for now we will continue
-            # to return 9:30 - 16:00 for "regular" trading hours.
-            # =======================================================
-
-            return regular_market(tempdf)
-
-        def request_data_to_cache(year=None):
-            # Determine cache_start and cache_end
-            today = self._input_to_datetime(0, "end")
-            if year:
-                cache_end = datetime.datetime(year, 12, 31)
-                cache_start = datetime.datetime(year, 1, 1)
-            else:
-                raise ValueError("request_data_to_cache() should always have YEAR")
-                cache_end = today
-                cache_start = datetime.datetime(today.year, 1, 1)
-            cache_start = cache_start.replace(hour=9, minute=30, second=0, microsecond=0)
-            cache_end = cache_end.replace(hour=16, minute=00, second=00, microsecond=0)
-            #cache_start = cache_start.replace(hour=0, minute=0, second=0, microsecond=1)
-            #cache_end = cache_end.replace(hour=23, minute=59, second=59, microsecond=999999)
-            self.logger.debug(f"cache_start={cache_start}, cache_end={cache_end}")
-            tempdf = self.fetch_ohlcvdf(
-                ticker,
-                start=cache_start,
-                end=cache_end,
-                span=span,
-                span_multiplier=span_multiplier,
-                show_request=False,
-                cache=False,
-            )
-            # When requesting aggregate ohlcv data from polygon.io, if the start timestamp
-            # or end timestamp is in the middle of an aggregate, then that entire aggregate
-            # will be included in the response.  The causes the following affects:
-
-            # (1) If the *start* timestamp is within an aggregate then, since the entire
-            # aggregate is included in the response, and since the timestamp returned for
-            # an aggregate is always the Open time of the aggregate, then it is possible
-            # that the first aggregate returned will have a timestamp *earlier* than the start
-            # time we requested.  Since we are caching by year, this may result in the first
-            # row being from the previous year.  For the cache, we will filter this out.
-
-            # (2) If the *end* timestamp is within an aggregate then, since the entire aggregate
-            # is included, and since the timestamp returned for an aggregate is always the Open
-            # time of the aggregate, then (even though the timestamp of the last aggregate will
-            # be at or earlier than the requested end time) it's possible that the last aggregate
-            # will contain data *beyond* then end time requested.  While this may result in some
-            # of the data being in the following year, (particularly the Close, but possibly also
-            # the High or Low) we are not going  to worry about it because the timestamp of the
-            # aggregate will be in this year, and as long as we filter out the first aggregate,
-            # then we will be consistent by keeping the last aggregate, even if some of its data
-            # is in the following year and/or beyond the requested end timestamp.
-
-            # (3) Note also that, depending on the size of the aggregate, if the requested end 
-            # time is close to the present or in the future, it is possible that the last aggregate
-            # returned from polygon.io *will not be complete* since in order to be complete it
-            # would have to contain data from the future. 
-
-            # Example:
-            #  Request *weekly* data from 2021-01-01 till 2021-06-30:
-            #  Weekly aggregates go from Sunday 00:00:00 thru Saturday 23:59:99.
-
-            #  The requested start time, 2021-01-01, is a Friday, so
-            #  The first aggregate will have a timestamp of 2020-12-27 and will contain data
-            #  through 2020-12-31 (since there is no trading on 2021-01-01 nor 2021-01-02)
-
-            #  The requested end time, 2021-06-30, is a Wednesday, so:
-            #  The last aggregate will have a timestamp of 2021-05-30 and will contain data
-            #  through 2021-06-05 (or if no trading on Saturday, then through 2021-06-04).
-
-            #  Note that if the above request (*weekly* data from 2021-01-01 to 2021-06-30)
-            #  were made when the actual true live datetime was 2021-06-29 12:00 then the
-            #  last aggregate returned would be incomplete: although it is a "weekly" aggregate
-            #  it would contain data only through the present time (2021-06-29 12:00) or somewhat
-            #  less if one is enrolled for delayed prices.  Thus the final "weekly"
-            #  aggregate would effectively be Open at 2021-06-27 and Close at 2021-06-29.
-
-            # print("type(tempdf.index[0].date()), tempdf.index[0].date()=",
-            #       type( tempdf.index[0].date()), tempdf.index[0].date())
-            # print("type(cache_start.date()), cache_start.date()=",
-            #        type(cache_start.date()), cache_start.date())
-            # ix_start = 1 if tempdf.index[0].date() < cache_start.date() else 0
-            # return tempdf.iloc[ix_start:]
-            return tempdf
+        return self._drop_leading_aggregate(tempdf, start)
 
-        def _str_df(prefix, df):
-            if len(df) > 1:
-                return prefix + "=\n" + str(df.iloc[[0, -1]]) + " \n" + str(len(df)) + " rows.\n"
-            else:
-                return prefix + "=\n" + str(df) + " \n" + str(len(df)) + " rows.\n"
+    def fetch_ohlcvdf_many(
+        self,
+        tickers,
+        start=-30,
+        end=0,
+        span="day",
+        market="regular",
+        cache=None,
+        span_multiplier=1,
+        tz="US/Eastern",
+        max_workers=None,
+        combine=False,
+    ):
+        """
+        Fetch OHLCV data for many tickers at once, using a pool of worker threads.
+        Arguments `start`, `end`, `span`, `market`, `cache`, `span_multiplier`, and `tz`
+        are the same as for `fetch_ohlcvdf()`, and apply to every ticker.
 
-        if cache:
-            # determine current trade date and year, because we age out
-            # the current year cache each trade date.  However for now
-            # we will use NY time to determine current trade date.
-            # later we can implement time zones:
-            ts_now = pd.Timestamp.now()
-            cache_files = []
-            if years:
-                for year in years:
-                    cache_files.append(self._cache_file(ticker, span, span_multiplier, year))
-            else:
-                print("not `years` ... THIS SHOULD NOT HAPPEN ANYMORE!")
-                raise RuntimeError("if `cache`, then should always have `years`")
+        Parameters
+        ----------
+        tickers (list): Ticker symbols
 
-            tempdf = pd.DataFrame()
-            for jj, cf in enumerate(cache_files):
-                year = years[jj] if years else None
-                if cf in PolygonApi.cached_files:
-                    # We have already, at least once in this instance, encountered
-                    # this cache file; therefore this `read_csv()` should work ok:
-                    # (no need to get lock on cache file).
-                    tempdf = pd.concat([tempdf, pd.read_csv(cf, index_col=0, parse_dates=True)])
-                    self.logger.debug(f"jj={jj} read-in cache file:{cf}")
-                    self.logger.debug(_str_df(f"jj={jj} tempdf(0)", tempdf))
-                    continue
+        max_workers (int): Maximum number of tickers requested concurrently.
+                           Default is `pool_size` (one pooled connection per worker).
+
+        combine (bool): If False (default) return a dict of DataFrames keyed by ticker.
+                        If True return a single "long format" DataFrame with a
+                        (Ticker, Timestamp) MultiIndex.
+
+        A failure for one ticker does not abort the batch: instead a warning is issued,
+        and that ticker's value in the returned dict is `None`.  (When `combine` is True,
+        failed tickers are excluded from the DataFrame, and are listed with their errors
+        in the DataFrame's `attrs["failures"]`.)
+
+        Returns
+        -------
+        dict of {ticker: DataFrame} or, when `combine` is True, a DataFrame.
+        """
+        # check the arguments once, up front, rather than failing every ticker:
+        cache = self._ohlcv_check_args(span, market, cache, span_multiplier)
+
+        kwargs = dict(
+            start=start, end=end, span=span, market=market, cache=cache, span_multiplier=span_multiplier, tz=tz
+        )
+        results, failures = self._fetch_ohlcvdf_concurrently(tickers, kwargs, max_workers)
+        for ticker, failure in failures.items():
+            warnings.warn("fetch_ohlcvdf_many: " + ticker + ": " + failure)
+
+        if not combine:
+            return results
+
+        frames = {ticker: df for ticker, df in results.items() if df is not None}
+        if len(frames) > 0:
+            combined = pd.concat(
+                [df.rename_axis("Timestamp") for df in frames.values()],
+                keys=list(frames.keys()),
+                names=["Ticker", "Timestamp"],
+            )
+        else:
+            ix = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["Ticker", "Timestamp"])
+            combined = pd.DataFrame(columns=self._OHLCV_COLMAP.values(), index=ix)
+        combined.attrs["failures"] = failures
+        return combined
+
+    def _fetch_ohlcvdf_concurrently(self, tickers, kwargs, max_workers=None):
+        # `fetch_ohlcvdf(ticker, **kwargs)` for each of the tickers, using a pool of worker
+        # threads.  Returns ({ticker: DataFrame or None}, {ticker: failure}).
+        if max_workers is None:
+            max_workers = self.pool_size
+
+        results = {}
+        failures = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {ticker: executor.submit(self.fetch_ohlcvdf, ticker, **kwargs) for ticker in tickers}
+            for ticker, future in futures.items():
                 try:
-                    # We haven't seen the file yet during this run (instance) but the cache
-                    # file _may_ exist from a previous run, so look for it (with a lock):
-                    PolygonApi.cflock_acquire()
-                    stat_result = pathlib.Path(cf).stat()
-                    size = stat_result.st_size
-                    if not size > 0:
-                        print("Found zero byte cache file:" + cf)
-                        raise RuntimeError("Found zero byte cache file:" + cf)
-                    if year == ts_now.year:
-                        # The current year's cache file should be replaced
-                        # (or appended to) each new trading day.  Should
-                        # review this code and write a pytest for it as well.
-                        mtime = pd.Timestamp.fromtimestamp(stat_result.st_mtime)
-                        start_trade_date = ts_now.replace(
-                            hour=9, minute=30, second=0, microsecond=0, nanosecond=0
-                        )
-                        # print("TDB: year=", year)
-                        # print("TDB: ts_now=", ts_now)
-                        # print("TDB: start_trade_date=", start_trade_date)
-                        # print("TDB: mtime=", mtime)
-                        if ts_now > start_trade_date:
-                            current_trade_date = ts_now.date()
-                        else:
-                            current_trade_date = (ts_now - pd.tseries.offsets.BDay(1)).date()
-                        # print("TDB: mtime.date()=", mtime.date())
-                        # print("TDB: current_trade_date=", current_trade_date)
-                        if mtime.date() < current_trade_date:
-                            print(
-                                "Current Trade Date=",
-                                current_trade_date,
-                                " Cached Trade Date=",
-                                mtime.date(),
-                            )
-                            print("Refresh cache file:", cf)
-                            cf.unlink(missing_ok=True)
-                            raise ValueError  # jump to except:
-                    self.logger.info(f"jj={jj}: using cache file {cf}, size={size}")
-                    nextdf = pd.read_csv(cf, index_col=0, parse_dates=True)
-                    self.logger.debug(_str_df("nextdf(1)", nextdf))
-                    if year == years[-1] and len(nextdf) > 0:
-                        end_dtm = self._input_to_datetime(end)
-                        dtm1 = nextdf.index[-1]
-                        self.logger.debug(f"year,end_dtm,dtm1={year},{end_dtm},{dtm1}")
-                        if end_dtm > dtm1:
-                            self.logger.warning(f"cache ({cf}) too short ... requesting more data.")
-                            raise RuntimeError(f"cache ({cf}) too short ... requesting more data.")
-                    #self.logger.info("BEF: tempdf.iloc[[0,1,-2,-1]]=\n%s",tempdf.iloc[[0,1,-2,-1]])
-                    #self.logger.info("BEF: nextdf.iloc[[0,1,-2,-1]]=\n%s",nextdf.iloc[[0,1,-2,-1]])
-                    tlen = len(tempdf)
-                    tempdf = pd.concat([tempdf, nextdf])
-                    #self.logger.info("AFT: tempdf.iloc[%s:%s]=\n%s",tlen-2,tlen+3,tempdf.iloc[tlen-2:tlen+3])
-                    PolygonApi.cached_files[cf] = True
-                    PolygonApi.cflock_release()
-                except:
-                    self.logger.debug(f"cache not found, requesting data for cache file: {cf}")
-                    cache_df = request_data_to_cache(year)
-                    if isinstance(cache_df, pd.DataFrame):  # zero length ok to cache
-                        self.logger.debug(f"caching data to file: {cf}")
-                        cache_df.to_csv(cf)
-                        tempdf = pd.concat([tempdf, cache_df])
-                        PolygonApi.cached_files[cf] = True
-                        self.logger.debug(_str_df("tempdf(2)", tempdf))
-                    PolygonApi.cflock_release()
-
-            if len(tempdf) > 1:
-                end_dtm = self._input_to_datetime(end, "end")
-                start_dtm = self._input_to_datetime(start, 0)
-                dtm0 = tempdf.index[0]
-                dtm1 = tempdf.index[-1]
-
-                dd = 0.05 * (dtm1 - dtm0)
-                if start_dtm.date() < (dtm0 - dd).date():
-                    self.logger.debug(f"dtm0,dtm1={dtm0}, {dtm1}")
-                    warnings.warn(
-                        "Requested START "
-                        + str(start_dtm)
-                        + " outside of cache (i.e. unavailable)\n"
-                        + "cache file(s): "
-                        + str(cache_files)
-                    )
+                    results[ticker] = future.result()
+                    if results[ticker] is None:
+                        failures[ticker] = "no data returned"
+                except Exception as e:
+                    results[ticker] = None
+                    failures[ticker] = repr(e)
+        return results, failures
+
+    def fetch_chain_ohlcv(
+        self,
+        chain,
+        start=-30,
+        end=0,
+        span="day",
+        market="regular",
+        cache=None,
+        span_multiplier=1,
+        tz="US/Eastern",
+        expirations=None,
+        strikes=None,
+        contract_type=None,
+        max_workers=None,
+    ):
+        """
+        Fetch OHLCV data for every contract (or a selection of the contracts) of an
+        options chain (as returned by `fetch_options_chain()`), using a pool of worker
+        threads (requests are still subject to the `requests_per_minute` rate limit).
+        Arguments `start`, `end`, `span`, `market`, `cache`, `span_multiplier`, and `tz`
+        are the same as for `fetch_ohlcvdf()`, and apply to every contract; with `cache`,
+        each contract is cached (as its own ticker) in the OHLCV cache.
 
-                # The time stamp on polygon.io aggregates corresponds to the Open of
-                # the aggregate; therefore the aggregate Closes just before the begining
-                # of the next aggregate and so we allow 99.9% past the last time stamp:
-                dd = 0.999 * (dtm1 - dtm0)
-                if end_dtm.date() > (dtm1 + dd).date():
-                    self.logger.debug(f"dtm0,dtm1={dtm0}, {dtm1}")
-                    warnings.warn(
-                        "Requested END "
-                        + str(end_dtm)
-                        + " outside of cache (i.e. unavailable)\n"
-                        + "cache file(s): "
-                        + str(cache_files)
-                    )
-                self.logger.debug(_str_df("tempdf(3)", tempdf))
-                self.logger.debug(f"type(start_dtm)={type(start_dtm)}")
-                self.logger.debug(f"type(end_dtm)={type(end_dtm)}")
-                self.logger.debug(f"start_dtm:end_dtm={start_dtm}:{end_dtm}")
-                tempdf = tempdf.loc[start_dtm:end_dtm]
+        Parameters
+        ----------
+        chain (OptionsChain): the options chain
+
+        expirations: If set, a list of the expiration dates of the contracts to fetch.
+
+        strikes:     If set, a (low, high) pair: fetch only the contracts with strike
+                     prices from low through high.
+
+        contract_type (str): If set, "call" or "put": fetch only that type of contract.
+
+        max_workers (int): Maximum number of contracts requested concurrently.
+                           Default is `pool_size` (one pooled connection per worker).
+
+        Contracts for which no data is returned (for example, contracts that did not
+        trade during the period) are left out.  A failure for one contract does not
+        abort the download: the failed contracts are listed, with their errors, in the
+        DataFrame's `attrs["failures"]` (and summarized in a warning).
+
+        Returns
+        -------
+        DataFrame of OHLCV data with an (Expiration, Strike, Type, Timestamp) MultiIndex.
+        """
+        cache = self._ohlcv_check_args(span, market, cache, span_multiplier)
+
+        tickers = chain.tickers
+        keep = np.ones(len(tickers), dtype=bool)
+        if expirations is not None:
+            wanted = pd.DatetimeIndex([self._input_to_datetime(xp, adj=0) for xp in expirations])
+            keep &= pd.DatetimeIndex(tickers.index.get_level_values("Expiration")).isin(wanted)
+        if strikes is not None:
+            strike = tickers.index.get_level_values("Strike")
+            keep &= (strike >= strikes[0]) & (strike <= strikes[1])
+        if contract_type is not None:
+            keep &= tickers.index.get_level_values("Type") == contract_type
+        tickers = tickers[keep]
+
+        kwargs = dict(
+            start=start, end=end, span=span, market=market, cache=cache, span_multiplier=span_multiplier, tz=tz
+        )
+        results, failures = self._fetch_ohlcvdf_concurrently(tickers.tolist(), kwargs, max_workers)
+        if len(failures) > 0:
+            warnings.warn(
+                "fetch_chain_ohlcv: " + str(len(failures)) + " of " + str(len(tickers))
+                + " contracts failed (see the DataFrame's attrs['failures'])"
+            )
+
+        keys, frames = [], []
+        for key, ticker in tickers.items():
+            df = results.get(ticker)
+            if df is not None and len(df) > 0:
+                keys.append(key)
+                frames.append(df.rename_axis("Timestamp"))
+        names = ["Expiration", "Strike", "Type", "Timestamp"]
+        if len(frames) > 0:
+            combined = pd.concat(frames, keys=keys, names=names)
         else:
-            tempdf = request_data()
+            ix = pd.MultiIndex.from_arrays([[], [], [], pd.DatetimeIndex([])], names=names)
+            combined = pd.DataFrame(columns=self._OHLCV_COLMAP.values(), index=ix)
+        combined.attrs["failures"] = failures
+        return combined
 
-        #print("BOTTOM of fetch_ohlcv(): tempdf.iloc[[0,1,-2,-1]]=\n",tempdf.iloc[[0,1,-2,-1]])
+    class _StrikesByExpiration(collections.abc.Mapping):
+        """
+        Read only dict of the strikes (a Series) of each expiration date (a Timestamp) of
+        an options chain, which also accepts any other form of date as a key (for example,
+        "YYYY-MM-DD").  Each Series is made when it is first looked up.
+        """
 
-        start_date = self._input_to_datetime(start).date()
-        first_date = tempdf.index[0].date()
-        ix_start = 1 if first_date < start_date else 0
-        # print(f"start={start}, start_date={start_date}, first_date={first_date}, ix_start={ix_start}")
-        return tempdf.iloc[ix_start:]
+        def __init__(self, expirations, offsets, strikes):
+            self._expirations = expirations  # (sorted datetime64 array)
+            self._offsets = offsets  # (strikes of expirations[jj] are strikes[offsets[jj]:offsets[jj+1]])
+            self._strikes = strikes
+            self._series = {}
+
+        def _position(self, expiration):
+            # (binary search for the expiration date)
+            if not isinstance(expiration, np.datetime64):
+                expiration = pd.Timestamp(expiration).normalize().to_datetime64()
+            jj = np.searchsorted(self._expirations, expiration)
+            if jj < len(self._expirations) and self._expirations[jj] == expiration:
+                return jj
+            raise KeyError(expiration)
+
+        def __getitem__(self, expiration):
+            jj = self._position(expiration)
+            if jj not in self._series:
+                strikes = self._strikes[self._offsets[jj] : self._offsets[jj + 1]]
+                self._series[jj] = pd.Index(strikes, name="Strike").to_series()
+            return self._series[jj]
+
+        def __iter__(self):
+            return iter(pd.DatetimeIndex(self._expirations))
+
+        def __len__(self):
+            return len(self._expirations)
 
     class OptionsChain:
         """
         Options Chain class
+
+        The contracts (`tickers`) are indexed by (Expiration, Strike, Type), where the
+        Expiration is a datetime64 and the Type is categorical ("call", "put").  The
+        expirations, and the strikes of each expiration, are found (once, when first
+        needed) from runs of the sorted index, and are looked up by binary search.
         """
 
         def __init__(self, underlying, tickers):
             self._underlying = underlying
+            ix = tickers.index
+            # (only the levels, that is the distinct values, of the index are converted)
+            if not pd.api.types.is_datetime64_dtype(ix.levels[0]):
+                ix = ix.set_levels(_PolygonApiBase._ns_index(pd.to_datetime(ix.levels[0])), level=0)
+            if not isinstance(ix.levels[2], pd.CategoricalIndex):
+                ix = ix.set_levels(pd.CategoricalIndex(ix.levels[2], categories=["call", "put"]), level=2)
+            tickers = tickers.set_axis(ix)
+            if not ix.is_monotonic_increasing:
+                tickers = tickers.sort_index()
             self._tickers = tickers
-            expvalues = self._tickers.index.get_level_values(0).unique().sort_values().values
-            expindex = pd.DatetimeIndex(expvalues)
-            self._expirations = pd.Series(expvalues, index=expindex, name="Expiration")
-            self._strikes = {}
-            for xp in expvalues:
-                self._strikes[xp] = (
-                    self._tickers.loc[xp].index.get_level_values(0).unique().to_series()
+            self._index = None
+
+        def _build_index(self):
+            # The distinct (Expiration, Strike) pairs, in (sorted) order, and the offsets
+            # at which the strikes of each expiration start:
+            if self._index is None:
+                ix = self._tickers.index
+                expiration = ix.get_level_values(0).to_numpy()
+                strike = ix.get_level_values(1).to_numpy()
+                new = np.ones(len(expiration), dtype=bool)
+                new[1:] = (expiration[1:] != expiration[:-1]) | (strike[1:] != strike[:-1])
+                expiration, strike = expiration[new], strike[new]
+                new = np.ones(len(expiration), dtype=bool)
+                new[1:] = expiration[1:] != expiration[:-1]
+                starts = np.flatnonzero(new)
+                expirations = expiration[starts]
+                offsets = np.r_[starts, len(expiration)]
+                self._index = (
+                    expirations,
+                    PolygonApi._StrikesByExpiration(expirations, offsets, strike),
                 )
+            return self._index
 
         @property
         def tickers(self):
@@ -658,20 +1534,323 @@ class PolygonApi(_PolygonApiBase):
 
         @property
         def expirations(self):
-            return self._expirations
+            expirations = pd.DatetimeIndex(self._build_index()[0], name="Expiration")
+            return pd.Series(expirations, index=expirations, name="Expiration")
 
         @property
         def strikes(self):
-            return self._strikes
+            return self._build_index()[1]
 
         def get_strikes_by_expiration(self, expiration):
-            exp = str(_PolygonApiBase._input_to_datetime(_PolygonApiBase, expiration).date())
-            if str(exp) in self._strikes:
-                return self._strikes[exp]
+            if isinstance(expiration, int):
+                expiration = _PolygonApiBase._input_to_datetime(_PolygonApiBase, expiration)
+            try:
+                return self.strikes[expiration]
+            except KeyError:
+                return None
+
+        def nearest_expiration(self, date):
+            """
+            The expiration date (Timestamp) nearest to `date` (the earlier, if two are equally
+            near), or None if the chain is empty.
+            """
+            expirations = self._build_index()[0]
+            if len(expirations) == 0:
+                return None
+            if isinstance(date, int):
+                date = _PolygonApiBase._input_to_datetime(_PolygonApiBase, date)
+            return pd.Timestamp(self._nearest(expirations, pd.Timestamp(date).normalize().to_datetime64()))
+
+        def nearest_strike(self, expiration, price):
+            """
+            The strike price, of the contracts expiring on `expiration`, nearest to `price`
+            (the lower, if two are equally near), or None if there is no such expiration.
+            """
+            strikes = self.get_strikes_by_expiration(expiration)
+            if strikes is None:
+                return None
+            return self._nearest(strikes.to_numpy(), price)
+
+        @staticmethod
+        def _nearest(values, x):
+            # (binary search of the sorted `values`, for the value nearest to `x`)
+            jj = min(max(int(np.searchsorted(values, x)), 1), len(values) - 1)
+            if jj > 0 and x - values[jj - 1] <= values[jj] - x:
+                jj -= 1
+            return values[jj]
+
+    def _options_chain_windows(self, start_expiration, end_expiration):
+        # The (expired, start_dtm, end_dtm) windows of the contracts to request: expired
+        # and un-expired contracts are requested separately.
+        if start_expiration is None:
+            start_expiration = 0
+
+        start_dtm = self._input_to_datetime(start_expiration, adj=0)
+
+        if end_expiration is None:
+            end_dtm = None
+        else:
+            end_dtm = self._input_to_datetime(end_expiration, adj=0)
+
+        # (the contracts expiring today may already be reported as expired, so expired
+        # contracts are requested through today, but none expire later than today)
+        windows = []
+        today = datetime.datetime.today().date()
+        if start_dtm.date() <= today:
+            expired_end = datetime.datetime.combine(today, datetime.time())
+            if end_dtm is not None and end_dtm.date() <= today:
+                expired_end = end_dtm
+            windows.append(("true", start_dtm, expired_end))
+        if end_dtm is None or end_dtm.date() >= today or start_dtm.date() >= today:
+            windows.append(("false", start_dtm, end_dtm))
+
+        return windows
+
+    def _contracts_request(self, underlying, expired, start_dtm, end_dtm):
+        # (`start_dtm` and `end_dtm` may be datetimes or dates; `end_dtm` may be None)
+        req = (
+            self.base_url
+            + "/v3/reference/options/contracts?"
+            + "underlying_ticker="
+            + underlying
+            + "&expired="
+            + expired
+            + "&expiration_date.gte="
+            + start_dtm.strftime("%Y-%m-%d")
+        )
+        if end_dtm is not None:
+            req += "&expiration_date.lte=" + end_dtm.strftime("%Y-%m-%d")
+        req += "&limit=1000&apiKey=" + self.APIKEY
+        return req
+
+    def _options_chain_requests(self, underlying, start_expiration, end_expiration):
+        windows = self._options_chain_windows(start_expiration, end_expiration)
+        return [self._contracts_request(underlying, *window) for window in windows]
+
+    # (an un-expired window with no end date is split into this many calendar months,
+    # and then one open-ended window for all later expirations)
+    _CONTRACT_WINDOW_MONTHS = 12
+
+    def _contracts_subwindows(self, window):
+        # Split one (expired, start, end) window into sub-windows of expiration dates,
+        # each paged through with its own cursor, that together cover exactly the window.
+        # Expired contracts are split per calendar month through this month, and
+        # un-expired contracts per calendar month from this month (for
+        # `_CONTRACT_WINDOW_MONTHS` months, if the window has no end); the rest of the
+        # window (which holds few such contracts, if any) is one sub-window at either end.
+        expired, lo, hi = window
+        one_day = datetime.timedelta(days=1)
+        lo = lo.date() if isinstance(lo, datetime.datetime) else lo
+        hi = hi.date() if isinstance(hi, datetime.datetime) else hi
+        month = pd.Period(datetime.datetime.today(), freq="M")
+        if expired == "true":
+            first, last = lo, month.end_time.date()
+            if hi is not None:
+                last = min(last, hi)
+        else:
+            first = max(lo, month.start_time.date())
+            last = hi if hi is not None else (month + self._CONTRACT_WINDOW_MONTHS - 1).end_time.date()
+        if first > last:
+            return [(expired, lo, hi)]
+        subwindows = [(expired, lo, first - one_day)] if lo < first else []
+        firsts = [first] + [day.date() for day in pd.date_range(first + one_day, last, freq="MS")]
+        lasts = [day - one_day for day in firsts[1:]] + [last]
+        subwindows.extend((expired, day0, day1) for day0, day1 in zip(firsts, lasts))
+        if hi is None or last < hi:
+            subwindows.append((expired, last + one_day, hi))
+        return subwindows
+
+    # --------------------------------------------------------------------- #
+    # The options contracts cache: the contracts of each underlying are cached
+    # per expiration date (one file per date, in `cache_format`) in
+    # `Path.home()/.pdpolygonapi/options_cache/`.  An index (json) per underlying
+    # and `cache_format` records which expiration dates have been requested (and are
+    # cached in that format):
+    #
+    #    "expired":   the ranges of expiration dates [start, end] whose (then
+    #                 already expired) contracts are cached.  These never change,
+    #                 so they are never requested again.
+    #    "unexpired": the range of expiration dates (end None: no limit) of the
+    #                 un-expired contracts last requested, and when.  These are
+    #                 requested again after `options_chain_ttl` seconds.
+    # --------------------------------------------------------------------- #
+
+    def _options_cache_dir(self):
+        return cache_subdir("options_cache")
+
+    def _options_cache_file(self, underlying, expiration):
+        return self._options_cache_dir() / (underlying + ".options." + expiration + "." + self.cache_format)
+
+    def _options_cache_index_file(self, underlying):
+        return self._options_cache_dir() / (underlying + ".options." + self.cache_format + ".json")
+
+    def _options_cache_index(self, underlying):
+        index_file = self._options_cache_index_file(underlying)
+        if index_file.exists():
+            return json.loads(index_file.read_text())
+        return dict(expired=[], unexpired=None)
+
+    @staticmethod
+    def _date_gaps(lo, hi, covered):
+        # The ranges of dates within [lo, hi] that are not within any of the `covered`
+        # (merged, ISO date string) ranges:
+        gaps = []
+        one_day = datetime.timedelta(days=1)
+        for c0, c1 in covered:
+            c0, c1 = datetime.date.fromisoformat(c0), datetime.date.fromisoformat(c1)
+            if c1 < lo:
+                continue
+            if c0 > hi:
+                break
+            if c0 > lo:
+                gaps.append((lo, c0 - one_day))
+            lo = c1 + one_day
+        if lo <= hi:
+            gaps.append((lo, hi))
+        return gaps
+
+    @staticmethod
+    def _merge_date_ranges(ranges):
+        # Merge overlapping or adjacent (ISO date string) ranges:
+        merged = []
+        for c0, c1 in sorted(ranges):
+            day_before = str(datetime.date.fromisoformat(c0) - datetime.timedelta(days=1))
+            if merged and day_before <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], c1)
+            else:
+                merged.append([c0, c1])
+        return merged
+
+    def _options_cache_plan(self, underlying, windows, ttl):
+        # The windows (expired, start_date, end_date) of contracts that are not cached,
+        # or (un-expired) not cached within the last `ttl` seconds, and so are to be
+        # requested:
+        index = self._options_cache_index(underlying)
+        today = datetime.datetime.today().date()
+        plan = []
+        for expired, start_dtm, end_dtm in windows:
+            if expired == "true":
+                lo, hi = start_dtm.date(), today - datetime.timedelta(days=1)
+                if end_dtm is not None:
+                    hi = min(hi, end_dtm.date())
+                plan.extend(("true", gap0, gap1) for gap0, gap1 in self._date_gaps(lo, hi, index["expired"]))
+            else:
+                lo, hi = max(start_dtm.date(), today), None if end_dtm is None else end_dtm.date()
+                cached = index["unexpired"]
+                fresh = (
+                    cached is not None
+                    and pd.Timestamp.now().timestamp() - cached["fetched_at"] < ttl
+                    and cached["start"] <= str(lo)
+                    and (cached["end"] is None or (hi is not None and str(hi) <= cached["end"]))
+                )
+                if not fresh:
+                    plan.append(("false", lo, hi))
+        return plan
+
+    def _planned_subwindows(self, window):
+        # The sub-windows of one planned window (see `_options_cache_plan()`).  The
+        # expired contracts of a plan end yesterday (only those are never requested
+        # again), so the un-expired window from today also requests the contracts
+        # expiring today that are already reported as expired: they are cached (and
+        # requested again after the ttl) along with the un-expired contracts.
+        subwindows = self._contracts_subwindows(window)
+        expired, lo, _hi = window
+        if expired == "false" and lo == datetime.datetime.today().date():
+            subwindows.append(("true", lo, lo))
+        return subwindows
+
+    def _options_cache_dates(self, underlying):
+        # {expiration date (ISO string): cache file} of the cached contracts of `underlying`:
+        prefix, suffix = underlying + ".options.", "." + self.cache_format
+        return {
+            cf.name[len(prefix) : -len(suffix)]: cf
+            for cf in self._options_cache_dir().glob(prefix + "*" + suffix)
+            if not cf.name.startswith(".")
+        }
+
+    def _options_cache_store(self, underlying, window, frames):
+        # Cache the contracts of one requested window, per expiration date (replacing
+        # any cached contracts of the dates in the window), and update the index:
+        expired, lo, hi = window
+        frames = [rdf[self._CONTRACT_COLUMNS] for rdf in frames if rdf is not None and len(rdf) > 0]
+        df = pd.concat(frames) if len(frames) > 0 else pd.DataFrame(columns=self._CONTRACT_COLUMNS)
+        for expiration, cf in self._options_cache_dates(underlying).items():
+            if str(lo) <= expiration and (hi is None or expiration <= str(hi)):
+                cf.unlink(missing_ok=True)  # (no such contracts, any longer)
+        for expiration, xdf in df.groupby("expiration_date"):
+            xdf.index = pd.DatetimeIndex(xdf["expiration_date"], name="Expiration")
+            self._cache_write_df(self._options_cache_file(underlying, expiration), xdf)
+
+        index = self._options_cache_index(underlying)
+        if expired == "true":
+            index["expired"] = self._merge_date_ranges(index["expired"] + [[str(lo), str(hi)]])
+        else:
+            end = None if hi is None else str(hi)
+            index["unexpired"] = dict(start=str(lo), end=end, fetched_at=pd.Timestamp.now().timestamp())
+        atomic_write(self._options_cache_index_file(underlying), lambda path: path.write_text(json.dumps(index)))
+
+    def _options_cache_read(self, underlying, windows):
+        # The cached contracts (as frames) with expiration dates within `windows`:
+        start = min(start_dtm for _expired, start_dtm, _end_dtm in windows).date()
+        ends = [end_dtm for _expired, _start_dtm, end_dtm in windows]
+        end = None if None in ends else max(ends).date()
+        frames = []
+        for expiration, cf in sorted(self._options_cache_dates(underlying).items()):
+            if str(start) <= expiration and (end is None or expiration <= str(end)):
+                frames.append(self._cache_read_df(cf).reset_index(drop=True))
+        return frames
+
+    _CONTRACT_COLUMNS = ["contract_type", "expiration_date", "strike_price", "ticker"]
+
+    def _contracts_to_df(self, rd):
+        if "results" not in rd:
             return None
+        rdf = self._results_to_df(rd["results"], self._CONTRACT_COLUMNS)
+        rdf.drop(
+            [
+                "cfi",
+                "exercise_style",
+                "primary_exchange",
+                "shares_per_contract",
+                "underlying_ticker",
+            ],
+            axis=1,
+            inplace=True,
+            errors="ignore",
+        )
+        return rdf
+
+    def _options_chain_from_frames(self, underlying, frames):
+        frames = [rdf for rdf in frames if rdf is not None]
+        if len(frames) > 0:
+            totdf = pd.concat(frames)
+        else:
+            totdf = pd.DataFrame(columns=["contract_type", "expiration_date", "strike_price", "ticker"])
+
+        totdf.rename(
+            columns={
+                "contract_type": "Type",
+                "expiration_date": "Expiration",
+                "strike_price": "Strike",
+                "ticker": "Ticker",
+            },
+            inplace=True,
+        )
+
+        totdf.set_index(["Expiration", "Strike", "Type"], inplace=True)
+        totdf.sort_index(inplace=True)
+
+        # oc = OptionsChain(underlying,totdf)
+        return self.OptionsChain(underlying, totdf.Ticker)
 
     def fetch_options_chain(
-        self, underlying, start_expiration=None, end_expiration=None, show_request=False
+        self,
+        underlying,
+        start_expiration=None,
+        end_expiration=None,
+        show_request=False,
+        cache=None,
+        max_workers=None,
     ):
         """
         Given an underlying ticker, fetch all of the options for that underlying
@@ -694,6 +1873,17 @@ class PolygonApi(_PolygonApiBase):
                           `str` : Any string date recognized by Pandas, for example 'YYYY-MM-DD'
                           Default value is `None`
 
+        cache (bool):     If True, the contracts are cached (per underlying, per expiration
+                          date) in `~/.pdpolygonapi/options_cache/`, and are read from there:
+                          contracts that had already expired when they were cached are never
+                          requested again, while un-expired contracts are requested again
+                          when they were cached more than `options_chain_ttl` seconds ago.
+                          Default is the `cache` given when this instance was created.
+
+        max_workers (int): Maximum number of windows (of up to a month) of expiration dates
+                           requested concurrently, each paged through with its own cursor.
+                           Default is `pool_size` (one pooled connection per worker).
+
         Returns
         -------
         an `OptionsChain` object that contains:
@@ -707,106 +1897,113 @@ class PolygonApi(_PolygonApiBase):
                   ALL existing UN-expired options (and no expired options).
 
         """
-        if start_expiration is None:
-            start_expiration = 0
-
-        start_dtm = self._input_to_datetime(start_expiration, adj=0)
+        if cache is None:
+            cache = self.cache_initializer
+        windows = self._options_chain_windows(start_expiration, end_expiration)
+
+        if not cache:
+            subwindows = [self._contracts_subwindows(window) for window in windows]
+            window_frames = self._request_contract_windows(underlying, subwindows, show_request, max_workers)
+            return self._options_chain_from_frames(underlying, [rdf for frames in window_frames for rdf in frames])
+
+        with cache_key_lock(self._options_cache_index_file(underlying)):
+            plan = self._options_cache_plan(underlying, windows, self.options_chain_ttl)
+            subwindows = [self._planned_subwindows(window) for window in plan]
+            window_frames = self._request_contract_windows(underlying, subwindows, show_request, max_workers)
+            for window, frames in zip(plan, window_frames):
+                self._options_cache_store(underlying, window, frames)
+            frames = self._options_cache_read(underlying, windows)
+        return self._options_chain_from_frames(underlying, frames)
+
+    def _request_contract_windows(self, underlying, subwindows, show_request=False, max_workers=None):
+        # Request the contracts of each window, given as its sub-windows (see
+        # `_contracts_subwindows()`), which are paged through concurrently; returns, per
+        # window, the frames of its sub-windows.
+        if max_workers is None:
+            max_workers = self.pool_size
+        reqs = [self._contracts_request(underlying, *sub) for subs in subwindows for sub in subs]
+        if len(reqs) == 0:
+            return [[] for _ in subwindows]
+        if not show_request:
+            print("Requesting options chain data ...", end="")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(reqs))) as executor:
+            frames = iter(list(executor.map(lambda req: self._request_contracts(req, show_request), reqs)))
+        if not show_request:
+            print()
+        return [[next(frames) for _ in subs] for subs in subwindows]
+
+    def _request_contracts(self, req, show_request=False):
+        # Page through the contracts of one request; returns the results of all of the
+        # pages as one frame (None if there are none).
+        if show_request:
+            print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
+        rd = self._req_get_json(req)
+        results = list(rd.get("results", []))
+        while "results" in rd and "next_url" in rd:
+            if not show_request:
+                print(".", end="")
+            req = rd["next_url"] + "&apiKey=" + self.APIKEY
+            rd = self._req_get_json(req)
+            results.extend(rd.get("results", []))
+        return self._contracts_to_df(dict(results=results)) if len(results) > 0 else None
 
-        if end_expiration is None:
-            end_dtm = None
-        else:
-            end_dtm = self._input_to_datetime(end_expiration, adj=0)
+    async def fetch_options_chain_async(
+        self, underlying, start_expiration=None, end_expiration=None, show_request=False, cache=None
+    ):
+        """
+        Coroutine version of `fetch_options_chain()`: same arguments (except `max_workers`;
+        the number of requests in flight is capped by `pool_size`), same return value, and
+        the same cache.  Progress is logged rather than printed.
+        """
 
-        expval = []
-        today = datetime.datetime.today().date()
-        if start_dtm.date() < today:
-            expval.append("true")
-        if end_dtm is None or end_dtm.date() >= today or start_dtm.date() >= today:
-            expval.append("false")
-
-        def _gen_contracts_request(underlying, expired, start_dtm, end_dtm):
-            req = (
-                "https://api.polygon.io/v3/reference/options/contracts?"
-                + "underlying_ticker="
-                + underlying
-                + "&expired="
-                + expired
-                + "&expiration_date.gte="
-                + start_dtm.strftime("%Y-%m-%d")
-            )
-            if end_dtm is not None:
-                req += "&expiration_date.lte=" + end_dtm.strftime("%Y-%m-%d")
-            req += "&limit=1000&apiKey=" + self.APIKEY
-            return req
-
-        totdf = None
-        for expired in expval:
-            req = _gen_contracts_request(underlying, expired, start_dtm, end_dtm)
+        async def _request_contracts(req):
             if show_request:
                 print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
-            else:
-                print("Requesting options chain data ...", end="")
-            rd = self._req_get_json(req)
-            if "results" not in rd:
-                totdf = pd.DataFrame(
-                    columns=["contract_type", "expiration_date", "strike_price", "ticker"]
-                )
-                break
-            rdf = pd.DataFrame(rd["results"])
-            rdf.drop(
-                [
-                    "cfi",
-                    "exercise_style",
-                    "primary_exchange",
-                    "shares_per_contract",
-                    "underlying_ticker",
-                ],
-                axis=1,
-                inplace=True,
-            )
-            if totdf is None:
-                totdf = pd.DataFrame(columns=rdf.columns)
-            totdf = pd.concat([totdf, rdf])
-            while "next_url" in rd:
-                print(".", end="")
+            rd = await self._req_get_json_async(req)
+            results = list(rd.get("results", []))
+            while "results" in rd and "next_url" in rd:
+                self.logger.debug("requesting next page of %s options contracts", underlying)
                 req = rd["next_url"] + "&apiKey=" + self.APIKEY
-                r = requests.get(req)
-                rd = r.json()
-                if "results" not in rd:
-                    break
-                rdf = pd.DataFrame(rd["results"])
-                rdf.drop(
-                    [
-                        "cfi",
-                        "exercise_style",
-                        "primary_exchange",
-                        "shares_per_contract",
-                        "underlying_ticker",
-                    ],
-                    axis=1,
-                    inplace=True,
-                )
-                totdf = pd.concat([totdf, rdf])
-            if not show_request:
-                print()
+                rd = await self._req_get_json_async(req)
+                results.extend(rd.get("results", []))
+            return self._contracts_to_df(dict(results=results)) if len(results) > 0 else None
 
-        totdf.rename(
-            columns={
-                "contract_type": "Type",
-                "expiration_date": "Expiration",
-                "strike_price": "Strike",
-                "ticker": "Ticker",
-            },
-            inplace=True,
-        )
-
-        totdf.set_index(["Expiration", "Strike", "Type"], inplace=True)
-        totdf.sort_index(inplace=True)
-
-        # oc = OptionsChain(underlying,totdf)
-        return self.OptionsChain(underlying, totdf.Ticker)
-
-    def fetch_quotes(self, ticker, str_date, show_request=False):
+        if cache is None:
+            cache = self.cache_initializer
+        windows = self._options_chain_windows(start_expiration, end_expiration)
+        plan = self._options_cache_plan(underlying, windows, self.options_chain_ttl) if cache else windows
+
+        self.logger.info("Requesting options chain data for %s", underlying)
+        split = self._planned_subwindows if cache else self._contracts_subwindows
+        subwindows = [split(window) for window in plan]
+        reqs = [self._contracts_request(underlying, *sub) for subs in subwindows for sub in subs]
+        frames = iter(await asyncio.gather(*[_request_contracts(req) for req in reqs]))
+        pages = [[next(frames) for _ in subs] for subs in subwindows]
+        if not cache:
+            return self._options_chain_from_frames(underlying, [rdf for frames in pages for rdf in frames])
+
+        # (the cache lock is never held across an `await`; see `fetch_ohlcvdf_async()`)
+        with cache_key_lock(self._options_cache_index_file(underlying)):
+            for window, frames in zip(plan, pages):
+                self._options_cache_store(underlying, window, frames)
+            frames = self._options_cache_read(underlying, windows)
+        return self._options_chain_from_frames(underlying, frames)
+
+    _QUOTE_COLUMNS = [
+        "Ask",
+        "AsizeA",
+        "AsizeM",
+        "AsizeH",
+        "AsizeL",
+        "Bid",
+        "BsizeA",
+        "BsizeM",
+        "BsizeH",
+        "BsizeL",
+        "Count",
+    ]
+
+    def _quotes_request(self, ticker, str_date, limit=50000):
         # Format nanosecond UTC unix timestamps:
         ts1 = str(
             int(
@@ -822,143 +2019,348 @@ class PolygonApi(_PolygonApiBase):
         )
 
         req = (
-            "https://api.polygon.io/v3/quotes/" + ticker + "?"
+            self.base_url + "/v3/quotes/" + ticker + "?"
             "timestamp.gte="
             + ts1
             + "&timestamp.lte="
             + ts2
-            + "&limit=50000&"
-            + "apiKey="
+            + "&order=asc&sort=timestamp&limit="
+            + str(limit)
+            + "&apiKey="
             + self.APIKEY
         )
+        return req, ts1, ts2
 
-        print(
-            'Requesting quote data for "' + ticker + '"\n',
-            "from",
-            pd.Timestamp(int(ts1)),
-            " to ",
-            pd.Timestamp(int(ts2)),
-            "UTC",
-        )
-
-        if show_request:
-            print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
-
-        rd = requests.get(req).json()
-
-        self.logger.debug(f"response status: {rd['status']}")  # ,'  response keys:',rd.keys())
-
-        columns = [
-            "Ask",
-            "AsizeA",
-            "AsizeM",
-            "AsizeH",
-            "AsizeL",
-            "Bid",
-            "BsizeA",
-            "BsizeM",
-            "BsizeH",
-            "BsizeL",
-            "Count",
-        ]
+    def _empty_quotes(self, raw=False):
+        if raw:  # (as `iter_quotes()` yields them)
+            return pd.DataFrame(columns=self._QUOTE_RESULT_KEYS, index=pd.DatetimeIndex([], tz="UTC"))
         ix = pd.DatetimeIndex([], name="Timestamp")
-        empty = pd.DataFrame(columns=columns, index=ix)
+        return pd.DataFrame(columns=self._QUOTE_COLUMNS, index=ix)
 
+    def _quotes_response_ok(self, rd):
         if rd["status"] != "OK":
             print("Got status =", rd["status"])
-            return empty
+            return False
 
         if "results" not in rd:
             print("No results in response.")
-            return empty
+            return False
 
         if len(rd["results"]) == 0:
             print("zero length results.")
-            return empty
+            return False
+
+        return True
+
+    _QUOTE_RESULT_KEYS = ["sip_timestamp", "ask_price", "ask_size", "bid_price", "bid_size", "sequence_number"]
+
+    def _quotes_page_to_df(self, rd):
+        tdf = self._results_to_df(rd["results"], self._QUOTE_RESULT_KEYS)
+        tdf.index = pd.to_datetime(tdf.sip_timestamp.to_numpy(dtype="int64"), unit="ns", utc=True)
+        return tdf
+
+    def _quote_bar_width(self, bar_width):
+        # bar width (for example "1s", "100ms", "1min") in nanoseconds:
+        width = pd.Timedelta(bar_width).value
+        if width <= 0:
+            raise ValueError("bar_width must be a positive time span, such as '1s'")
+        return width
+
+    @staticmethod
+    def _sort_within_bars(values, bar_ix):
+        # Sort `values` within each bar, where `bar_ix` (0, 1, 2, ...) is the (ascending)
+        # bar of each value.  Integer values (such as sizes) are sorted as a single int64
+        # key, bar_ix * span + value, which is several times faster than `lexsort()`:
+        if values.dtype.kind in "iu":
+            lo, hi = int(values.min()), int(values.max())
+            span = hi - lo + 1
+            if (int(bar_ix[-1]) + 1) * span < 2**62:
+                keys = np.sort(bar_ix * span + (values - lo), kind="stable")
+                return (keys - bar_ix * span + lo).astype("float64")
+        values = values.astype("float64")
+        return values[np.lexsort((values, bar_ix))]
+
+    def _quotes_to_bars(self, qdf, bar_width="1s"):
+        # Aggregate quotes (as yielded by `iter_quotes()`) to bars of `bar_width`, in one
+        # vectorized pass: each quote's bar number is its nanosecond time stamp // the bar
+        # width, and the quotes are sorted by bar number, and then by size, so that every
+        # statistic of every bar is a `reduceat` over that bar's run of quotes, and the
+        # median size is the middle of the run.  (Bars are aligned to multiples of the
+        # width since midnight UTC, so for example 1 minute bars start on the minute).
+        if len(qdf) == 0:
+            return self._empty_quotes()
+        width = self._quote_bar_width(bar_width)
+        bar = self._ns_index(qdf.index).asi8 // width
+        order = np.argsort(bar, kind="stable")  # (pages are already in time stamp order)
+        bar = bar[order]
+        starts = np.flatnonzero(np.r_[True, bar[1:] != bar[:-1]])
+        counts = np.diff(np.r_[starts, len(bar)])
+        last = starts + counts - 1
+        bar_ix = np.repeat(np.arange(len(starts)), counts)
+
+        columns = {}
+        for side, price, size in (("A", "ask_price", "ask_size"), ("B", "bid_price", "bid_size")):
+            prices = qdf[price].to_numpy(dtype="float64")[order]
+            sizes = self._sort_within_bars(qdf[size].to_numpy()[order], bar_ix)
+            # (mean price as the first price of each bar plus the mean change from it, which
+            # sums much smaller numbers, and so is more precise, than summing the prices)
+            first = prices[starts]
+            mean = first + np.add.reduceat(prices - first[bar_ix], starts) / counts
+            columns["Ask" if side == "A" else "Bid"] = np.round(mean, 2)
+            columns[side + "sizeA"] = np.add.reduceat(sizes, starts) / counts
+            columns[side + "sizeM"] = (sizes[starts + (counts - 1) // 2] + sizes[starts + counts // 2]) / 2
+            columns[side + "sizeH"] = sizes[last]
+            columns[side + "sizeL"] = sizes[starts]
+        columns["Count"] = counts
+
+        ix = pd.to_datetime(bar[starts] * width, unit="ns", utc=True)
+        ix = ix.tz_convert(self._EXCHANGE_TZ).tz_localize(None).rename("Timestamp")
+        bars = pd.DataFrame(columns, index=self._ns_index(ix))[self._QUOTE_COLUMNS].dropna(how="any")
+        sizes = [column for column in self._QUOTE_COLUMNS if "size" in column]
+        bars[sizes] = np.rint(bars[sizes].to_numpy()).astype("int64")
+        return bars
+
+    def _quote_bars_step(self, carry, page, bar_width="1s"):
+        # Streaming step of the bars: given the quotes of the (not yet finished) last bar
+        # of the previous pages, `carry`, and the next page of quotes, returns the bars
+        # that are now finished, and the new carry.  (The pages are requested in timestamp
+        # order, so a bar is finished as soon as a later quote is seen).
+        qdf = page if carry is None else pd.concat([carry, page])
+        if len(qdf) == 0:
+            return None, carry
+        bar = self._ns_index(qdf.index).asi8 // self._quote_bar_width(bar_width)
+        finished = bar < bar[-1]
+        bars = self._quotes_to_bars(qdf[finished], bar_width) if finished.any() else None
+        return bars, qdf[~finished]
+
+    def iter_quotes(self, ticker, str_date, limit=50000, show_request=False):
+        """
+        Generator of the (bid/ask) quotes of `ticker` during regular trading hours on
+        `str_date`, one page (of no more than `limit` quotes) at a time, in timestamp order.
+        Each page is requested only when the previous page has been consumed, so memory
+        use is bounded by the page size, rather than by the number of quotes in the day.
+
+        Yields
+        ------
+        DataFrame of the quotes in one page, with the columns `sip_timestamp`, `ask_price`,
+        `ask_size`, `bid_price`, `bid_size`, `sequence_number`, indexed by (UTC) timestamp.
+
+        Returns
+        -------
+        (as the generator's return value, the `value` of its `StopIteration`) True if all
+        of the day's quotes were received, or False if polygon.io responded with a status
+        other than OK (to the first page, or to any later page).
+        """
+        req, ts1, ts2 = self._quotes_request(ticker, str_date, limit)
+
+        self.logger.info("Requesting quote data for %s on %s", ticker, str_date)
+
+        if show_request:
+            print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
 
-        qdf = pd.DataFrame(rd["results"])
-        ts = [pd.Timestamp(t, tz="UTC") for t in qdf.sip_timestamp]
-        qdf.index = pd.DatetimeIndex(ts)
-        self.logger.debug(f"received {len(qdf)} quotes so far ...")
+        rd = self._req_get_json(req)
 
-        while rd["status"] == "OK" and "next_url" in rd:
+        self.logger.debug(f"response status: {rd['status']}")  # ,'  response keys:',rd.keys())
+
+        if not self._quotes_response_ok(rd):
+            return rd["status"] == "OK"  # (OK with no results: there were no quotes that day)
+
+        count = 0
+        while True:
+            page = self._quotes_page_to_df(rd) if "results" in rd else None
+            if page is not None:
+                count += len(page)
+                self.logger.debug(f"received {count} quotes so far ...")
+                yield page
+            if rd["status"] != "OK" or "next_url" not in rd:
+                break
             self.logger.debug(f"getting next_url ... ")
             req = rd["next_url"] + "&apikey=" + self.APIKEY
-            rd = requests.get(req).json()
+            rd = self._req_get_json(req)
             self.logger.debug(f"response status: {rd['status']}")
-            tdf = pd.DataFrame(rd["results"])
-            ts = [pd.Timestamp(t, tz="UTC") for t in tdf.sip_timestamp]
-            tdf.index = pd.DatetimeIndex(ts)
-            qdf = pd.concat([qdf, tdf])
-            if "next_url" in rd:
-                self.logger.debug(f"received {len(qdf)} quotes so far ...")
-            else:
-                self.logger.debug(f"received {len(qdf)} quotes.")
 
         if rd["status"] != "OK":
             print("WARNING: status=", rd["status"])
+            return False
+        return True
 
-        qdf.sort_index(inplace=True)
+    def iter_quote_bars(self, ticker, str_date, limit=50000, show_request=False, bar_width="1s"):
+        """
+        Generator of the bars of quote data (as returned by `fetch_quotes()`) of `ticker`
+        on `str_date`, computed as the quotes are received: each DataFrame yielded holds
+        the bars that were finished by the latest page of quotes.  Memory use is bounded
+        by the page size (`limit` quotes).  Returns, as `iter_quotes()` does, whether all
+        of the day's quotes were received.
+        """
+        complete = None
+
+        def _pages():
+            nonlocal complete
+            complete = yield from self.iter_quotes(ticker, str_date, limit, show_request)
+
+        carry = None
+        for page in _pages():
+            bars, carry = self._quote_bars_step(carry, page, bar_width)
+            if bars is not None and len(bars) > 0:
+                yield bars
+        if carry is not None and len(carry) > 0:
+            yield self._quotes_to_bars(carry, bar_width)
+        return complete
+
+    def fetch_quotes(self, ticker, str_date, show_request=False, bar_width="1s"):
+        """
+        Fetch the (bid/ask) quotes of `ticker` during regular trading hours on `str_date`,
+        aggregated to bars of `bar_width` (default "1s"; any `pd.Timedelta` string, such as
+        "100ms" or "1min").  Each bar holds the mean Ask and Bid prices, the mean (A),
+        median (M), high (H) and low (L) ask and bid sizes, and the Count of quotes.
+        Bars in which there were no quotes are omitted.
+        """
+        req, ts1, ts2 = self._quotes_request(ticker, str_date)
 
-        qdf.rename(
-            columns=dict(
-                ask_price="Ask",
-                ask_size="AsizeA",
-                bid_price="Bid",
-                bid_size="BsizeA",
-                sequence_number="Count",
-            ),
-            inplace=True,
-        )
-        qdf.index.name = "Timestamp"
-
-        # add columns for size: median, high, low:
-        qdf["AsizeM"] = qdf["AsizeA"]
-        qdf["AsizeH"] = qdf["AsizeA"]
-        qdf["AsizeL"] = qdf["AsizeA"]
-        qdf["BsizeM"] = qdf["BsizeA"]
-        qdf["BsizeH"] = qdf["BsizeA"]
-        qdf["BsizeL"] = qdf["BsizeA"]
-
-        print("resampling to 1S intervals ...")
-        sqdf = (
-            qdf.resample("1S")
-            .agg(
-                {
-                    "Ask": "mean",  # Ask Price
-                    "AsizeA": "mean",  # Ask Size Average
-                    "AsizeM": "median",  # Ask Size Median
-                    "AsizeH": "max",  # Ask Size High
-                    "AsizeL": "min",  # Ask Size Low
-                    "Bid": "mean",  # Bid Price
-                    "BsizeA": "mean",  # Bid Size Average
-                    "BsizeM": "median",  # Bid Size Median
-                    "BsizeH": "max",  # Bid Size High
-                    "BsizeL": "min",  # Bid Size Low
-                    "Count": "count",
-                }  # Count Bids/Asks in this second.
-            )
-            .dropna(how="any")
+        print(
+            'Requesting quote data for "' + ticker + '"\n',
+            "from",
+            pd.Timestamp(int(ts1)),
+            " to ",
+            pd.Timestamp(int(ts2)),
+            "UTC",
         )
 
-        sqdf.AsizeA = [int(round(item, 0)) for item in sqdf.AsizeA]
-        sqdf.BsizeA = [int(round(item, 0)) for item in sqdf.BsizeA]
-        sqdf.AsizeM = [int(round(item, 0)) for item in sqdf.AsizeM]
-        sqdf.BsizeM = [int(round(item, 0)) for item in sqdf.BsizeM]
-        sqdf.AsizeH = [int(round(item, 0)) for item in sqdf.AsizeH]
-        sqdf.BsizeH = [int(round(item, 0)) for item in sqdf.BsizeH]
-        sqdf.AsizeL = [int(round(item, 0)) for item in sqdf.AsizeL]
-        sqdf.BsizeL = [int(round(item, 0)) for item in sqdf.BsizeL]
-        sqdf.Ask = [round(item, 2) for item in sqdf.Ask]
-        sqdf.Bid = [round(item, 2) for item in sqdf.Bid]
-        sqdf.Count = [int(round(item, 0)) for item in sqdf.Count]
-
-        sqdf.index = sqdf.index.tz_convert("US/Eastern").tz_localize(None)
+        sqdf, _complete = self._quotes_day(ticker, str_date, show_request=show_request, bar_width=bar_width)
 
         print("returning", len(sqdf), "quotes.")
 
         return sqdf
 
+    def _quotes_day(self, ticker, str_date, raw=False, show_request=False, bar_width="1s"):
+        # One day of quotes, as bars (aggregated page by page, as the quotes are
+        # received) or, if `raw`, as quotes (see `iter_quotes()`); returns (df, complete),
+        # where `complete` is False if any page of the day's quotes was not received:
+        if raw:
+            pages = self.iter_quotes(ticker, str_date, show_request=show_request)
+        else:
+            pages = self.iter_quote_bars(ticker, str_date, show_request=show_request, bar_width=bar_width)
+        frames = []
+        while True:
+            try:
+                frames.append(next(pages))
+            except StopIteration as stop:
+                complete = stop.value
+                break
+        return (pd.concat(frames) if len(frames) > 0 else self._empty_quotes(raw)), complete
+
+    def _quotes_cache_file(self, ticker, str_date, bars=None):
+        # Quotes are cached per ticker per day (as quotes, or as `bars` such as "1s"),
+        # beside the OHLCV cache:
+        kind = "quotes" if bars is None else "quotes." + bars
+        return cache_subdir("quotes_cache") / (ticker + "." + kind + "." + str_date + "." + self.cache_format)
+
+    def _quotes_day_final(self, str_date):
+        # Quotes are requested through the end of the regular session (see `_quotes_request()`)
+        # so, after that, a day's quotes will not change, and may be cached:
+        session_end = pd.Timestamp(str_date + " " + self._REGULAR_SESSION[1], tz=self._EXCHANGE_TZ)
+        return pd.Timestamp.now(tz=self._EXCHANGE_TZ) > session_end
+
+    def _cached_quotes_day(self, ticker, str_date, raw, cache, bar_width="1s"):
+        # (a day whose quotes were not all received is returned as received, but never cached)
+        if not cache or not self._quotes_day_final(str_date):
+            return self._quotes_day(ticker, str_date, raw, bar_width=bar_width)[0]
+        qcf = self._quotes_cache_file(ticker, str_date)
+        bcf = self._quotes_cache_file(ticker, str_date, bar_width)
+        cf = qcf if raw else bcf
+        with cache_key_lock(cf):
+            if cf.exists():
+                return self._cache_read_df(cf)
+            if not raw and qcf.exists():  # (the quotes are cached, but not yet the bars)
+                df = self._quotes_to_bars(self._cache_read_df(qcf), bar_width)
+            else:
+                df, complete = self._quotes_day(ticker, str_date, raw, bar_width=bar_width)
+                if not complete:
+                    warnings.warn(f"quotes of {ticker} on {str_date} were not all received (not cached)")
+                    return df
+            self._cache_write_df(cf, df)
+        if raw and not bcf.exists():  # (the bars are cheap to make from the quotes at hand)
+            with cache_key_lock(bcf):
+                self._cache_write_df(bcf, self._quotes_to_bars(df, bar_width))
+        return df
+
+    def fetch_quotes_range(self, ticker, start, end, raw=False, cache=None, max_workers=None, bar_width="1s"):
+        """
+        Fetch the quotes of `ticker` for each trading day (weekday) from `start` through
+        `end`, several days at once (each day in a worker thread; requests are still subject
+        to the `requests_per_minute` rate limit).
+
+        Parameters
+        ----------
+        start, end: first and last days (as for `fetch_ohlcvdf()`)
+
+        raw (bool): If False (default) return bars (as `fetch_quotes()` does).
+                    If True return the quotes themselves (as `iter_quotes()` yields them).
+
+        cache (bool): If True, each day's quotes (and bars) are cached, per ticker
+                      per day, in `~/.pdpolygonapi/quotes_cache/` (in `cache_format`), once
+                      that day's regular session is over, and are read from there thereafter.
+                      Default is the `cache` given when this instance was created.
+
+        max_workers (int): Maximum number of days requested concurrently.
+                           Default is `pool_size` (one pooled connection per worker).
+
+        bar_width (str): width of the bars (as for `fetch_quotes()`); default "1s".
+
+        Returns
+        -------
+        DataFrame of the quotes, or bars, of all of the days.
+        """
+        if cache is None:
+            cache = self.cache_initializer
+        if max_workers is None:
+            max_workers = self.pool_size
+        days = pd.bdate_range(self._input_to_datetime(start).date(), self._input_to_datetime(end).date())
+        dates = [day.strftime("%Y-%m-%d") for day in days]
+        self.logger.info("Requesting quote data for %s, %d days", ticker, len(dates))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(
+                executor.map(lambda date: self._cached_quotes_day(ticker, date, raw, cache, bar_width), dates)
+            )
+
+        frames = [df for df in frames if len(df) > 0]  # (days with no quotes, such as holidays)
+        return pd.concat(frames) if len(frames) > 0 else self._empty_quotes(raw)
+
+    async def fetch_quotes_async(self, ticker, str_date, show_request=False, bar_width="1s"):
+        """
+        Coroutine version of `fetch_quotes()`: same arguments, same return value.
+        Progress is logged rather than printed.
+        """
+        req, ts1, ts2 = self._quotes_request(ticker, str_date)
+
+        self.logger.info("Requesting quote data for %s on %s", ticker, str_date)
+
+        if show_request:
+            print("req=\n", req[: req.find("&apiKey=")] + "&apiKey=***")
+
+        rd = await self._req_get_json_async(req)
+
+        if not self._quotes_response_ok(rd):
+            return self._empty_quotes()
+
+        frames, carry = [], None
+        while True:
+            if "results" in rd:
+                bars, carry = self._quote_bars_step(carry, self._quotes_page_to_df(rd), bar_width)
+                if bars is not None and len(bars) > 0:
+                    frames.append(bars)
+            if rd["status"] != "OK" or "next_url" not in rd:
+                break
+            req = rd["next_url"] + "&apikey=" + self.APIKEY
+            rd = await self._req_get_json_async(req)
+
+        if rd["status"] != "OK":
+            self.logger.warning("status=%s", rd["status"])
+
+        if carry is not None and len(carry) > 0:
+            frames.append(self._quotes_to_bars(carry, bar_width))
+        return pd.concat(frames) if len(frames) > 0 else self._empty_quotes()
 
 ##########################################################################################
 #
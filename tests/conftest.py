@@ -1,6 +1,9 @@
 import logging
+import time
+
 import pytest
 from pdpolygonapi import PolygonApi
+from polygon_stand_in import PolygonStandIn
 
 logger = logging.getLogger("test_pdpgapi")
 logger.setLevel(logging.DEBUG)
@@ -41,3 +44,38 @@ def pdpgapi():
         logger.error(f"Polygon API key is not set in the environment variable [{api_env_key}]")
     assert isinstance(api.APIKEY, str) and len(api.APIKEY) > 10
     return api
+
+
+@pytest.fixture(scope="session")
+def stand_in():
+    server = PolygonStandIn().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def stand_in_api(stand_in, tmp_path, monkeypatch):
+    # PolygonApi instance that talks to the local polygon.io stand-in (no apikey or network needed).
+    # HOME is redirected so that stand-in data never lands in the real ohlcv cache:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(PolygonApi, "cached_files", dict())
+    api = PolygonApi(apikey="STAND_IN_APIKEY", wait=True, cache=False)
+    api.base_url = stand_in.url
+    stand_in.latency = 0.0
+    stand_in.reset_counters()
+    yield api
+    api.close()
+
+
+@pytest.fixture
+def host_tz():
+    # Sets the host's local time zone (in which naive datetimes are requested) for the
+    # duration of a test, for example host_tz("UTC"):
+    with pytest.MonkeyPatch.context() as mp:
+
+        def set_tz(tz):
+            mp.setenv("TZ", tz)
+            time.tzset()
+
+        yield set_tz
+    time.tzset()
@@ -0,0 +1,313 @@
+"""
+A local stand-in for the polygon.io REST api, used to test (and benchmark)
+pdpolygonapi without network access and without an api key.
+
+The stand-in generates deterministic synthetic data, and pages its responses
+(via `next_url`) the same way that polygon.io does.
+"""
+
+import functools
+import gzip
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+EXCHANGE_TZ = "US/Eastern"
+
+EXCEEDED = (
+    "You've exceeded the maximum requests per minute, please wait or upgrade your"
+    " subscription to continue. https://polygon.io/pricing"
+)
+
+_INTRADAY_SECONDS = dict(second=1, minute=60, hour=3600)
+
+# Extended hours session for intraday aggregates (second aggregates
+# are restricted to the regular session to keep the data volume sane):
+_SESSION = dict(
+    second=(pd.Timedelta(hours=9, minutes=30), pd.Timedelta(hours=16)),
+    minute=(pd.Timedelta(hours=4), pd.Timedelta(hours=20)),
+    hour=(pd.Timedelta(hours=4), pd.Timedelta(hours=20)),
+)
+
+
+def _to_timestamp(value):
+    if value.isdigit():
+        return pd.Timestamp(int(value), unit="ms", tz="UTC")
+    return pd.Timestamp(value, tz=EXCHANGE_TZ).tz_convert("UTC")
+
+
+def aggregate_times(span, multiplier, t0, t1):
+    """
+    Return the (int64 millisecond) open times of all aggregates that overlap [t0, t1],
+    and that have already opened (there are no aggregates in the future).
+    """
+    # (include whole aggregates that overlap either end of the range)
+    margin = pd.Timedelta(days=0 if span in _INTRADAY_SECONDS else 400 if span == "year" else 100)
+    days = pd.date_range(
+        (t0.tz_convert(EXCHANGE_TZ) - margin).date(),
+        (t1.tz_convert(EXCHANGE_TZ) + margin).date(),
+        freq="D",
+        tz=EXCHANGE_TZ,
+    )
+    if span in _INTRADAY_SECONDS:
+        period = pd.Timedelta(seconds=_INTRADAY_SECONDS[span] * multiplier)
+        days = days[days.dayofweek < 5]
+        open_, close = _SESSION[span]
+        offsets = pd.timedelta_range(open_, close - pd.Timedelta(seconds=1), freq=period)
+        starts = (days.values[:, None] + offsets.values[None, :]).ravel()
+        starts = pd.DatetimeIndex(starts, tz="UTC")
+        ends = starts + period
+    else:
+        weekdays = days[days.dayofweek < 5]
+        if span == "day":
+            starts = weekdays
+            ends = starts + pd.Timedelta(days=1)
+        else:
+            period = dict(week="W-SAT", month="M", quarter="Q", year="Y")[span]
+            periods = weekdays.tz_localize(None).to_period(period).unique()
+            starts = periods.start_time.tz_localize(EXCHANGE_TZ)
+            ends = (periods + 1).start_time.tz_localize(EXCHANGE_TZ)
+        starts = starts.tz_convert("UTC")
+        ends = ends.tz_convert("UTC")
+    keep = (ends > t0) & (starts <= min(t1, pd.Timestamp.now(tz="UTC")))
+    return starts[keep].as_unit("ms").asi8
+
+
+def aggregate_results(times):
+    """
+    Deterministic synthetic OHLCV values for the given (ms) open times.
+    """
+    seconds = times // 1000
+    base = 100.0 + 10.0 * np.sin(seconds / (86400.0 * 30.0)) + (seconds % 7) * 0.01
+    base = np.round(base, 4)
+    return [
+        dict(v=float(1000 + s % 1000), vw=b, o=b, c=round(b + 0.1, 4), h=round(b + 0.5, 4),
+             l=round(b - 0.5, 4), t=int(t), n=int(10 + s % 10))
+        for t, s, b in zip(times.tolist(), seconds.tolist(), base.tolist())
+    ]
+
+
+@functools.lru_cache
+def contracts(underlying, extra_expirations=()):
+    """
+    Synthetic options contracts: Friday expirations 2023 thru 2027 (and any `extra_expirations`),
+    ten strikes, calls and puts.  (Made once per underlying: the rows are only ever read.)
+    """
+    expirations = pd.date_range("2023-01-06", "2027-12-31", freq="W-FRI")
+    expirations = expirations.union(pd.DatetimeIndex(extra_expirations))
+    strikes = np.arange(90.0, 110.0, 2.0)
+    rows = []
+    for xp in expirations:
+        for strike in strikes:
+            for ctype in ("call", "put"):
+                rows.append(
+                    dict(
+                        cfi="OCASPS" if ctype == "call" else "OPASPS",
+                        contract_type=ctype,
+                        exercise_style="american",
+                        expiration_date=xp.strftime("%Y-%m-%d"),
+                        primary_exchange="BATO",
+                        shares_per_contract=100,
+                        strike_price=float(strike),
+                        ticker="O:%s%s%s%08d"
+                        % (underlying, xp.strftime("%y%m%d"), ctype[0].upper(), int(strike * 1000)),
+                        underlying_ticker=underlying,
+                    )
+                )
+    return rows
+
+
+def quote_results(t0, t1, quotes_per_second):
+    """
+    Synthetic quotes (nanosecond `sip_timestamp`) within [t0, t1], on weekdays only.
+    """
+    step = 1_000_000_000 // quotes_per_second
+    times = np.arange(t0, t1 + 1, step, dtype=np.int64)
+    times = times[pd.DatetimeIndex(times, tz="UTC").tz_convert(EXCHANGE_TZ).dayofweek < 5]
+    jitter = (times // step) % 997
+    times = times + jitter * 1000
+    seconds = times // 1_000_000_000
+    mid = np.round(100.0 + 10.0 * np.sin(seconds / (86400.0 * 30.0)) + (jitter % 5) * 0.01, 2)
+    return [
+        dict(ask_exchange=11, ask_price=round(m + 0.01, 2), ask_size=int(1 + j % 9), bid_exchange=12,
+             bid_price=round(m - 0.01, 2), bid_size=int(1 + j % 7), participant_timestamp=int(t - 7),
+             sequence_number=int(j), sip_timestamp=int(t), tape=1)
+        for t, j, m in zip(times.tolist(), jitter.tolist(), mid.tolist())
+    ]
+
+
+class PolygonStandIn:
+    """
+    Threaded local http server emulating the polygon.io endpoints used by pdpolygonapi.
+
+    Attributes:
+        url:          base url to use in place of "https://api.polygon.io"
+        latency:      seconds of artificial latency added to each response.
+        max_requests: if set, reject requests beyond `max_requests` per `rate_window` seconds.
+        requests:     number of requests served.
+        paths:        the path (and query) of each request served, in order.
+        rejected:     number of requests rejected for exceeding `max_requests`.
+        connections:  number of distinct (keep-alive) connections accepted.
+        expired_through: if set ("YYYY-MM-DD"), options contracts expiring on or before this date
+                      are reported as expired (as polygon.io may, on the expiration date, report
+                      the contracts expiring that day); by default, those expiring before today.
+        extra_expirations: options expiration dates ("YYYY-MM-DD") in addition to the Fridays.
+    """
+
+    def __init__(self, latency=0.0, quotes_per_second=2):
+        self.latency = latency
+        self.quotes_per_second = quotes_per_second
+        # emulate polygon.io's maximum requests per minute (per `rate_window` seconds):
+        self.max_requests = None
+        self.rate_window = 60.0
+        self.rejected = 0
+        self._recent = []
+        self.requests = 0
+        self.paths = []
+        self.connections = 0
+        self.expired_through = None
+        self.extra_expirations = ()
+        self._counter_lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stand_in._counter_lock:
+                    stand_in.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stand_in._counter_lock:
+                    stand_in.requests += 1
+                    stand_in.paths.append(self.path)
+                    exceeded = stand_in._exceeded()
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                url = urllib.parse.urlsplit(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                if exceeded:
+                    status, payload = 429, dict(status="ERROR", request_id="stand-in", error=EXCEEDED)
+                else:
+                    status, payload = stand_in.route(url.path, query)
+                self.send_response(status)
+                if isinstance(payload, str):
+                    body = payload.encode()
+                    self.send_header("Content-Type", "text/plain")
+                else:
+                    body = json.dumps(payload).encode()
+                    self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = "http://127.0.0.1:%d" % self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.requests = 0
+            self.paths = []
+            self.connections = 0
+            self.rejected = 0
+            self.max_requests = None
+            self.rate_window = 60.0
+            self._recent = []
+            self.expired_through = None
+            self.extra_expirations = ()
+
+    def _exceeded(self):
+        if self.max_requests is None:
+            return False
+        now = time.monotonic()
+        self._recent = [t for t in self._recent if t > now - self.rate_window]
+        if len(self._recent) >= self.max_requests:
+            self.rejected += 1
+            return True
+        self._recent.append(now)
+        return False
+
+    def route(self, path, query):
+        parts = path.strip("/").split("/")
+        if path == "/v1/marketstatus/now":
+            return 200, dict(market="open", serverTime=pd.Timestamp.now(tz=EXCHANGE_TZ).isoformat())
+        if parts[:3] == ["v2", "aggs", "ticker"] and len(parts) == 9:
+            if parts[3].startswith("BAD"):  # emulate a server failure for this ticker
+                return 500, "Internal Server Error"
+            return 200, self.aggregates(*parts[3:], query)
+        if path == "/v3/reference/options/contracts":
+            return 200, self.contracts(query)
+        if parts[:2] == ["v3", "quotes"] and len(parts) == 3:
+            return 200, self.quotes(parts[2], query)
+        return 404, dict(status="NOT_FOUND", message="stand-in does not serve " + path)
+
+    def _page(self, path, rows, query, limit):
+        offset = int(query.get("cursor", 0))
+        payload = dict(status="OK", request_id="stand-in")
+        if offset < len(rows):
+            payload["results"] = rows[offset : offset + limit]
+        if offset + limit < len(rows):
+            query = {k: v for k, v in query.items() if k.lower() != "apikey"}
+            query["cursor"] = offset + limit
+            payload["next_url"] = self.url + path + "?" + urllib.parse.urlencode(query)
+        return payload
+
+    def contracts(self, query):
+        limit = min(int(query.get("limit", 10)), 1000)
+        today = pd.Timestamp.today().strftime("%Y-%m-%d")
+        if self.expired_through is not None:
+            today = (pd.Timestamp(self.expired_through) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        expired = query.get("expired", "false") == "true"
+        gte = query.get("expiration_date.gte", "0000-00-00")
+        lte = query.get("expiration_date.lte", "9999-99-99")
+        rows = [
+            row
+            for row in contracts(query["underlying_ticker"], tuple(self.extra_expirations))
+            if (row["expiration_date"] < today) == expired and gte <= row["expiration_date"] <= lte
+        ]
+        return self._page("/v3/reference/options/contracts", rows, query, limit)
+
+    def quotes(self, ticker, query):
+        limit = min(int(query.get("limit", 1000)), 50000)
+        t0 = int(query["timestamp.gte"])
+        t1 = int(query["timestamp.lte"])
+        rows = quote_results(t0, t1, self.quotes_per_second)
+        return self._page("/v3/quotes/" + ticker, rows, query, limit)
+
+    def aggregates(self, ticker, _range, multiplier, span, t0, t1, query):
+        limit = min(int(query.get("limit", 5000)), 50000)
+        times = aggregate_times(span, int(multiplier), _to_timestamp(t0), _to_timestamp(t1))
+        payload = dict(ticker=ticker, adjusted=True, status="OK", request_id="stand-in")
+        payload["queryCount"] = payload["resultsCount"] = min(len(times), limit)
+        if len(times) > 0:
+            payload["results"] = aggregate_results(times[:limit])
+        if len(times) > limit:
+            payload["next_url"] = (
+                self.url
+                + "/v2/aggs/ticker/%s/range/%s/%s/%d/%s?adjusted=true&sort=asc&limit=%d"
+                % (ticker, multiplier, span, times[limit], t1, limit)
+            )
+        return payload
@@ -0,0 +1,103 @@
+"""
+Test the coroutine (`*_async()`) versions of the PolygonApi fetch methods.
+"""
+
+import asyncio
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+logger = logging.getLogger("test_pdpgapi")
+
+ticker_param_data = [
+    # ["ticker", "start", "end", "span", "span_multiplier"],
+    ("SPY", "2024-10-01", "2025-03-01", "day", 1),
+    ("SPY", "2024-10-01", "2025-03-01", "week", 1),
+    ("SPY", "2025-01-01", "2025-03-01", "hour", 1),
+    ("SPY", "2025-01-01", "2025-03-01", "minute", 30),
+]
+
+
+@pytest.mark.parametrize("ticker, start, end, span, span_multiplier", ticker_param_data)
+def test_fetch_ohlcvdf_async(stand_in_api, ticker, start, end, span, span_multiplier):
+    kwargs = dict(start=start, end=end, span=span, span_multiplier=span_multiplier)
+    df_sync = stand_in_api.fetch_ohlcvdf(ticker, **kwargs)
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_ohlcvdf_async(ticker, **kwargs)
+
+    df_async = asyncio.run(main())
+    assert len(df_async) > 0
+    pd.testing.assert_frame_equal(df_sync, df_async)
+
+
+def test_fetch_ohlcvdf_async_cache(stand_in_api):
+    kwargs = dict(start="2023-05-01", end="2025-05-01", span="day")
+    df_noc = stand_in_api.fetch_ohlcvdf("SPY", cache=False, **kwargs)
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_ohlcvdf_async("SPY", cache=True, **kwargs)
+
+    df_yec = asyncio.run(main())
+    assert sorted(f.name for f in stand_in_api._cache_dir().iterdir()) == [
+        "SPY.day.1.2023.csv.gz",
+        "SPY.day.1.2024.csv.gz",
+        "SPY.day.1.2025.csv.gz",
+    ]
+    # sync and async share the same cache files:
+    df_sync = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    pd.testing.assert_frame_equal(df_noc, df_yec)
+    pd.testing.assert_frame_equal(df_sync, df_yec)
+
+
+def test_fetch_ohlcvdf_async_concurrency(stand_in_api, stand_in):
+    tickers = ["T%03d" % n for n in range(100)]
+    latency = 0.05
+    stand_in.latency = latency
+
+    async def main():
+        async with stand_in_api:
+            return await asyncio.gather(
+                *[stand_in_api.fetch_ohlcvdf_async(t, start="2025-01-02", end="2025-01-31") for t in tickers]
+            )
+
+    t0 = time.perf_counter()
+    dfs = asyncio.run(main())
+    elapsed = time.perf_counter() - t0
+    logger.info(f"{len(tickers)} tickers in {elapsed:.3f}s (serial would be >= {len(tickers) * latency:.1f}s)")
+
+    assert [df.index.name for df in dfs] == tickers
+    assert stand_in.requests == len(tickers)
+    assert stand_in.connections <= stand_in_api.pool_size
+    assert elapsed < 0.5 * len(tickers) * latency
+
+
+def test_fetch_options_chain_async(stand_in_api):
+    oc_sync = stand_in_api.fetch_options_chain("SPY", start_expiration="2026-01-01", end_expiration="2027-06-30")
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_options_chain_async(
+                "SPY", start_expiration="2026-01-01", end_expiration="2027-06-30"
+            )
+
+    oc_async = asyncio.run(main())
+    assert len(oc_async.tickers) > 1000  # more than one page
+    pd.testing.assert_series_equal(oc_sync.tickers, oc_async.tickers)
+    pd.testing.assert_series_equal(oc_sync.expirations, oc_async.expirations)
+
+
+def test_fetch_quotes_async(stand_in_api):
+    qdf_sync = stand_in_api.fetch_quotes("SPY", "2025-01-02")
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_quotes_async("SPY", "2025-01-02")
+
+    qdf_async = asyncio.run(main())
+    assert len(qdf_async) == 6.5 * 3600 + 1  # 09:30:00 thru 16:00:00 inclusive
+    pd.testing.assert_frame_equal(qdf_sync, qdf_async)
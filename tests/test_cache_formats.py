@@ -0,0 +1,169 @@
+"""
+Test (and benchmark) the OHLCV cache file formats: "csv.gz", "parquet" and "arrow".
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+# same spans as tests/test_ohlcv_cache.py:
+ticker_param_data = [
+    # ["ticker", "start", "end", "span", "span_multiplier"],
+    ("SPY", "2023-05-01", "2025-05-01", "day", 1),
+    ("SPY", "2023-05-01", "2025-05-01", "week", 1),
+    ("SPY", "2023-05-01", "2025-05-01", "month", 1),
+    ("SPY", "2023-05-01", "2025-05-01", "quarter", 1),
+    ("SPY", "2025-01-01", "2025-05-01", "minute", 5),
+    ("SPY", "2025-01-01", "2025-05-01", "minute", 15),
+    ("SPY", "2025-01-01", "2025-05-01", "minute", 30),
+    ("SPY", "2025-01-01", "2025-05-01", "hour", 1),
+    ("SPY", "2025-01-01", "2025-05-01", "hour", 2),
+]
+
+LOOP = 20
+
+
+def _api(stand_in, cache_format):
+    api = PolygonApi(apikey="STAND_IN_APIKEY", cache_format=cache_format)
+    api.base_url = stand_in.url
+    return api
+
+
+@pytest.mark.parametrize("ticker, start, end, span, span_multiplier", ticker_param_data)
+def test_cache_format_benchmark(stand_in_api, stand_in, ticker, start, end, span, span_multiplier):
+    kwargs = dict(start=start, end=end, span=span, span_multiplier=span_multiplier)
+    df_noc = stand_in_api.fetch_ohlcvdf(ticker, cache=False, **kwargs)
+
+    results = {}
+    for cache_format in ("csv.gz", "parquet", "arrow"):
+        api = _api(stand_in, cache_format)
+        df = api.fetch_ohlcvdf(ticker, cache=True, **kwargs)  # populate the cache
+        years, cache_files = api._ohlcv_cache_files(ticker, span, span_multiplier, start, end)
+        size = sum(cf.stat().st_size for cf in cache_files)
+        t0 = time.perf_counter()
+        for _ in range(LOOP):
+            df = api.fetch_ohlcvdf(ticker, cache=True, **kwargs)
+        elapsed = (time.perf_counter() - t0) / LOOP
+        t0 = time.perf_counter()
+        for _ in range(LOOP):
+            for cf in cache_files:
+                api._cache_read_df(cf)
+        read_time = (time.perf_counter() - t0) / LOOP
+        results[cache_format] = (elapsed, read_time, size, df)
+        api.close()
+
+    (csv_time, csv_read, csv_size, csv_df) = results["csv.gz"]
+    (pq_time, pq_read, pq_size, pq_df) = results["parquet"]
+    (ar_time, ar_read, ar_size, ar_df) = results["arrow"]
+    logger.info(
+        f"{span:>7s} x{span_multiplier:<2d} {len(pq_df):6d} rows:  "
+        f"csv.gz {1000 * csv_time:6.2f}ms (read {1000 * csv_read:6.2f}ms) {csv_size:8d} bytes,  "
+        f"parquet {1000 * pq_time:6.2f}ms (read {1000 * pq_read:6.2f}ms) {pq_size:8d} bytes,  "
+        f"arrow {1000 * ar_time:6.2f}ms (read {1000 * ar_read:6.2f}ms) {ar_size:8d} bytes  "
+        f"(read speedup {csv_read / pq_read:.1f}x, {csv_read / ar_read:.1f}x)"
+    )
+    pd.testing.assert_frame_equal(df_noc, pq_df)
+    pd.testing.assert_frame_equal(csv_df, pq_df)
+    pd.testing.assert_frame_equal(csv_df, ar_df)
+    # (the read times are logged above, rather than asserted: they depend on the load on the host)
+
+
+def test_arrow_cache_is_memory_mapped(stand_in_api, stand_in, host_tz):
+    kwargs = dict(start="2025-01-01", end="2025-12-31", span="minute", market="all", cache=True)
+    api = _api(stand_in, "arrow")
+    host_tz("America/New_York")  # (so that the uncached request is of the exchange's year)
+    df_noc = api.fetch_ohlcvdf("SPY", **{**kwargs, "cache": False})
+    host_tz("UTC")
+    api.fetch_ohlcvdf("SPY", **kwargs)  # populate the cache
+    cf = api._cache_file("SPY", "minute", 1, 2025)
+
+    # A cold read allocates no memory for the columns or the index:
+    api.frame_cache.clear()
+    PolygonApi.cached_files = {}
+    allocated = pyarrow.total_allocated_bytes()
+    t0 = time.perf_counter()
+    df = api.fetch_ohlcvdf("SPY", **kwargs)
+    elapsed = time.perf_counter() - t0
+    assert pyarrow.total_allocated_bytes() - allocated < 4096
+    logger.info(f"cold memory mapped read of {len(df)} rows ({cf.stat().st_size} bytes): {1000 * elapsed:.2f}ms")
+    assert not df["Close"].to_numpy().flags.writeable
+    assert not df.index.to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(df_noc, df)
+    assert np.shares_memory(df["Close"].to_numpy(), api.fetch_ohlcvdf("SPY", **kwargs)["Close"].to_numpy())
+
+    # The (default) regular market session is selected from the same mapped frame,
+    # but its rows are copied (they are not contiguous in the cache file):
+    regular = {**kwargs, "market": "regular"}
+    stand_in.reset_counters()
+    df_regular = api.fetch_ohlcvdf("SPY", **regular)
+    assert stand_in.requests == 0
+    assert 0 < len(df_regular) < len(df)
+    assert not np.shares_memory(df_regular["Close"].to_numpy(), df["Close"].to_numpy())
+    host_tz("America/New_York")
+    pd.testing.assert_frame_equal(api.fetch_ohlcvdf("SPY", **{**regular, "cache": False}), df_regular)
+    host_tz("UTC")
+
+    # Modifying the returned frame copies (rather than writes to) the mapped column:
+    cache_df = api._cache_read_df(cf).copy()
+    df.iloc[0, 0] = -1.0
+    df["Volume"] = 0.0
+    pd.testing.assert_frame_equal(df_noc, api.fetch_ohlcvdf("SPY", **kwargs))
+    pd.testing.assert_frame_equal(cache_df, api._cache_read_df(cf))
+    api.close()
+
+
+def test_migrate_ohlcv_cache(stand_in_api, stand_in):
+    kwargs = dict(start="2024-01-01", end="2025-05-01", span="minute", span_multiplier=30)
+    df_csv = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    stand_in_api.fetch_ohlcvdf("QQQ", cache=True, span="day")
+    csv_names = sorted(f.name for f in stand_in_api._cache_dir().iterdir())
+    assert all(name.endswith(".csv.gz") for name in csv_names)
+
+    api = _api(stand_in, "parquet")
+    migrated = api.migrate_ohlcv_cache()
+    assert sorted(migrated) == [name.replace(".csv.gz", ".parquet") for name in csv_names]
+    assert sorted(f.name for f in api._cache_dir().iterdir()) == sorted(migrated)
+
+    stand_in.reset_counters()
+    df_pq = api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    assert stand_in.requests == 0  # served entirely from the migrated cache
+    pd.testing.assert_frame_equal(df_csv, df_pq)
+    assert df_pq.dtypes.eq("float64").all()
+
+    api.close()
+
+    api = _api(stand_in, "arrow")
+    migrated = api.migrate_ohlcv_cache()
+    assert sorted(migrated) == [name.replace(".csv.gz", ".arrow") for name in csv_names]
+    pd.testing.assert_frame_equal(df_csv, api.fetch_ohlcvdf("SPY", cache=True, **kwargs))
+    assert stand_in.requests == 0
+    api.close()
+
+    with pytest.raises(ValueError):
+        PolygonApi(apikey="STAND_IN_APIKEY", cache_format="xlsx")
+
+
+def test_migrate_removes_regular_session_cache(stand_in_api, capsys):
+    # Intraday cache files of older versions (regular session only, named without ".all")
+    # are never read, so are removed rather than migrated (in any format); day files stay:
+    stand_in_api.fetch_ohlcvdf("SPY", cache=True, start="2025-01-02", end="2025-01-31", span="hour")
+    stand_in_api.fetch_ohlcvdf("SPY", cache=True, start="2025-01-02", end="2025-01-31", span="day")
+    cache_dir = stand_in_api._cache_dir()
+    new_cf = cache_dir / "SPY.hour.1.all.2025.csv.gz"
+    old_cfs = [cache_dir / "SPY.hour.1.2025.csv.gz", cache_dir / "SPY.minute.5.2025-01.parquet"]
+    for old_cf in old_cfs:
+        old_cf.write_bytes(new_cf.read_bytes())
+
+    migrated = stand_in_api.migrate_ohlcv_cache("parquet")
+    assert sorted(migrated) == ["SPY.day.1.2025.parquet", "SPY.hour.1.all.2025.parquet"]
+    assert sorted(f.name for f in cache_dir.iterdir()) == sorted(migrated)
+    printed = capsys.readouterr().out
+    assert all(f"==> rm {old_cf}" in printed for old_cf in old_cfs)
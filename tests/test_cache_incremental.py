@@ -0,0 +1,60 @@
+"""
+Test that an out of date current-year cache file is brought up to date by requesting
+only the missing (trailing) data, rather than by deleting and re-requesting the whole year.
+"""
+
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+_YEAR = datetime.date.today().year
+
+
+@pytest.mark.parametrize("span, span_multiplier", [("day", 1), ("minute", 30)])
+def test_cache_incremental_append(stand_in_api, stand_in, span, span_multiplier):
+    kwargs = dict(start=f"{_YEAR}-01-01", end=0, span=span, span_multiplier=span_multiplier)
+    df_noc = stand_in_api.fetch_ohlcvdf("SPY", cache=False, **kwargs)
+    stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+
+    # Emulate a cache file written some weeks ago:
+    cf = stand_in_api._cache_file("SPY", span, span_multiplier, _YEAR)
+    cache_df = stand_in_api._cache_read_df(cf)
+    cutoff = df_noc.index[-1].normalize() - pd.Timedelta(days=30)
+    stale_df = cache_df[cache_df.index < cutoff]
+    stand_in_api._cache_write_df(cf, stale_df)
+    mtime = (cutoff - pd.Timedelta(days=1)).timestamp()
+    os.utime(cf, (mtime, mtime))
+    PolygonApi.cached_files = {}
+    stand_in.reset_counters()
+
+    df_yec = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+
+    # one request, starting from (midnight, exchange time, of) the last cached trade date
+    # (which is requested again):
+    assert stand_in.requests == 1
+    t0 = stand_in.paths[0].split("?")[0].split("/")[-2]
+    last_cached = stale_df.index[-1].tz_localize("US/Eastern").to_pydatetime()
+    assert t0 == stand_in_api._input_to_mstimestamp(last_cached, 0)
+
+    pd.testing.assert_frame_equal(df_noc, df_yec)
+    assert len(stand_in_api._cache_read_df(cf)) == len(cache_df)
+    assert os.stat(cf).st_mtime > mtime
+
+
+def test_cache_incremental_request_failure(stand_in_api, stand_in):
+    kwargs = dict(start=f"{_YEAR}-01-01", end=0, span="day")
+    stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    cf = stand_in_api._cache_file("SPY", "day", 1, _YEAR)
+    mtime = pd.Timestamp(f"{_YEAR}-01-02").timestamp()
+    os.utime(cf, (mtime, mtime))
+    PolygonApi.cached_files = {}
+
+    # If the incremental request fails, the cache file is left as it was:
+    stand_in_api.base_url = stand_in.url + "/unavailable"
+    with pytest.warns(UserWarning):
+        stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    assert os.stat(cf).st_mtime == mtime
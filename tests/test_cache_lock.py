@@ -0,0 +1,109 @@
+"""
+Test atomic cache file writes, and per cache file locking.
+"""
+
+import multiprocessing
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from pdpolygonapi._cache_lock import atomic_write, cache_key_lock
+
+
+def test_atomic_write_failure(tmp_path):
+    cf = tmp_path / "SPY.day.1.2025.csv.gz"
+    cf.write_text("original")
+
+    def _fail(path):
+        path.write_text("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(cf, _fail)
+    assert cf.read_text() == "original"
+    assert [f.name for f in tmp_path.iterdir()] == [cf.name]
+
+
+def test_readers_never_see_partial_files(stand_in_api):
+    cf = stand_in_api._cache_file("SPY", "minute", 1, 2025)
+    ix = pd.date_range("2025-01-02", periods=20000, freq="min")
+    frames = [pd.DataFrame(dict(Open=float(n), Close=2.0), index=ix) for n in range(2)]
+    stand_in_api._cache_write_df(cf, frames[0])
+
+    def _writer():
+        for n in range(10):
+            stand_in_api._cache_write_df(cf, frames[n % 2])
+
+    writer = threading.Thread(target=_writer)
+    writer.start()
+    reads = 0
+    while writer.is_alive() or reads == 0:
+        df = stand_in_api._cache_read_df(cf)
+        assert len(df) == len(ix) and df.Open.iloc[-1] in (0.0, 1.0)
+        reads += 1
+    writer.join()
+    assert not any(f.name.startswith(".tmp.") for f in cf.parent.iterdir())
+
+
+def test_cache_key_lock_is_per_file(stand_in_api, stand_in):
+    kwargs = dict(start="2025-01-02", end="2025-03-01", span="day", cache=True)
+    spy = stand_in_api._cache_file("SPY", "day", 1, 2025)
+    fetched = threading.Event()
+
+    def _fetch_spy():
+        stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+        fetched.set()
+
+    with cache_key_lock(spy):
+        thread = threading.Thread(target=_fetch_spy)
+        thread.start()
+        # TSLA is not blocked by the lock on SPY's cache file:
+        assert len(stand_in_api.fetch_ohlcvdf("TSLA", **kwargs)) > 0
+        # but SPY waits for it:
+        assert not fetched.wait(0.5)
+    thread.join()
+    assert fetched.is_set()
+
+
+def test_cache_key_lock_single_request_threads(stand_in_api, stand_in):
+    # Many threads wanting the same (missing) cache file request its data only once:
+    stand_in.latency = 0.1
+    kwargs = dict(start="2025-01-02", end="2025-03-01", span="day", cache=True)
+    threads = [
+        threading.Thread(target=stand_in_api.fetch_ohlcvdf, args=("SPY",), kwargs=kwargs) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stand_in.requests == 1
+
+
+def _fetch_cached(url, home, queue):
+    os.environ["HOME"] = home
+    PolygonApi.cached_files = {}
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    api.base_url = url
+    df = api.fetch_ohlcvdf("SPY", start="2025-01-02", end="2025-03-01", span="day", cache=True)
+    queue.put(len(df))
+
+
+def test_cache_key_lock_single_request_processes(stand_in, tmp_path):
+    stand_in.reset_counters()
+    stand_in.latency = 0.1
+    queue = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_fetch_cached, args=(stand_in.url, str(tmp_path), queue))
+        for _ in range(4)
+    ]
+    for proc in procs:
+        proc.start()
+    lengths = [queue.get(timeout=60) for _ in procs]
+    for proc in procs:
+        proc.join()
+    stand_in.latency = 0.0
+    assert len(set(lengths)) == 1 and lengths[0] > 0
+    assert stand_in.requests == 1
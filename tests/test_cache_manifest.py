@@ -0,0 +1,154 @@
+"""
+Test the cache manifest: the sqlite index of the OHLCV cache files that is used
+for cache lookups, freshness and coverage checks, and clears.
+"""
+
+import concurrent.futures
+import os
+import pathlib
+import warnings
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from pdpolygonapi._cache_manifest import CacheManifest
+
+_KWARGS = dict(start="2024-03-01", end="2025-06-30", span="day", cache=True)
+
+
+def test_manifest_records_partitions(stand_in_api):
+    df = stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    manifest = stand_in_api._cache_manifest()
+    assert manifest.files() == ["SPY.day.1.2024.csv.gz", "SPY.day.1.2025.csv.gz"]
+    for year in (2024, 2025):
+        cf = stand_in_api._cache_file("SPY", "day", 1, year)
+        entry = manifest.lookup(cf)
+        cache_df = stand_in_api._cache_read_df(cf)
+        assert (entry.ticker, entry.span, entry.span_multiplier, entry.partition) == ("SPY", "day", 1, str(year))
+        assert entry.rows == len(cache_df)
+        assert pd.Timestamp(entry.first_ts) == cache_df.index[0]
+        assert pd.Timestamp(entry.last_ts) == cache_df.index[-1]
+        assert entry.bytes == os.stat(cf).st_size
+        assert entry.complete
+    assert df.index[-1] == pd.Timestamp("2025-06-30")
+
+
+def test_manifest_freshness(stand_in_api, stand_in):
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+
+    # complete cache files are fresh (without checking them against `end`):
+    PolygonApi.cached_files = {}
+    stand_in.reset_counters()
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    assert stand_in.requests == 0
+
+    # a past year's cache file that was written before the year ended is refreshed:
+    cf = stand_in_api._cache_file("SPY", "day", 1, 2025)
+    mtime = pd.Timestamp("2025-07-01").timestamp()
+    os.utime(cf, (mtime, mtime))
+    PolygonApi.cached_files = {}
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    assert stand_in.requests == 1
+    assert stand_in_api._cache_manifest().lookup(cf).complete
+
+
+def test_manifest_seeded_from_existing_cache(stand_in_api, stand_in):
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    cache_dir = stand_in_api._cache_dir()
+    manifest = stand_in_api._cache_manifest()
+    os.unlink(manifest.path)
+    PolygonApi._manifests.pop(cache_dir)
+    PolygonApi.cached_files = {}
+
+    manifest = stand_in_api._cache_manifest()
+    entries = manifest.lookup_many(list(cache_dir.iterdir()))
+    assert sorted(entries) == ["SPY.day.1.2024.csv.gz", "SPY.day.1.2025.csv.gz"]
+    assert all(entry.rows is None and entry.complete for entry in entries.values())
+
+    # entries are completed when the cache files are next read:
+    stand_in.reset_counters()
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    assert stand_in.requests == 0
+    assert all(entry.rows > 0 for entry in manifest.lookup_many(list(cache_dir.iterdir())).values())
+
+
+def test_manifest_clear(stand_in_api):
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    stand_in_api.fetch_ohlcvdf("QQQ", **_KWARGS)
+    stray = stand_in_api._cache_dir() / "notes.txt"
+    stray.write_text("not a cache file")
+
+    assert stand_in_api.clear_ohlcv_cache("SPY") == ["SPY.day.1.2024.csv.gz", "SPY.day.1.2025.csv.gz"]
+    assert stand_in_api._cache_manifest().files() == ["QQQ.day.1.2024.csv.gz", "QQQ.day.1.2025.csv.gz"]
+    assert len(stand_in_api.clear_ohlcv_cache("all")) == 2
+    assert stand_in_api._cache_manifest().files() == []
+    assert sorted(p.name for p in stand_in_api._cache_dir().iterdir()) == ["notes.txt"]
+
+
+def test_manifest_coverage_warnings(stand_in_api):
+    stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+
+    # emulate a ticker that started trading in May 2024:
+    cf = stand_in_api._cache_file("SPY", "day", 1, 2024)
+    cache_df = stand_in_api._cache_read_df(cf)
+    stand_in_api._write_cache_file(cf, cache_df[cache_df.index >= "2024-05-01"])
+    with pytest.warns(UserWarning, match="Requested START"):
+        stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+
+
+def test_manifest_shared_between_threads_and_instances(tmp_path):
+    cache_dir = tmp_path / "ohlcv_cache"
+    cache_dir.mkdir()
+    cf = cache_dir / "SPY.minute.5.all.2024.csv.gz"
+    df = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.DatetimeIndex(["2024-01-02", "2024-12-31"]))
+    df.to_csv(cf)
+    m1 = CacheManifest(tmp_path / "manifest.sqlite", cache_dir)
+    m1.record(cf, df, fetched_at=pd.Timestamp("2025-01-02").timestamp())
+
+    m2 = CacheManifest(tmp_path / "manifest.sqlite", cache_dir)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        entries = list(executor.map(lambda _: m2.lookup(cf), range(8)))
+    assert all(entry == entries[0] for entry in entries)
+    assert (entries[0].span, entries[0].span_multiplier, entries[0].rows) == ("minute", 5, 2)
+    assert entries[0].complete and CacheManifest.matches(entries[0], os.stat(cf))
+
+
+def test_manifest_created_concurrently(tmp_path):
+    cache_dir = tmp_path / "ohlcv_cache"
+    cache_dir.mkdir()
+    cf = cache_dir / "SPY.day.1.2024.csv.gz"
+    pd.DataFrame({"Close": [1.0]}, index=pd.DatetimeIndex(["2024-01-02"])).to_csv(cf)
+
+    def create_and_lookup(_):
+        manifest = CacheManifest(tmp_path / "manifest.sqlite", cache_dir)
+        return manifest.lookup(cf)
+
+    # (every manifest sees the complete, seeded, table; none drops it as out of date)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        entries = list(executor.map(create_and_lookup, range(32)))
+    assert all(entry is not None and entry.file == cf.name for entry in entries)
+
+
+def test_cache_dirs_made_once(stand_in_api, monkeypatch):
+    # Naming cache files (here, a year of daily partitions) never makes their directories
+    # again, once made:
+    stand_in_api._cache_dir(), stand_in_api._options_cache_dir(), stand_in_api._quotes_cache_file("SPY", "2025-01-02")
+    mkdirs = []
+    mkdir = pathlib.Path.mkdir
+
+    def counted_mkdir(path, *args, **kwargs):
+        mkdirs.append(path)
+        return mkdir(path, *args, **kwargs)
+
+    monkeypatch.setattr(pathlib.Path, "mkdir", counted_mkdir)
+    partitions, cache_files = stand_in_api._ohlcv_cache_files("SPY", "second", 1, "2025-01-01", "2025-12-31")
+    assert len(cache_files) == 365
+    for day in pd.bdate_range("2025-01-01", "2025-12-31").strftime("%Y-%m-%d"):
+        stand_in_api._quotes_cache_file("SPY", day)
+        stand_in_api._options_cache_file("SPY", day)
+    assert mkdirs == []
+    assert all(cf.parent.is_dir() for cf in cache_files)
@@ -0,0 +1,147 @@
+"""
+Test the cache partitions: spans of seconds are cached per day (rather than per year),
+the partitions of other spans are sized per cache format, and a cached request reads
+only the partitions (and, in parquet, the row groups) that overlap it.
+"""
+
+import warnings
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+_KWARGS = dict(start="2025-01-09", end="2025-01-13", span="second")
+
+
+@pytest.mark.parametrize("cache_format", ["csv.gz", "parquet"])
+def test_second_span_daily_partitions(stand_in_api, stand_in, cache_format):
+    stand_in_api.cache_format = cache_format
+    df_noc = stand_in_api.fetch_ohlcvdf("SPY", cache=False, **_KWARGS)
+    stand_in.reset_counters()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # (no warnings, even for the empty weekend partitions)
+        df_yec = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **_KWARGS)
+    pd.testing.assert_frame_equal(df_noc, df_yec)
+    assert stand_in.requests >= 5
+
+    days = ["2025-01-09", "2025-01-10", "2025-01-11", "2025-01-12", "2025-01-13"]
+    assert stand_in_api._cache_manifest().files("SPY") == [
+        f"SPY.second.1.all.{day}.{cache_format}" for day in days
+    ]
+    rows = [entry.rows for entry in stand_in_api._cache_manifest().lookup_many(
+        [stand_in_api._cache_dir() / f"SPY.second.1.all.{day}.{cache_format}" for day in days]
+    ).values()]
+    assert sorted(rows)[:2] == [0, 0]  # (Saturday and Sunday)
+
+    # Each partition holds (all hours of) one day, exchange time:
+    df_all = stand_in_api.fetch_ohlcvdf("SPY", cache=True, market="all", **_KWARGS)
+    assert df_all.index[0] >= pd.Timestamp("2025-01-09 00:00")
+    assert df_all.index[-1] < pd.Timestamp("2025-01-14 00:00")
+
+    # Served from the cache, reading only the partitions that are requested:
+    PolygonApi.cached_files = {}
+    stand_in_api.frame_cache.clear()
+    stand_in.reset_counters()
+    misses = stand_in_api.frame_cache.stats()["misses"]
+    df_day = stand_in_api.fetch_ohlcvdf("SPY", cache=True, start="2025-01-10", end="2025-01-10", span="second")
+    assert stand_in.requests == 0
+    assert stand_in_api.frame_cache.stats()["misses"] == misses + 1
+    pd.testing.assert_frame_equal(df_day, df_noc.loc["2025-01-10"])
+
+
+def test_second_span_partial_cache(stand_in_api, stand_in):
+    stand_in_api.fetch_ohlcvdf("SPY", cache=True, start="2025-01-09", end="2025-01-10", span="second")
+    stand_in.reset_counters()
+    df = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **_KWARGS)
+    # only the three days not yet cached are requested:
+    starts = [int(path.split("?")[0].split("/")[-2]) for path in stand_in.paths]
+    assert stand_in.requests >= 3
+    assert min(starts) == pd.Timestamp("2025-01-11", tz="US/Eastern").value // 10**6
+    pd.testing.assert_frame_equal(df, stand_in_api.fetch_ohlcvdf("SPY", cache=False, **_KWARGS))
+
+
+def test_partition_freq_per_format(stand_in_api):
+    freq = stand_in_api._cache_partition_freq
+    assert [freq("minute", 1, fmt) for fmt in ("csv.gz", "parquet", "arrow")] == ["M", "Y", "Y"]
+    assert [freq("minute", 5, fmt) for fmt in ("csv.gz", "parquet", "arrow")] == ["M", "Y", "Y"]
+    assert [freq("minute", 15, fmt) for fmt in ("csv.gz", "parquet", "arrow")] == ["Y", "Y", "Y"]
+    assert [freq("second", 1, fmt) for fmt in ("csv.gz", "parquet", "arrow")] == ["D", "D", "D"]
+    assert freq("hour", 1, "csv.gz") == freq("day", 1, "csv.gz") == "Y"
+
+
+def test_parquet_row_group_pushdown(stand_in_api, stand_in, monkeypatch):
+    kwargs = dict(span="minute", market="all", cache=True)
+    stand_in_api.cache_format = "parquet"
+    df_year = stand_in_api.fetch_ohlcvdf("SPY", start="2025-01-01", end="2025-12-31", **kwargs)
+    cf = stand_in_api._cache_file("SPY", "minute", 1, 2025)
+    assert stand_in_api._cache_manifest().files("SPY") == [cf.name]
+
+    rows_read = []
+    read_rows = stand_in_api._cache_read_rows
+
+    def counting_read_rows(cf, start, end):
+        df = read_rows(cf, start, end)
+        rows_read.append(len(df))
+        return df
+
+    monkeypatch.setattr(stand_in_api, "_cache_read_rows", counting_read_rows)
+    PolygonApi.cached_files = {}
+    stand_in_api.frame_cache.clear()
+    stand_in.reset_counters()
+    df_week = stand_in_api.fetch_ohlcvdf("SPY", start="2025-03-03", end="2025-03-07", **kwargs)
+    assert stand_in.requests == 0
+    pd.testing.assert_frame_equal(df_week, df_year.loc["2025-03-03":"2025-03-07 23:59"])
+    # (only the row groups overlapping the week are decoded, not the whole year)
+    assert len(rows_read) == 1
+    assert len(df_week) <= rows_read[0] <= len(df_week) + 2 * stand_in_api._PARQUET_ROW_GROUP
+    assert rows_read[0] < len(df_year) / 10
+
+    # once the whole partition is in memory, it is used as it is:
+    stand_in_api.fetch_ohlcvdf("SPY", start="2025-01-01", end="2025-12-31", **kwargs)
+    stand_in_api.fetch_ohlcvdf("SPY", start="2025-03-03", end="2025-03-07", **kwargs)
+    assert len(rows_read) == 1
+
+
+def test_migrate_repartitions(stand_in_api, stand_in):
+    kwargs = dict(start="2025-01-01", end="2025-06-30", span="minute", market="all", cache=True)
+    df = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    months = [f"SPY.minute.1.all.2025-{m:02d}.csv.gz" for m in range(1, 7)]
+    assert stand_in_api._cache_manifest().files("SPY") == months
+
+    assert stand_in_api.migrate_ohlcv_cache("parquet") == []  # (2025 is not covered entirely)
+    assert stand_in_api._cache_manifest().files("SPY") == months
+
+    stand_in_api.fetch_ohlcvdf("SPY", start="2025-07-01", end="2025-12-31", span="minute", market="all", cache=True)
+    assert stand_in_api.migrate_ohlcv_cache("parquet") == ["SPY.minute.1.all.2025.parquet"]
+    assert stand_in_api._cache_manifest().files("SPY") == ["SPY.minute.1.all.2025.parquet"]
+    stand_in_api.cache_format = "parquet"
+    stand_in.reset_counters()
+    pd.testing.assert_frame_equal(df, stand_in_api.fetch_ohlcvdf("SPY", **kwargs))
+    assert stand_in.requests == 0
+
+    assert len(stand_in_api.migrate_ohlcv_cache("csv.gz")) == 12
+    stand_in_api.cache_format = "csv.gz"
+    pd.testing.assert_frame_equal(df, stand_in_api.fetch_ohlcvdf("SPY", **kwargs))
+    assert stand_in.requests == 0
+
+
+@pytest.mark.parametrize("cache_format", ["parquet", "arrow"])
+def test_minute_partitions_year_boundary(stand_in_api, host_tz, cache_format):
+    # Minutes are cached per year in parquet and arrow; the (exchange time) year boundary
+    # is the partition boundary, whatever the host's time zone:
+    stand_in_api.cache_format = cache_format
+    kwargs = dict(start="2025-12-31", end="2026-01-02", span="minute", span_multiplier=5, market="all")
+    assert stand_in_api._cache_partition_freq("minute", 5) == "Y"
+    host_tz("America/New_York")
+    expected = stand_in_api.fetch_ohlcvdf("SPY", cache=False, **kwargs)
+    host_tz("UTC")
+    df = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.loc["2025-12-31"].index[-1] == pd.Timestamp("2025-12-31 19:55")
+    for year in (2025, 2026):
+        cf = stand_in_api._cache_file("SPY", "minute", 5, pd.Period(year, freq="Y"))
+        assert cf.name == f"SPY.minute.5.all.{year}.{cache_format}"
+        cdf = stand_in_api._cache_read_df(cf)
+        assert (cdf.index.year == year).all()
+    assert cdf.index[0] == pd.Timestamp("2026-01-01 04:00")  # (the stand-in trades on holidays)
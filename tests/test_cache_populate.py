@@ -0,0 +1,58 @@
+"""
+Test concurrent population of the (per year) cache files on a cold cache.
+"""
+
+import asyncio
+import logging
+import time
+
+import pandas as pd
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+KWARGS = dict(start="2016-01-01", end="2025-12-31", span="hour", cache=True)
+
+
+def test_cold_cache_concurrent(stand_in_api, stand_in):
+    years = range(2016, 2026)
+    noc = stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "span": "day", "cache": False})
+
+    # Emulate slow responses, so that the timing is dominated by the requests:
+    stand_in.latency = 0.25
+    t0 = time.perf_counter()
+    yec = stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "span": "day"})
+    cold = time.perf_counter() - t0
+    logger.info(f"cold cache, {len(years)} years: {cold:.2f}s (serial would be >= {0.25 * len(years):.2f}s)")
+
+    pd.testing.assert_frame_equal(noc, yec)
+    assert sorted(f.name for f in stand_in_api._cache_dir().iterdir()) == [
+        f"SPY.day.1.{year}.csv.gz" for year in years
+    ]
+    assert cold < 0.5 * 0.25 * len(years)
+
+
+def test_partly_cold_cache(stand_in_api, stand_in):
+    noc = stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "cache": False})
+    stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "start": "2020-01-01", "end": "2021-12-31"})
+    stand_in.reset_counters()
+    PolygonApi.cached_files = {}
+
+    # Existing cache files are read (not requested) while the missing ones are requested:
+    pd.testing.assert_frame_equal(noc, stand_in_api.fetch_ohlcvdf("SPY", **KWARGS))
+    assert stand_in.requests == 8
+
+
+def test_cold_cache_concurrent_async(stand_in_api, stand_in):
+    noc = stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "cache": False})
+    stand_in_api.fetch_ohlcvdf("SPY", **{**KWARGS, "start": "2020-01-01", "end": "2021-12-31"})
+    stand_in.reset_counters()
+    PolygonApi.cached_files = {}
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_ohlcvdf_async("SPY", **KWARGS)
+
+    pd.testing.assert_frame_equal(noc, asyncio.run(main()))
+    assert stand_in.requests == 8
@@ -0,0 +1,72 @@
+"""
+Test pdpolgonapi.fetch_chain_ohlcv(): OHLCV data for the contracts of an options chain.
+"""
+
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+_KWARGS = dict(start="2025-01-02", end="2025-01-31", span="day")
+
+
+@pytest.fixture
+def chain(stand_in_api):
+    return stand_in_api.fetch_options_chain("SPY", "2025-02-07", "2025-02-28")
+
+
+def test_fetch_chain_ohlcv(stand_in_api, stand_in, chain):
+    latency = 0.02
+    stand_in.latency = latency
+    t0 = time.perf_counter()
+    df = stand_in_api.fetch_chain_ohlcv(chain, **_KWARGS)
+    elapsed = time.perf_counter() - t0
+    stand_in.latency = 0.0
+    n = len(chain.tickers)
+    logger.info(f"{n} contracts in {elapsed:.3f}s (serial would be >= {n * latency:.1f}s)")
+    assert elapsed < 0.5 * n * latency
+
+    assert df.index.names == ["Expiration", "Strike", "Type", "Timestamp"]
+    assert df.droplevel("Timestamp").index.unique().equals(chain.tickers.index)
+    assert df.attrs["failures"] == {}
+    key = chain.tickers.index[7]
+    contract = stand_in_api.fetch_ohlcvdf(chain.tickers[key], **_KWARGS)
+    pd.testing.assert_frame_equal(df.loc[key], contract.rename_axis("Timestamp"))
+
+
+def test_fetch_chain_ohlcv_selection(stand_in_api, chain):
+    df = stand_in_api.fetch_chain_ohlcv(
+        chain, expirations=["2025-02-14"], strikes=(95, 100), contract_type="put", **_KWARGS
+    )
+    contracts = df.droplevel("Timestamp").index.unique()
+    expiration = pd.Timestamp("2025-02-14")
+    assert list(contracts) == [(expiration, strike, "put") for strike in (96.0, 98.0, 100.0)]
+
+
+def test_fetch_chain_ohlcv_cache(stand_in_api, stand_in, chain):
+    df = stand_in_api.fetch_chain_ohlcv(chain, contract_type="call", cache=True, **_KWARGS)
+    manifest = stand_in_api._cache_manifest()
+    calls = chain.tickers[chain.tickers.index.get_level_values("Type") == "call"]
+    assert sorted(manifest.files()) == sorted(ticker + ".day.1.2025.csv.gz" for ticker in calls)
+
+    PolygonApi.cached_files = {}
+    stand_in.reset_counters()
+    df_cached = stand_in_api.fetch_chain_ohlcv(chain, contract_type="call", cache=True, **_KWARGS)
+    pd.testing.assert_frame_equal(df, df_cached)
+    assert stand_in.requests == 0
+
+
+def test_fetch_chain_ohlcv_failures(stand_in_api):
+    ix = pd.MultiIndex.from_tuples([("2025-02-14", 100.0, "call"), ("2025-02-14", 100.0, "put")])
+    ix = ix.set_names(["Expiration", "Strike", "Type"])
+    tickers = pd.Series(["O:SPY250214C00100000", "BAD:SPY250214P00100000"], index=ix)
+    chain = PolygonApi.OptionsChain("SPY", tickers)
+    with pytest.warns(UserWarning, match="1 of 2 contracts failed"):
+        df = stand_in_api.fetch_chain_ohlcv(chain, **_KWARGS)
+    assert list(df.attrs["failures"]) == ["BAD:SPY250214P00100000"]
+    assert list(df.droplevel("Timestamp").index.unique()) == [(pd.Timestamp("2025-02-14"), 100.0, "call")]
@@ -0,0 +1,102 @@
+"""
+Test (and benchmark) `dtypes="compact"` OHLCV DataFrames against the default dtypes.
+"""
+
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+_KWARGS = dict(start="2025-01-01", end="2025-12-31", span="minute", market="all")
+
+
+def _api(stand_in, **kwargs):
+    api = PolygonApi(apikey="STAND_IN_APIKEY", **kwargs)
+    api.base_url = stand_in.url
+    return api
+
+
+def _assert_compact_equal(df_compact, df_default):
+    assert df_compact[["Open", "High", "Low", "Close"]].dtypes.eq("float32").all()
+    assert df_compact["Volume"].dtype == "uint32"
+    pd.testing.assert_index_equal(df_compact.index, df_default.index)
+    # (the stand-in's prices, about $100, have 4 decimals; see `dtypes` in PolygonApi)
+    pd.testing.assert_frame_equal(
+        df_compact.astype("float64").round(4), df_default.astype("float64"), check_exact=True
+    )
+
+
+def test_compact_dtypes(stand_in_api, stand_in):
+    df_default = stand_in_api.fetch_ohlcvdf("SPY", **_KWARGS)
+    api = _api(stand_in, dtypes="compact")
+    _assert_compact_equal(api.fetch_ohlcvdf("SPY", **_KWARGS), df_default)
+    api.close()
+
+    with pytest.raises(ValueError):
+        PolygonApi(apikey="STAND_IN_APIKEY", dtypes="float16")
+
+
+@pytest.mark.parametrize("cache_format", ["csv.gz", "parquet", "arrow"])
+def test_compact_cache(stand_in_api, stand_in, cache_format):
+    kwargs = dict(start="2024-06-01", end="2025-03-01", span="minute", span_multiplier=5)
+    df_default = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    api = _api(stand_in, dtypes="compact", cache_format=cache_format)
+    df_noc = api.fetch_ohlcvdf("SPY", cache=False, **kwargs)
+    df_yec = api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    _assert_compact_equal(df_yec, df_default)
+    pd.testing.assert_frame_equal(df_noc, df_yec)
+
+    # compact cache files are distinct from the default cache files, and keep their dtypes:
+    cf = api._ohlcv_cache_files("SPY", "minute", 5, "2025-03-01", "2025-03-01")[1][0]
+    partition = "2025-03" if cache_format == "csv.gz" else "2025"  # (see `_cache_partition_freq()`)
+    assert cf.name == f"SPY.minute.5.all.compact.{partition}.{cache_format}"
+    PolygonApi.cached_files = {}
+    api.frame_cache.clear()
+    stand_in.reset_counters()
+    pd.testing.assert_frame_equal(df_yec, api.fetch_ohlcvdf("SPY", cache=True, **kwargs))
+    assert stand_in.requests == 0
+    assert api._cache_manifest().lookup(cf).rows == len(api._cache_read_df(cf))
+    api.close()
+
+
+def test_compact_volume_dtype():
+    ix = pd.DatetimeIndex(["2025-01-02", "2025-01-03"])
+    df = pd.DataFrame(dict(Open=1.0, High=2.0, Low=0.5, Close=1.5, Volume=[2.0**32 - 1, 10.4]), index=ix)
+    compact = PolygonApi._compact_ohlcvdf(df)
+    assert compact["Volume"].dtype == "uint32"
+    assert compact["Volume"].tolist() == [2**32 - 1, 10]
+    df["Volume"] = [2.0**32, 10.6]
+    compact = PolygonApi._compact_ohlcvdf(df)
+    assert compact["Volume"].dtype == "uint64"
+    assert compact["Volume"].tolist() == [2**32, 11]
+
+
+def test_compact_benchmark(stand_in, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    results = {}
+    for dtypes in ("default", "compact"):
+        api = _api(stand_in, dtypes=dtypes, cache_format="parquet")
+        t0 = time.perf_counter()
+        df = api.fetch_ohlcvdf("SPY", cache=False, **_KWARGS)
+        fetch_time = time.perf_counter() - t0
+        cf = api._cache_file("SPY", "minute", 1, 2025)
+        api._cache_write_df(cf, df)
+        t0 = time.perf_counter()
+        for _ in range(10):
+            api._cache_read_df(cf)
+        read_time = (time.perf_counter() - t0) / 10
+        nbytes = df.memory_usage(index=True, deep=True).sum()
+        results[dtypes] = (nbytes, fetch_time, read_time, cf.stat().st_size)
+        api.close()
+    for dtypes, (nbytes, fetch_time, read_time, size) in results.items():
+        logger.info(
+            f"{dtypes:>8s}: one year of minutes, {nbytes / 2**20:6.2f} MiB in memory, "
+            + f"fetch {fetch_time:.2f}s, parquet read {1000 * read_time:6.2f}ms ({size} bytes)"
+        )
+    # 8 bytes of index, 4 x 4 bytes of prices and 4 bytes of volume per row, rather than 48:
+    assert results["compact"][0] / results["default"][0] == pytest.approx(28 / 48, abs=0.01)
@@ -0,0 +1,51 @@
+"""
+Test pdpolgonapi.fetch_ohlcvdf_many()
+"""
+
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+logger = logging.getLogger("test_pdpgapi")
+
+TICKERS = ["T%02d" % n for n in range(40)]
+
+
+def test_fetch_ohlcvdf_many(stand_in_api, stand_in):
+    latency = 0.05
+    stand_in.latency = latency
+    t0 = time.perf_counter()
+    dfs = stand_in_api.fetch_ohlcvdf_many(TICKERS, start="2025-01-01", end="2025-03-01", span="day")
+    elapsed = time.perf_counter() - t0
+    logger.info(f"{len(TICKERS)} tickers in {elapsed:.3f}s (serial would be >= {len(TICKERS) * latency:.1f}s)")
+
+    assert list(dfs.keys()) == TICKERS
+    assert elapsed < 0.5 * len(TICKERS) * latency
+    assert stand_in.connections <= stand_in_api.pool_size
+    stand_in.latency = 0.0
+    df = stand_in_api.fetch_ohlcvdf("T07", start="2025-01-01", end="2025-03-01", span="day")
+    pd.testing.assert_frame_equal(dfs["T07"], df)
+
+
+def test_fetch_ohlcvdf_many_combined(stand_in_api):
+    tickers = ["AAA", "BAD1", "CCC"]
+    with pytest.warns(UserWarning, match="BAD1"):
+        df = stand_in_api.fetch_ohlcvdf_many(tickers, start="2025-01-01", end="2025-03-01", combine=True)
+    assert df.index.names == ["Ticker", "Timestamp"]
+    assert list(df.index.get_level_values("Ticker").unique()) == ["AAA", "CCC"]
+    assert list(df.attrs["failures"].keys()) == ["BAD1"]
+    aaa = stand_in_api.fetch_ohlcvdf("AAA", start="2025-01-01", end="2025-03-01")
+    assert (df.loc["AAA"].values == aaa.values).all()
+
+    with pytest.warns(UserWarning, match="BAD1"):
+        dfs = stand_in_api.fetch_ohlcvdf_many(tickers, start="2025-01-01", end="2025-03-01")
+    assert dfs["BAD1"] is None
+    assert len(dfs["AAA"]) == len(dfs["CCC"]) > 0
+
+
+def test_fetch_ohlcvdf_many_bad_args(stand_in_api, stand_in):
+    with pytest.raises(ValueError):
+        stand_in_api.fetch_ohlcvdf_many(TICKERS, span="fortnight")
+    assert stand_in.requests == 0
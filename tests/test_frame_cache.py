@@ -0,0 +1,102 @@
+"""
+Test the in-memory LRU cache of DataFrames read from the OHLCV cache files.
+"""
+
+import logging
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from pdpolygonapi._frame_cache import FrameCache
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def _frame(rows):
+    ix = pd.date_range("2025-01-02", periods=rows, freq="min")
+    return pd.DataFrame(dict(Open=1.0, Close=2.0), index=ix)
+
+
+def test_frame_cache_lru(tmp_path):
+    paths = [tmp_path / ("f%d" % n) for n in range(4)]
+    for path in paths:
+        path.write_text("x")
+    nbytes = int(_frame(1000).memory_usage(index=True, deep=True).sum())
+    fc = FrameCache(max_bytes=3 * nbytes)
+
+    for path in paths[:3]:
+        fc.put(path, _frame(1000))
+    assert fc.get(paths[0]) is not None  # paths[1] is now least recently used
+    fc.put(paths[3], _frame(1000))
+    assert fc.get(paths[1]) is None
+    assert all(fc.get(path) is not None for path in (paths[0], paths[2], paths[3]))
+    assert fc.stats() == dict(
+        hits=4, misses=1, evictions=1, entries=3, nbytes=3 * nbytes, max_bytes=3 * nbytes
+    )
+
+    # a changed file invalidates its entry:
+    paths[0].write_text("xy")
+    assert fc.get(paths[0]) is None
+    assert len(fc) == 2
+
+    # a frame larger than the entire budget is not cached:
+    fc.put(paths[1], _frame(4000))
+    assert fc.get(paths[1]) is None
+
+    with pytest.raises(ValueError):
+        FrameCache(max_bytes=-1)
+
+
+def test_frame_cache_fetch(stand_in_api, stand_in):
+    kwargs = dict(start="2025-01-01", end="2025-05-01", span="minute", span_multiplier=15, cache=True)
+    df0 = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    requests = stand_in.requests
+    PolygonApi.cached_files = {}
+    stand_in_api.frame_cache.clear()
+
+    df1 = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    stats = stand_in_api.frame_cache.stats()
+    assert (stats["hits"], stats["entries"]) == (0, 1)
+    for _ in range(3):
+        df2 = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    assert stand_in_api.frame_cache.stats()["hits"] == 3
+    pd.testing.assert_frame_equal(df0, df1)
+    pd.testing.assert_frame_equal(df1, df2)
+
+    # modifying a returned frame does not modify the cached frame:
+    df2.iloc[:, 0] = -1.0
+    pd.testing.assert_frame_equal(df1, stand_in_api.fetch_ohlcvdf("SPY", **kwargs))
+
+    # a cache file re-written (for example by another process) is read again:
+    cf = stand_in_api._cache_file("SPY", "minute", 15, 2025)
+    st = os.stat(cf)
+    os.utime(cf, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    misses = stand_in_api.frame_cache.stats()["misses"]
+    stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    assert stand_in_api.frame_cache.stats()["misses"] == misses + 1
+    assert stand_in.requests == requests
+
+
+@pytest.mark.parametrize("span, span_multiplier", [("day", 1), ("minute", 5)])
+def test_frame_cache_speed(stand_in, tmp_path, monkeypatch, span, span_multiplier):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    kwargs = dict(start="2025-01-01", end="2025-05-01", span=span, span_multiplier=span_multiplier, cache=True)
+    elapsed = {}
+    for cache_memory in (0, 256 * 2**20):
+        PolygonApi.cached_files = {}
+        api = PolygonApi(apikey="STAND_IN_APIKEY", cache_memory=cache_memory)
+        api.base_url = stand_in.url
+        df = api.fetch_ohlcvdf("SPY", **kwargs)
+        t0 = time.perf_counter()
+        for _ in range(20):
+            api.fetch_ohlcvdf("SPY", **kwargs)
+        elapsed[cache_memory] = (time.perf_counter() - t0) / 20
+        api.close()
+    logger.info(
+        f"{span} x{span_multiplier} ({len(df)} rows) per cached call:"
+        + f" disk={1000 * elapsed[0]:.3f}ms memory={1000 * elapsed[256 * 2**20]:.3f}ms"
+    )
+    assert elapsed[256 * 2**20] < elapsed[0]
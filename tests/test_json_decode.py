@@ -0,0 +1,86 @@
+"""
+Benchmark (decode + DataFrame time per page) and test the fast json decoding path.
+"""
+
+import json
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from pdpolygonapi import _pdpolygonapi_base
+from polygon_stand_in import aggregate_results, aggregate_times, contracts, quote_results
+
+logger = logging.getLogger("test_pdpgapi")
+
+ROWS = 50000
+
+
+def _pages():
+    t0 = pd.Timestamp("2024-01-02", tz="UTC")
+    times = aggregate_times("minute", 1, t0, t0 + pd.Timedelta(days=200))[:ROWS]
+    ns0 = int(pd.Timestamp("2024-01-02 14:30", tz="UTC").value)
+    return dict(
+        aggregates=(dict(ticker="SPY", status="OK", results=aggregate_results(times)), ["t", "o", "h", "l", "c", "v"]),
+        quotes=(
+            dict(status="OK", results=quote_results(ns0, ns0 + ROWS * 10**9 // 2 - 1, 2)),
+            PolygonApi._QUOTE_RESULT_KEYS,
+        ),
+        contracts=(dict(status="OK", results=contracts("SPY")[:1000]), PolygonApi._CONTRACT_COLUMNS),
+    )
+
+
+def _best_of(number, func):
+    best = float("inf")
+    for _ in range(number):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@pytest.mark.parametrize("page", ["aggregates", "quotes", "contracts"])
+def test_decode_page_speed(page):
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    payload, columns = _pages()[page]
+    content = json.dumps(payload).encode()
+
+    def _fast():
+        return api._results_to_df(api._json_loads(content)["results"], columns)
+
+    def _slow():
+        return pd.DataFrame(json.loads(content)["results"])
+
+    pd.testing.assert_frame_equal(_fast(), _slow()[columns])
+    fast = _best_of(5, _fast)
+    slow = _best_of(3, _slow)
+    logger.info(
+        f"{page} ({len(payload['results'])} results, {len(content) / 2**20:.1f}MiB):"
+        + f" decode+frame fast={1000 * fast:.1f}ms stdlib+records={1000 * slow:.1f}ms"
+        + f" ({slow / fast:.1f}x, orjson={_pdpolygonapi_base.orjson is not None})"
+    )
+    assert fast < slow
+    api.close()
+
+
+def test_results_to_df_fallback():
+    results = [dict(t=1, o=1.0), dict(t=2, o=None), dict(t=3)]
+    df = PolygonApi._results_to_df(results, ["t", "o"])
+    pd.testing.assert_frame_equal(df, pd.DataFrame(results))
+    df = PolygonApi._results_to_df(results[:2], ["t", "o"])
+    assert df.o.isna().tolist() == [False, True]
+
+
+def test_stdlib_decoder(stand_in_api):
+    # Results are the same whether or not orjson is installed:
+    kwargs = dict(start="2025-01-02", end="2025-03-01", span="minute", span_multiplier=5)
+    df_fast = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    q_fast = stand_in_api.fetch_quotes("SPY", "2025-01-03")
+    oc_fast = stand_in_api.fetch_options_chain("SPY", "2025-01-01", "2025-06-30")
+    stand_in_api._json_loads = json.loads
+    pd.testing.assert_frame_equal(df_fast, stand_in_api.fetch_ohlcvdf("SPY", **kwargs))
+    pd.testing.assert_frame_equal(q_fast, stand_in_api.fetch_quotes("SPY", "2025-01-03"))
+    oc_slow = stand_in_api.fetch_options_chain("SPY", "2025-01-01", "2025-06-30")
+    pd.testing.assert_series_equal(oc_fast.tickers, oc_slow.tickers)
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark (and regression test) for the conversion of polygon.io aggregates
+json responses to OHLCV DataFrames (`_json_response_to_ohlcvdf()`).
+"""
+
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from polygon_stand_in import aggregate_results, aggregate_times
+
+logger = logging.getLogger("test_pdpgapi")
+
+ROWS = 50000
+
+
+def _payload(span, t0):
+    t0 = pd.Timestamp(t0, tz="UTC")
+    times = aggregate_times(span, 1, t0, t0 + pd.Timedelta(days=200 if span == "minute" else 200 * 365))
+    assert len(times) >= ROWS
+    return dict(ticker="SPY", status="OK", results=aggregate_results(times[:ROWS]))
+
+
+def _per_row_ohlcvdf(api, span, rjson, tz="US/Eastern"):
+    # (the previous, per-row, implementation; to compare results and timing)
+    tempdf = pd.DataFrame(rjson["results"])
+    tempdf.index = [pd.Timestamp(t * 1000000.0, tz="UTC") for t in tempdf.t.values]
+    if span in ("day", "week", "month", "quarter", "year"):
+        tempdf.index = pd.DatetimeIndex([t.date() for t in tempdf.index])
+    else:
+        tempdf.index = tempdf.index.tz_convert(tz=tz).tz_localize(tz=None)
+    tempdf.rename(columns=api._OHLCV_COLMAP, inplace=True)
+    tempdf.index.name = rjson["ticker"]
+    return tempdf[api._OHLCV_COLMAP.values()]
+
+
+def _best_of(number, func, *args):
+    best = float("inf")
+    for _ in range(number):
+        t0 = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@pytest.mark.parametrize("span, t0", [("minute", "2024-01-02"), ("day", "1830-01-04")])
+def test_json_response_to_ohlcvdf_speed(span, t0):
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    rjson = _payload(span, t0)
+
+    df = api._json_response_to_ohlcvdf(span, rjson)
+    expected = _per_row_ohlcvdf(api, span, rjson)
+    assert len(df) == ROWS
+    assert str(df.index.dtype) == "datetime64[ns]"
+    pd.testing.assert_frame_equal(df, expected, check_index_type=False)
+
+    vectorized = _best_of(5, api._json_response_to_ohlcvdf, span, rjson)
+    per_row = _best_of(2, _per_row_ohlcvdf, api, span, rjson)
+    logger.info(
+        f"{span} ({ROWS} rows): vectorized={1000 * vectorized:.1f}ms"
+        + f" per-row={1000 * per_row:.1f}ms ({per_row / vectorized:.1f}x)"
+    )
+    assert vectorized < 0.5 * per_row
+    api.close()
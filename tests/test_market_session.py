@@ -0,0 +1,106 @@
+"""
+Test (and benchmark) the selection of the market session from intraday aggregates.
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+from polygon_stand_in import aggregate_times
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def _all_hours_df(start, end, span_multiplier, tz="US/Eastern"):
+    t0 = pd.Timestamp(start, tz="UTC")
+    t1 = pd.Timestamp(end, tz="UTC")
+    times = aggregate_times("minute", span_multiplier, t0, t1)
+    ix = pd.to_datetime(times, unit="ms", utc=True).tz_convert(tz).tz_localize(None)
+    ix = ix.astype("datetime64[ns]").rename("SPY")
+    return pd.DataFrame(dict(Close=np.arange(len(ix), dtype=float)), index=ix)
+
+
+def _per_day_regular_market(tempdf, tz):
+    # (the previous, per trade date, implementation; to compare results and timing)
+    mktdf = pd.DataFrame(columns=tempdf.columns)
+    mktdf.index.name = tempdf.index.name
+    for d in np.unique(tempdf.index.date):
+        t1 = pd.Timestamp(d, tz="US/Eastern") + pd.Timedelta(hours=9, minutes=30)
+        t1 = t1.tz_convert(tz).tz_localize(tz=None)
+        t2 = pd.Timestamp(d, tz="US/Eastern") + pd.Timedelta(hours=16)
+        t2 = t2.tz_convert(tz).tz_localize(tz=None)
+        if len(mktdf) < 1:
+            mktdf = pd.concat([tempdf.loc[t1:t2]])
+        else:
+            mktdf = pd.concat([mktdf, tempdf.loc[t1:t2]])
+    return mktdf
+
+
+@pytest.mark.parametrize("tz", ["US/Eastern", "UTC", "Asia/Tokyo"])
+def test_regular_market_matches_per_day(tz):
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    df = _all_hours_df("2024-02-20", "2024-04-20", 5, tz)  # (including a DST change)
+    expected = _per_day_regular_market(df, tz)
+    pd.testing.assert_frame_equal(api._regular_market(df, "minute", "regular", tz), expected)
+    assert api._regular_market(df, "minute", "all", tz) is df
+    api.close()
+
+
+def test_market_session(stand_in_api):
+    kwargs = dict(start="2025-03-03", end="2025-03-14", span="minute", span_multiplier=15)
+    df = stand_in_api.fetch_ohlcvdf("SPY", market=("09:30", "16:15"), **kwargs)
+    times = df.index.time
+    assert min(times) == pd.Timestamp("09:30").time()
+    assert max(times) == pd.Timestamp("16:15").time()
+    assert len(df) == 10 * 28
+
+    regular = stand_in_api.fetch_ohlcvdf("SPY", market="regular", **kwargs)
+    assert max(regular.index.time) == pd.Timestamp("16:00").time()
+
+    for market in ("regular", "all", ("09:30", "16:15"), ("04:00", "09:30")):
+        for tz in ("US/Eastern", "UTC"):
+            noc = stand_in_api.fetch_ohlcvdf("SPY", market=market, tz=tz, cache=False, **kwargs)
+            yec = stand_in_api.fetch_ohlcvdf("SPY", market=market, tz=tz, cache=True, **kwargs)
+            pd.testing.assert_frame_equal(noc, yec)
+
+    for market in ("extended", ("16:00", "09:30"), ("09:30",), ("9am", "4pm")):
+        with pytest.raises(ValueError):
+            stand_in_api.fetch_ohlcvdf("SPY", market=market, **kwargs)
+
+
+@pytest.mark.parametrize("years, span_multiplier", [(1, 1), (3, 5)])
+def test_regular_market_speed(years, span_multiplier):
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    df = _all_hours_df("2022-01-01", f"{2022 + years}-01-01", span_multiplier)
+
+    t0 = time.perf_counter()
+    masked = api._regular_market(df, "minute", "regular", "US/Eastern")
+    t1 = time.perf_counter()
+    expected = _per_day_regular_market(df, "US/Eastern")
+    t2 = time.perf_counter()
+    pd.testing.assert_frame_equal(masked, expected)
+    logger.info(
+        f"{years} year(s) of {span_multiplier} minute aggregates ({len(df)} rows):"
+        + f" mask={1000 * (t1 - t0):.1f}ms per-day={1000 * (t2 - t1):.1f}ms"
+    )
+    assert (t1 - t0) < 0.1 * (t2 - t1)
+    api.close()
+
+
+def test_yearly_cache_host_tz(stand_in_api, host_tz):
+    # Yearly (all hours) partitions hold exactly their own year, in exchange time, whatever
+    # the host's time zone:
+    kwargs = dict(start="2025-12-29", end="2026-01-02", span="hour", market="all")
+    host_tz("America/New_York")
+    expected = stand_in_api.fetch_ohlcvdf("SPY", cache=False, **kwargs)
+    host_tz("UTC")
+    df = stand_in_api.fetch_ohlcvdf("SPY", cache=True, **kwargs)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.loc["2025-12-31"].index[-1] == pd.Timestamp("2025-12-31 19:00")
+    for year in (2025, 2026):
+        cdf = stand_in_api._cache_read_df(stand_in_api._cache_file("SPY", "hour", 1, pd.Period(year, freq="Y")))
+        assert (cdf.index.year == year).all()
@@ -0,0 +1,143 @@
+"""
+Test the options contracts cache: contracts cached per underlying and expiration date,
+expired contracts that are never requested again, and un-expired contracts that are
+requested again only after `options_chain_ttl`.
+"""
+
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+_TODAY = pd.Timestamp.today().normalize()
+_START = (_TODAY - pd.Timedelta(days=120)).strftime("%Y-%m-%d")
+_END = (_TODAY + pd.Timedelta(days=120)).strftime("%Y-%m-%d")
+
+
+def _assert_chains_equal(oc1, oc2):
+    pd.testing.assert_series_equal(oc1.tickers, oc2.tickers)
+    pd.testing.assert_series_equal(oc1.expirations, oc2.expirations)
+
+
+@pytest.mark.parametrize("cache_format", ["csv.gz", "parquet"])
+def test_options_chain_cache(stand_in_api, stand_in, cache_format):
+    stand_in_api.cache_format = cache_format
+    oc_noc = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=False)
+    assert len(oc_noc.tickers) > 0
+    assert list(stand_in_api._options_cache_dir().iterdir()) == []
+
+    oc_yec = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+    _assert_chains_equal(oc_noc, oc_yec)
+    files = stand_in_api._options_cache_dates("SPY")
+    assert sorted(files) == sorted(str(xp.date()) for xp in oc_noc.expirations.index)
+
+    # served from the cache:
+    stand_in.reset_counters()
+    _assert_chains_equal(oc_noc, stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True))
+    assert stand_in.requests == 0
+
+    # a narrower request is served from the cache too:
+    start = (_TODAY - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+    oc = stand_in_api.fetch_options_chain("SPY", start, _END, cache=True)
+    assert stand_in.requests == 0
+    _assert_chains_equal(oc, stand_in_api.fetch_options_chain("SPY", start, _END, cache=False))
+
+
+def test_options_chain_cache_expired_never_refetched(stand_in_api, stand_in):
+    mid = (_TODAY - pd.Timedelta(days=60)).strftime("%Y-%m-%d")
+    stand_in_api.fetch_options_chain("SPY", mid, _END, cache=True)
+    index = stand_in_api._options_cache_index("SPY")
+    yesterday = (_TODAY - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    assert index["expired"] == [[mid, yesterday]]
+
+    # only the expired expirations not yet cached are requested (a month at a time), and
+    # the un-expired expirations are still fresh:
+    stand_in.reset_counters()
+    oc = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+    day_before = (pd.Timestamp(mid) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    months = pd.period_range(_START, day_before, freq="M")
+    assert stand_in.requests == len(months)
+    assert all("expired=true" in path for path in stand_in.paths)
+    paths = sorted(stand_in.paths)
+    assert f"expiration_date.gte={_START}" in paths[0]
+    assert f"expiration_date.lte={day_before}" in paths[-1]
+    assert stand_in_api._options_cache_index("SPY")["expired"] == [[_START, yesterday]]
+    _assert_chains_equal(oc, stand_in_api.fetch_options_chain("SPY", _START, _END, cache=False))
+
+    # however old the cache, only the un-expired contracts (and those expiring today,
+    # which may already be reported as expired) are requested again:
+    stand_in_api.options_chain_ttl = 0
+    stand_in.reset_counters()
+    stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+    assert stand_in.requests == len(pd.period_range(_TODAY, _END, freq="M")) + 1
+    today = _TODAY.strftime("%Y-%m-%d")
+    expired = [path for path in stand_in.paths if "expired=true" in path]
+    assert len(expired) == 1
+    assert f"expiration_date.gte={today}" in expired[0] and f"expiration_date.lte={today}" in expired[0]
+
+
+def test_options_chain_cache_ttl(stand_in_api, stand_in):
+    stand_in_api.fetch_options_chain("SPY", cache=True)  # (all un-expired contracts)
+    index_file = stand_in_api._options_cache_index_file("SPY")
+    stand_in.reset_counters()
+    stand_in_api.fetch_options_chain("SPY", end_expiration=_END, cache=True)
+    assert stand_in.requests == 0
+
+    # after the ttl, the un-expired contracts are requested again, and contracts that
+    # are no longer listed are dropped from the cache:
+    index = json.loads(index_file.read_text())
+    index["unexpired"]["fetched_at"] -= stand_in_api.options_chain_ttl + 1
+    index_file.write_text(json.dumps(index))
+    cached = stand_in_api._cache_read_df(min(stand_in_api._options_cache_dates("SPY").values()))
+    stale = stand_in_api._options_cache_file("SPY", (_TODAY + pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+    stand_in_api._cache_write_df(stale, cached)
+    oc = stand_in_api.fetch_options_chain("SPY", cache=True)
+    assert stand_in.requests > 0
+    assert (_TODAY.weekday() == 3) == stale.exists()  # (the stand-in's expirations are Fridays)
+    _assert_chains_equal(oc, stand_in_api.fetch_options_chain("SPY", cache=False))
+
+
+def test_options_chain_cache_async(stand_in_api, stand_in):
+    oc_sync = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_options_chain_async("SPY", _START, _END, cache=True)
+
+    stand_in.reset_counters()
+    _assert_chains_equal(oc_sync, asyncio.run(main()))
+    assert stand_in.requests == 0
+
+
+def test_options_chain_cache_per_format(stand_in_api, stand_in):
+    oc_csv = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+
+    # the contracts cached in another format are not taken to be cached in this one:
+    stand_in_api.cache_format = "parquet"
+    stand_in.reset_counters()
+    _assert_chains_equal(oc_csv, stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True))
+    assert stand_in.requests > 0
+    assert stand_in_api._options_cache_index_file("SPY").name == "SPY.options.parquet.json"
+
+
+def test_migrate_options_cache(stand_in_api, stand_in):
+    oc_csv = stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+    csv_dates = sorted(stand_in_api._options_cache_dates("SPY"))
+
+    stand_in_api.cache_format = "parquet"
+    migrated = stand_in_api.migrate_ohlcv_cache()
+    assert sorted(migrated) == [f"SPY.options.{xp}.parquet" for xp in csv_dates]
+    assert sorted(p.name for p in stand_in_api._options_cache_dir().glob("SPY.options.*.csv.gz*")) == []
+    assert not (stand_in_api._options_cache_dir() / "SPY.options.csv.gz.json").exists()
+
+    # served from the migrated cache:
+    stand_in.reset_counters()
+    _assert_chains_equal(oc_csv, stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True))
+    assert stand_in.requests == 0
+
+    # an underlying already cached in the new format is left as it is:
+    stand_in_api.cache_format = "csv.gz"
+    stand_in_api.fetch_options_chain("SPY", _START, _END, cache=True)
+    assert stand_in_api.migrate_ohlcv_cache("parquet") == []
+    assert (stand_in_api._options_cache_dir() / "SPY.options.csv.gz.json").exists()
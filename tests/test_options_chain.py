@@ -0,0 +1,193 @@
+"""
+Test (and benchmark) the OptionsChain indexes: datetime64 expirations and categorical
+types, the expirations and strikes found once (and only when first needed), and
+the nearest expiration and strike lookups.
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def _tickers(expirations, strikes):
+    # a (string indexed, as from the contracts' json) chain of calls and puts:
+    ix = pd.MultiIndex.from_product(
+        [expirations, strikes, ["call", "put"]], names=["Expiration", "Strike", "Type"]
+    )
+    return pd.Series([f"O:SPY{xp}{tp}{strike}" for xp, strike, tp in ix], index=ix, name="Ticker")
+
+
+def _strikes_by_loc(tickers, expiration):
+    # (the strikes of an expiration, as they were found before the chain was indexed)
+    return tickers.loc[expiration].index.get_level_values(0).unique().to_series()
+
+
+def test_options_chain_dtypes(stand_in_api):
+    chain = stand_in_api.fetch_options_chain("SPY", "2025-02-07", "2025-02-28")
+    ix = chain.tickers.index
+    assert ix.get_level_values("Expiration").dtype == "datetime64[ns]"
+    assert isinstance(ix.get_level_values("Type").dtype, pd.CategoricalDtype)
+    assert ix.is_monotonic_increasing
+    assert chain.tickers.loc[("2025-02-14", 100.0, "put")] == "O:SPY250214P00100000"
+
+    expected = pd.DatetimeIndex(["2025-02-07", "2025-02-14", "2025-02-21", "2025-02-28"], name="Expiration")
+    expected = expected.as_unit("ns")
+    pd.testing.assert_series_equal(chain.expirations, pd.Series(expected, index=expected, name="Expiration"))
+    assert list(chain.strikes) == list(expected)
+    for xp in expected:
+        pd.testing.assert_series_equal(chain.strikes[xp], _strikes_by_loc(chain.tickers, xp))
+
+
+def test_options_chain_lazy_index():
+    tickers = _tickers(["2025-02-21", "2025-02-14"], [100.0, 98.0, 102.0])
+    chain = PolygonApi.OptionsChain("SPY", tickers)
+    assert chain._index is None  # (nothing is found until it is wanted)
+    strikes = chain.get_strikes_by_expiration("2025-02-14")
+    assert chain._index is not None
+    assert strikes.tolist() == [98.0, 100.0, 102.0]
+    assert strikes.name == "Strike" and strikes.index.name == "Strike"
+    # any form of date finds the same (cached) strikes:
+    for expiration in ("2025-02-14", pd.Timestamp("2025-02-14"), np.datetime64("2025-02-14")):
+        assert chain.strikes[expiration] is strikes
+    assert chain.get_strikes_by_expiration("2025-02-15") is None
+    assert len(chain.strikes) == 2
+
+    empty = PolygonApi.OptionsChain("SPY", _tickers([], []))
+    assert len(empty.expirations) == 0
+    assert empty.get_strikes_by_expiration("2025-02-14") is None
+    assert empty.nearest_expiration("2025-02-14") is None
+
+
+def test_options_chain_nearest():
+    tickers = _tickers(["2025-02-07", "2025-02-14", "2025-02-21"], [95.0, 100.0, 105.0])
+    chain = PolygonApi.OptionsChain("SPY", tickers)
+    assert chain.nearest_expiration("2025-01-01") == pd.Timestamp("2025-02-07")
+    assert chain.nearest_expiration("2025-02-12") == pd.Timestamp("2025-02-14")
+    assert chain.nearest_expiration("2025-02-10 15:30") == pd.Timestamp("2025-02-07")  # (equally near)
+    assert chain.nearest_expiration("2025-03-31") == pd.Timestamp("2025-02-21")
+    assert chain.nearest_strike("2025-02-14", 101.0) == 100.0
+    assert chain.nearest_strike("2025-02-14", 102.5) == 100.0  # (equally near)
+    assert chain.nearest_strike("2025-02-14", 200.0) == 105.0
+    assert chain.nearest_strike("2025-02-14", 0.0) == 95.0
+    assert chain.nearest_strike("2025-02-15", 100.0) is None
+
+
+def test_options_chain_benchmark():
+    expirations = pd.bdate_range("2025-01-01", periods=500).strftime("%Y-%m-%d")
+    strikes = np.arange(50.0, 250.0, 0.5)
+    tickers = _tickers(expirations, strikes).sort_index()
+
+    t0 = time.perf_counter()
+    chain = PolygonApi.OptionsChain("SPY", tickers)
+    xp = chain.expirations.iloc[250]
+    lookups = [chain.get_strikes_by_expiration(xp) for xp in chain.expirations]
+    indexed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    by_loc = [_strikes_by_loc(tickers, str(xp.date())) for xp in chain.expirations]
+    per_expiration = time.perf_counter() - t0
+    logger.info(
+        f"{len(tickers)} contracts, {len(expirations)} expirations: indexed {1000 * indexed:.0f}ms, "
+        + f"one .loc[] per expiration {1000 * per_expiration:.0f}ms"
+    )
+    assert all(a.tolist() == b.tolist() for a, b in zip(lookups, by_loc))
+    assert chain.nearest_strike(xp, 123.3) == 123.5
+    assert indexed < per_expiration
+
+
+def _assert_covers(windows, expired, lo, hi):
+    # the sub-windows are contiguous, and cover exactly [lo, hi]:
+    assert all(window[0] == expired for window in windows)
+    assert windows[0][1] == lo and windows[-1][2] == hi
+    for (_, _, last), (_, first, _) in zip(windows[:-1], windows[1:]):
+        assert first - last == datetime.timedelta(days=1)
+
+
+def test_contracts_subwindows(stand_in_api):
+    date = datetime.date
+    windows = stand_in_api._contracts_subwindows(("true", date(2025, 1, 15), date(2025, 3, 10)))
+    assert windows == [
+        ("true", date(2025, 1, 15), date(2025, 1, 31)),
+        ("true", date(2025, 2, 1), date(2025, 2, 28)),
+        ("true", date(2025, 3, 1), date(2025, 3, 10)),
+    ]
+    today = datetime.date.today()
+    month_start = today.replace(day=1)
+    next_month = (pd.Timestamp(month_start) + pd.offsets.MonthBegin()).date()
+    windows = stand_in_api._contracts_subwindows(("true", date(2025, 1, 1), None))
+    _assert_covers(windows, "true", date(2025, 1, 1), None)
+    assert windows[-1] == ("true", next_month, None)  # (no contracts have expired in the future)
+
+    windows = stand_in_api._contracts_subwindows(("false", date(2025, 1, 1), None))
+    _assert_covers(windows, "false", date(2025, 1, 1), None)
+    assert windows[0] == ("false", date(2025, 1, 1), month_start - datetime.timedelta(days=1))
+    assert windows[1][1] == month_start
+    assert len(windows) == stand_in_api._CONTRACT_WINDOW_MONTHS + 2  # (the past, 12 calendar months, the rest)
+
+    # the windows planned by the options cache (see `_options_cache_plan()`) are split per month:
+    yesterday = today - datetime.timedelta(days=1)
+    windows = stand_in_api._contracts_subwindows(("true", date(2025, 1, 1), yesterday))
+    _assert_covers(windows, "true", date(2025, 1, 1), yesterday)
+    assert len(windows) == len(pd.period_range("2025-01", yesterday, freq="M"))
+    windows = stand_in_api._contracts_subwindows(("false", today, date(2027, 6, 30)))
+    _assert_covers(windows, "false", today, date(2027, 6, 30))
+    assert len(windows) == len(pd.period_range(today, "2027-06", freq="M"))
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_options_chain_expired_today(stand_in_api, stand_in, cache):
+    # Expired contracts are requested through today, so that the contracts that
+    # polygon.io already reports as expired on their expiration date (here, today) are
+    # not lost; when cached, they are requested again (with the un-expired contracts)
+    # after the ttl, rather than being taken to be expired for good:
+    today = pd.Timestamp.today().normalize()
+    stand_in.extra_expirations = (str(today.date()),)
+    start, end = str((today - pd.Timedelta(days=14)).date()), str((today + pd.Timedelta(days=14)).date())
+    expected = stand_in_api.fetch_options_chain("SPY", start, end, cache=False)
+    assert today in expected.expirations.index
+
+    stand_in.expired_through = str(today.date())
+    chain = stand_in_api.fetch_options_chain("SPY", start, end, cache=cache)
+    pd.testing.assert_series_equal(chain.tickers, expected.tickers)
+    chain = stand_in_api.fetch_options_chain("SPY", 0, end, cache=cache)  # (from today)
+    pd.testing.assert_series_equal(chain.tickers, expected.tickers.loc[today:])
+    if cache:
+        assert stand_in_api._options_cache_index("SPY")["expired"][-1][1] < str(today.date())
+        for cf in stand_in_api._options_cache_dir().iterdir():
+            cf.unlink()
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_options_chain_async("SPY", start, end, cache=cache)
+
+    pd.testing.assert_series_equal(asyncio.run(main()).tickers, expected.tickers)
+
+
+def test_options_chain_concurrent_windows(stand_in_api, stand_in, monkeypatch):
+    latency = 0.02
+    stand_in.latency = latency
+    stand_in.reset_counters()
+    t0 = time.perf_counter()
+    chain = stand_in_api.fetch_options_chain("SPY", "2024-01-01", "2027-12-31")
+    elapsed = time.perf_counter() - t0
+    requests = stand_in.requests
+    stand_in.latency = 0.0
+    logger.info(f"{requests} requests in {elapsed:.3f}s (serial would be >= {requests * latency:.1f}s)")
+    assert requests >= 48  # (one or more per month)
+    assert elapsed < 0.5 * requests * latency
+
+    # the same chain as when each of the expired and un-expired windows is paged through whole:
+    monkeypatch.setattr(stand_in_api, "_contracts_subwindows", lambda window: [window])
+    stand_in.reset_counters()
+    whole = stand_in_api.fetch_options_chain("SPY", "2024-01-01", "2027-12-31")
+    assert stand_in.requests > 2  # (more than one page)
+    pd.testing.assert_series_equal(chain.tickers, whole.tickers)
@@ -0,0 +1,193 @@
+"""
+Test the quotes: `iter_quotes()` pages, the bars that are computed page by page
+(`iter_quote_bars()`, `fetch_quotes()`) as the quotes are received, and (against
+pandas `resample()`) the vectorized bar engine.
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def _resampled_bars(qdf, bar_width):
+    # reference implementation of the quote bars, by pandas `resample()`:
+    qdf = qdf.rename(columns=dict(ask_price="Ask", bid_price="Bid", sequence_number="Count"))
+    agg = dict(Ask="mean", Bid="mean", Count="count")
+    for side, size in (("A", "ask_size"), ("B", "bid_size")):
+        for stat, how in (("A", "mean"), ("M", "median"), ("H", "max"), ("L", "min")):
+            qdf[side + "size" + stat] = qdf[size]
+            agg[side + "size" + stat] = how
+    bars = qdf.resample(bar_width, origin="epoch").agg(agg).dropna(how="any")
+    bars[["Ask", "Bid"]] = bars[["Ask", "Bid"]].round(2)
+    sizes = [column for column in bars.columns if "size" in column]
+    bars[sizes] = bars[sizes].round().astype("int64")
+    bars.index = bars.index.tz_convert("US/Eastern").tz_localize(None).rename("Timestamp")
+    return bars[["Ask", "AsizeA", "AsizeM", "AsizeH", "AsizeL", "Bid", "BsizeA", "BsizeM", "BsizeH", "BsizeL", "Count"]]
+
+
+def _assert_bars_equal(bars, expected):
+    # (mean prices are summed in a different order than by pandas, so may round to the other cent
+    # where the mean is within a rounding error of half a cent; sizes and counts are exact)
+    pd.testing.assert_index_equal(bars.index, expected.index)
+    prices = ["Ask", "Bid"]
+    pd.testing.assert_frame_equal(bars.drop(columns=prices), expected.drop(columns=prices))
+    pd.testing.assert_frame_equal(bars[prices], expected[prices], check_exact=False, rtol=0, atol=0.0100001)
+    assert (bars[prices] != expected[prices]).to_numpy().mean() < 0.01
+
+
+def _synthetic_quotes(n, seconds=6.5 * 3600, seed=0):
+    # `n` quotes spread (unevenly) over one regular session:
+    rng = np.random.default_rng(seed)
+    t0 = pd.Timestamp("2025-01-02 09:30", tz="US/Eastern").value
+    times = np.sort(t0 + (rng.random(n) ** 2 * seconds * 1e9).astype("int64"))
+    mid = 100 + np.cumsum(rng.integers(-1, 2, n)) * 0.01
+    return pd.DataFrame(
+        dict(
+            sip_timestamp=times,
+            ask_price=np.round(mid + 0.01, 2),
+            ask_size=rng.integers(1, 50, n),
+            bid_price=np.round(mid - 0.01, 2),
+            bid_size=rng.integers(1, 50, n),
+            sequence_number=np.arange(n),
+        ),
+        index=pd.to_datetime(times, unit="ns", utc=True),
+    )
+
+
+def test_iter_quotes_pages(stand_in_api, stand_in):
+    stand_in.reset_counters()
+    pages = stand_in_api.iter_quotes("SPY", "2025-01-02", limit=5000)
+    assert stand_in.requests == 0  # (nothing is requested until the first page is wanted)
+    first = next(pages)
+    assert stand_in.requests == 1
+    assert len(first) == 5000
+    assert list(first.columns) == stand_in_api._QUOTE_RESULT_KEYS
+    rest = list(pages)
+    assert stand_in.requests == 1 + len(rest)
+    assert all(len(page) <= 5000 for page in rest)
+    qdf = pd.concat([first, *rest])
+    assert len(qdf) == 2 * 6.5 * 3600 + 1  # (the stand-in makes 2 quotes per second)
+    assert qdf.index.is_monotonic_increasing
+
+
+def test_iter_quote_bars(stand_in_api):
+    pages = list(stand_in_api.iter_quotes("SPY", "2025-01-02", limit=5000))
+    expected = stand_in_api._quotes_to_bars(pd.concat(pages))
+
+    frames = list(stand_in_api.iter_quote_bars("SPY", "2025-01-02", limit=5000))
+    assert len(frames) == len(pages) + 1  # (the last second is finished after the last page)
+    assert all(len(bars) <= 5000 for bars in frames)
+    pd.testing.assert_frame_equal(pd.concat(frames), expected)
+    # (no second is split between two frames, even where it is split between two pages)
+    pd.testing.assert_frame_equal(stand_in_api.fetch_quotes("SPY", "2025-01-02"), expected)
+
+
+def test_fetch_quotes_no_results(stand_in_api):
+    qdf = stand_in_api.fetch_quotes("SPY", "2025-01-04")  # (a Saturday)
+    assert len(qdf) == 0
+    assert list(qdf.columns) == stand_in_api._QUOTE_COLUMNS
+    assert list(stand_in_api.iter_quote_bars("SPY", "2025-01-04")) == []
+
+
+def test_fetch_quotes_range(stand_in_api, stand_in):
+    days = ["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07"]  # (weekdays only)
+    expected = pd.concat([stand_in_api.fetch_quotes("SPY", day) for day in days])
+    stand_in.reset_counters()
+    df = stand_in_api.fetch_quotes_range("SPY", "2025-01-02", "2025-01-07", cache=False)
+    pd.testing.assert_frame_equal(df, expected)
+    assert stand_in.requests == len(days)
+    cache_dir = stand_in_api._quotes_cache_file("SPY", days[0]).parent
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_fetch_quotes_range_cache(stand_in_api, stand_in):
+    kwargs = dict(start="2025-01-02", end="2025-01-07", cache=True)
+    df = stand_in_api.fetch_quotes_range("SPY", **kwargs)
+    cache_dir = stand_in_api._quotes_cache_file("SPY", "2025-01-02").parent
+    assert sorted(p.name for p in cache_dir.iterdir()) == [
+        f"SPY.quotes.1s.{day}.csv.gz" for day in ("2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07")
+    ]
+    stand_in.reset_counters()
+    pd.testing.assert_frame_equal(df, stand_in_api.fetch_quotes_range("SPY", **kwargs))
+    assert stand_in.requests == 0
+
+    # raw quotes are cached too, and (where the 1 second bars are not yet cached) so are their bars:
+    expected = pd.concat(stand_in_api.iter_quotes("SPY", "2025-01-08"))
+    stand_in.reset_counters()
+    qdf = stand_in_api.fetch_quotes_range("SPY", "2025-01-08", "2025-01-08", raw=True, cache=True)
+    pd.testing.assert_frame_equal(qdf, expected)
+    assert stand_in.requests == 1
+    assert (cache_dir / "SPY.quotes.2025-01-08.csv.gz").exists()
+    stand_in.reset_counters()
+    bars = stand_in_api.fetch_quotes_range("SPY", "2025-01-08", "2025-01-08", cache=True)
+    pd.testing.assert_frame_equal(bars, stand_in_api.fetch_quotes("SPY", "2025-01-08"))
+    assert stand_in.requests == 1  # (only the fetch_quotes())
+
+    # a day whose session is not yet over is not cached:
+    tomorrow = (pd.Timestamp.now(tz="US/Eastern") + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    assert not stand_in_api._quotes_day_final(tomorrow)
+    assert stand_in_api._quotes_day_final("2025-01-08")
+
+
+def test_fetch_quotes_range_cache_failures(stand_in_api, stand_in):
+    # A day whose first (or any later) page of quotes is not received is never cached:
+    stand_in_api.wait = False
+    stand_in.max_requests = 0  # (every request is rejected)
+    kwargs = dict(start="2025-01-06", end="2025-01-06", cache=True)
+    with pytest.warns(UserWarning, match="not all received"):
+        assert len(stand_in_api.fetch_quotes_range("SPY", **kwargs)) == 0
+    assert not stand_in_api._quotes_cache_file("SPY", "2025-01-06", "1s").exists()
+
+    stand_in.max_requests = 2
+    pages = stand_in_api.iter_quotes("SPY", "2025-01-06", limit=5000)
+    assert [len(next(pages)), len(next(pages))] == [5000, 5000]
+    with pytest.raises(StopIteration) as stop:  # (the third page is rejected)
+        next(pages)
+    assert stop.value.value is False
+
+    stand_in.reset_counters()
+    expected = stand_in_api.fetch_quotes_range("SPY", "2025-01-06", "2025-01-06", cache=False)
+    assert len(expected) == 6.5 * 3600 + 1
+    pd.testing.assert_frame_equal(stand_in_api.fetch_quotes_range("SPY", **kwargs), expected)
+    assert stand_in_api._quotes_cache_file("SPY", "2025-01-06", "1s").exists()
+    assert list(stand_in_api.iter_quote_bars("SPY", "2025-01-04")) == []  # (a Saturday: no quotes)
+    assert stand_in_api._quotes_day("SPY", "2025-01-04")[1] is True
+
+
+@pytest.mark.parametrize("bar_width", ["1s", "100ms", "1min"])
+def test_quote_bars_match_resample(stand_in_api, bar_width):
+    qdf = _synthetic_quotes(200_000)
+    _assert_bars_equal(stand_in_api._quotes_to_bars(qdf, bar_width), _resampled_bars(qdf, bar_width))
+
+    frames = list(stand_in_api.iter_quote_bars("SPY", "2025-01-02", limit=5000, bar_width=bar_width))
+    pages = pd.concat(stand_in_api.iter_quotes("SPY", "2025-01-02"))
+    _assert_bars_equal(pd.concat(frames), _resampled_bars(pages, bar_width))
+
+    with pytest.raises(ValueError):
+        stand_in_api._quotes_to_bars(qdf, "0s")
+
+
+def test_quote_bars_benchmark(stand_in_api):
+    qdf = _synthetic_quotes(1_000_000)
+
+    def best_of_3(func):
+        times = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - t0)
+        return result, min(times)
+
+    bars, vectorized = best_of_3(lambda: stand_in_api._quotes_to_bars(qdf))
+    expected, resampled = best_of_3(lambda: _resampled_bars(qdf, "1s"))
+    logger.info(
+        f"1,000,000 quotes to {len(bars)} 1s bars: vectorized {1000 * vectorized:.0f}ms, "
+        + f"resample {1000 * resampled:.0f}ms"
+    )
+    _assert_bars_equal(bars, expected)
+    assert vectorized < resampled
@@ -0,0 +1,83 @@
+"""
+Test the (cross-process) token bucket rate limiter.
+"""
+
+import logging
+import multiprocessing
+import time
+
+import pytest
+
+from pdpolygonapi import PolygonApi
+from pdpolygonapi._rate_limiter import RateLimiter
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def test_rate_limiter_spacing(tmp_path):
+    limiter = RateLimiter(6000, path=tmp_path / "test.bucket")  # 100 per second
+    t0 = time.perf_counter()
+    for _ in range(51):
+        limiter.acquire()
+    elapsed = time.perf_counter() - t0
+    logger.info(f"51 requests at 100/second: {elapsed:.3f}s  stats={limiter.stats()}")
+    assert 0.49 < elapsed < 1.0
+    assert limiter.requests == 51
+    # (if this process is descheduled for more than a token's worth of time, then
+    # a token is available without waiting, so allow for a loaded machine)
+    assert 45 <= limiter.wait_count <= 50
+    assert limiter.wait_time == pytest.approx(0.5, abs=0.1)
+
+    with pytest.raises(ValueError):
+        RateLimiter(0, path=tmp_path / "test.bucket")
+
+
+def test_rate_limiter_burst_and_penalize(tmp_path):
+    limiter = RateLimiter(60, burst=3, path=tmp_path / "test.bucket")
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+    limiter = RateLimiter(60, burst=3, path=tmp_path / "other.bucket")
+    limiter.penalize()
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def _acquire_many(path, count, queue):
+    limiter = RateLimiter(3000, path=path)  # 50 per second
+    for _ in range(count):
+        limiter.acquire()
+        queue.put(time.time())
+
+
+def test_rate_limiter_shared_across_processes(tmp_path):
+    path = tmp_path / "shared.bucket"
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_acquire_many, args=(path, 10, queue)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    times = sorted(queue.get(timeout=30) for _ in range(40))
+    for p in procs:
+        p.join()
+    span = times[-1] - times[0]
+    logger.info(f"40 requests, 4 processes, at 50/second: {span:.3f}s")
+    # 4 processes each at 50/second would take 0.2 seconds, if the bucket were not shared:
+    assert span > 0.7
+
+
+def test_rate_limited_requests(stand_in_api, stand_in):
+    # stand-in allows at most 5 requests per (1 second) window;
+    # the rate limiter keeps us at 4 requests per second:
+    stand_in.max_requests = 5
+    stand_in.rate_window = 1.0
+    api = PolygonApi(apikey="STAND_IN_APIKEY", requests_per_minute=240)
+    api.base_url = stand_in.url
+    tickers = ["T%02d" % n for n in range(12)]
+    t0 = time.perf_counter()
+    dfs = api.fetch_ohlcvdf_many(tickers, start="2025-01-01", end="2025-02-01")
+    elapsed = time.perf_counter() - t0
+    logger.info(f"{len(tickers)} tickers, 4 requests/second: {elapsed:.3f}s  stats={api.rate_limiter.stats()}")
+    assert all(len(df) > 0 for df in dfs.values())
+    assert stand_in.rejected == 0
+    assert elapsed > 2.5
+    assert api.rate_limiter.wait_time > 0
+    api.close()
@@ -0,0 +1,89 @@
+"""
+Test range-sharded (concurrent) requests for long intraday histories.
+"""
+
+import asyncio
+import logging
+import time
+
+import pandas as pd
+import pytest
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+
+def test_ohlcv_shards():
+    api = PolygonApi(apikey="STAND_IN_APIKEY")
+    t0 = int(pd.Timestamp("2024-01-01", tz="US/Eastern").value // 10**6)
+    t1 = int(pd.Timestamp("2024-12-31 23:59:59.999", tz="US/Eastern").value // 10**6)
+    assert api._ohlcv_shards(t0, t1, "day", 1) == [(t0, t1)]
+    assert api._ohlcv_shards(t0, t1, "hour", 1) == [(t0, t1)]
+
+    shards = api._ohlcv_shards(t0, t1, "minute", 1)
+    assert len(shards) == 6  # (about 250k extended hours minutes in a year)
+    assert shards[0][0] == t0 and shards[-1][1] == t1
+    assert all(s0[1] + 1 == s1[0] for s0, s1 in zip(shards[:-1], shards[1:]))
+    assert all((s[1] + 1 - s[0]) % 60000 == 0 for s in shards[:-1])
+    assert len(api._ohlcv_shards(t0, t1, "minute", 5)) == 2
+    api.close()
+
+
+params = [
+    # span, span_multiplier, start, end, market
+    ("minute", 1, "2024-01-01", "2024-12-31", "all"),
+    ("minute", 7, "2022-01-01", "2024-12-31", "all"),  # (aggregates straddle shard boundaries)
+    ("minute", 1, "2024-03-01", "2024-11-30", "regular"),
+    ("second", 1, "2025-01-06", "2025-01-10", "all"),
+]
+
+
+@pytest.mark.parametrize("span, span_multiplier, start, end, market", params)
+def test_sharded_equals_serial(stand_in_api, stand_in, span, span_multiplier, start, end, market):
+    kwargs = dict(start=start, end=end, span=span, span_multiplier=span_multiplier, market=market)
+    sharded = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    shard_requests = stand_in.requests
+
+    stand_in.reset_counters()
+    stand_in_api._SHARD_FILL = float("inf")  # (a single shard: page serially thru next_url)
+    serial = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    logger.info(f"{span} x{span_multiplier}: {len(serial)} rows; {shard_requests} shards vs {stand_in.requests} pages")
+
+    assert shard_requests > 1 and stand_in.requests > 1
+    assert sharded.index.is_unique and sharded.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(sharded, serial)
+
+
+def test_sharded_speed(stand_in_api, stand_in):
+    kwargs = dict(start="2024-01-01", end="2024-12-31", span="minute", market="all")
+    stand_in.latency = 1.0  # (per page of up to 50,000 aggregates)
+    elapsed = {}
+    for fill in (float("inf"), PolygonApi._SHARD_FILL):
+        stand_in_api._SHARD_FILL = fill
+        t0 = time.perf_counter()
+        stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+        elapsed[fill] = time.perf_counter() - t0
+    sharded, serial = elapsed[PolygonApi._SHARD_FILL], elapsed[float("inf")]
+    logger.info(f"one year of minutes: serial={serial:.2f}s sharded={sharded:.2f}s")
+    assert sharded < 0.6 * serial
+
+
+def test_sharded_async_and_rate_limited(stand_in_api, stand_in):
+    kwargs = dict(start="2024-01-01", end="2024-12-31", span="minute", market="all")
+    sync = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+
+    async def main():
+        async with stand_in_api:
+            return await stand_in_api.fetch_ohlcvdf_async("SPY", **kwargs)
+
+    pd.testing.assert_frame_equal(sync, asyncio.run(main()))
+
+    # concurrent shards honor the rate limiter:
+    stand_in.reset_counters()
+    stand_in.max_requests, stand_in.rate_window = 3, 1.0
+    api = PolygonApi(apikey="STAND_IN_APIKEY_SHARDS", requests_per_minute=150)
+    api.base_url = stand_in.url
+    pd.testing.assert_frame_equal(sync, api.fetch_ohlcvdf("SPY", **kwargs))
+    assert stand_in.rejected == 0
+    api.close()
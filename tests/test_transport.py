@@ -0,0 +1,67 @@
+"""
+Test (and benchmark) the pooled, keep-alive transport used for all polygon.io requests.
+"""
+
+import logging
+import time
+
+import requests
+
+from pdpolygonapi import PolygonApi
+
+logger = logging.getLogger("test_pdpgapi")
+
+NUM_REQUESTS = 200
+
+
+def test_transport_defaults(stand_in_api):
+    assert stand_in_api.pool_size == 10
+    assert stand_in_api.timeout == 5
+    assert "gzip" in stand_in_api.session.headers["Accept-Encoding"]
+
+    api = PolygonApi(apikey="STAND_IN_APIKEY", pool_size=32, timeout=2.5)
+    assert api.pool_size == 32
+    assert api.timeout == 2.5
+    api.close()
+
+
+def test_pooled_requests_reuse_connections(stand_in_api, stand_in):
+    kwargs = dict(start="2025-01-02", end="2025-01-06", span="second", market="all")
+    df = stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    assert len(df) > 50000  # more than one page
+    assert stand_in.requests > 1
+    assert stand_in.connections <= stand_in_api.pool_size
+    # a second fetch, in one shard (so its pages are requested one after another),
+    # re-uses the pooled connections:
+    connections, requests = stand_in.connections, stand_in.requests
+    stand_in_api._SHARD_FILL = float("inf")
+    assert len(stand_in_api._ohlcv_requests("SPY", kwargs["start"], kwargs["end"], "second", 1)) == 1
+    stand_in_api.fetch_ohlcvdf("SPY", **kwargs)
+    assert stand_in.requests > requests + 1  # (more than one page)
+    assert stand_in.connections == connections
+
+
+def test_pooled_transport_benchmark(stand_in_api, stand_in):
+    # a light-weight endpoint, so that the transport (not the server) dominates the timing:
+    req = stand_in.url + "/v1/marketstatus/now?apiKey=" + stand_in_api.APIKEY
+
+    t0 = time.perf_counter()
+    for _ in range(NUM_REQUESTS):
+        requests.get(req, timeout=5).json()
+    elapsed_bare = time.perf_counter() - t0
+    bare_connections = stand_in.connections
+
+    stand_in.reset_counters()
+    t0 = time.perf_counter()
+    for _ in range(NUM_REQUESTS):
+        stand_in_api._req_get_json(req)
+    elapsed_pooled = time.perf_counter() - t0
+
+    saved_ms = 1000.0 * (elapsed_bare - elapsed_pooled) / NUM_REQUESTS
+    logger.info(
+        f"per request: bare={1000.0 * elapsed_bare / NUM_REQUESTS:.3f}ms "
+        f"pooled={1000.0 * elapsed_pooled / NUM_REQUESTS:.3f}ms  (saved {saved_ms:.3f}ms)"
+    )
+    # (the latencies are logged above, rather than asserted: they depend on the load on the host)
+    assert bare_connections == NUM_REQUESTS
+    assert stand_in.connections == 1